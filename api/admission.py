@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+
+BUSY = 'busy'
+
+
+class Busy(Exception):
+    pass
+
+
+def busy_response(node_id, reason):
+    """Respuesta de un nodo saturado: quien la recibe debe reintentar en otro nodo"""
+    return {'status': BUSY, 'code': 'BUSY', 'node': node_id,
+            'msg': f'Nodo saturado ({reason}), reintentar en otro nodo'}
+
+
+def is_busy(response):
+    return bool(response) and response.get('status') == BUSY
+
+
+class _Ticket:
+    def __init__(self, task_type, cost):
+        self.task_type = task_type
+        self.cost = cost
+        self.created = time.time()
+
+
+class AdmissionController:
+    """
+    Cola acotada de tareas de calculo del nodo.
+    Como mucho `capacity` tareas corren a la vez (y `limits[tipo]` de cada tipo); el resto
+    espera en orden de llegada. Si ya hay `max_queue` tareas esperando, o el trabajo
+    pendiente estimado supera `max_wait` segundos por worker, la tarea se rechaza con
+    Busy para que el nodo que la envio la reparta a otro.
+    """
+
+    def __init__(self, capacity, limits=None, max_queue=32, max_wait=None):
+        self.capacity = max(1, capacity)
+        self.limits = {t: n for t, n in (limits or {}).items() if n > 0}
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.cond = threading.Condition()
+        self.waiting = deque()
+        self.running = {}               # tipo -> tareas corriendo
+        self.backlog = 0.0              # segundos estimados de lo que corre o espera
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_time = 0.0           # segundos totales en cola
+        self.max_queue_time = 0.0
+
+    def _can_run(self, task_type):
+        if sum(self.running.values()) >= self.capacity: return False
+        limit = self.limits.get(task_type)
+        return limit is None or self.running.get(task_type, 0) < limit
+
+    def _turn(self, ticket):
+        # Primera tarea de la cola que puede arrancar: un tipo en su limite no bloquea a los demas
+        for t in self.waiting:
+            if self._can_run(t.task_type): return t is ticket
+        return False
+
+    def acquire(self, task_type, cost=None, wait=True):
+        """
+        Espera turno y devuelve los segundos que paso en cola; lanza Busy si el nodo esta lleno.
+        Con wait=False no se encola: o arranca ya o lanza Busy.
+        """
+        cost = cost or 0.0
+        with self.cond:
+            # Sin espera: debe haber hueco y ninguna tarea en cola con derecho a pasar antes
+            if not wait and (not self._can_run(task_type) or
+                             any(self._can_run(t.task_type) for t in self.waiting)):
+                self.rejected += 1
+                raise Busy('sin worker libre')
+            if not self._can_run(task_type):
+                if len(self.waiting) >= self.max_queue:
+                    self.rejected += 1
+                    raise Busy(f'{len(self.waiting)} tareas en cola')
+                if self.max_wait is not None and self.backlog / self.capacity > self.max_wait:
+                    self.rejected += 1
+                    raise Busy(f'~{self.backlog / self.capacity:.0f}s de trabajo pendiente')
+
+            ticket = _Ticket(task_type, cost)
+            self.waiting.append(ticket)
+            self.backlog += cost
+            while not self._turn(ticket):
+                self.cond.wait()
+            self.waiting.remove(ticket)
+            self.running[task_type] = self.running.get(task_type, 0) + 1
+
+            waited = time.time() - ticket.created
+            self.admitted += 1
+            self.queue_time += waited
+            self.max_queue_time = max(self.max_queue_time, waited)
+            return waited
+
+    def release(self, task_type, cost=None):
+        with self.cond:
+            self.running[task_type] -= 1
+            self.backlog = max(0.0, self.backlog - (cost or 0.0))
+            self.cond.notify_all()
+
+    def load(self):
+        with self.cond:
+            return {'running': sum(self.running.values()), 'queue': len(self.waiting),
+                    'workers': self.capacity, 'backlog': round(self.backlog, 3)}
+
+    def stats(self):
+        with self.cond:
+            return {
+                'running': dict(self.running),
+                'queue': len(self.waiting),
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'avg_queue_seconds': self.queue_time / self.admitted if self.admitted else 0.0,
+                'max_queue_seconds': self.max_queue_time,
+            }
@@ -0,0 +1,323 @@
+import threading
+import time
+from itertools import chain, repeat
+from numbers import Number
+from operator import add, mul
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Agregacion federada por sumas parciales ponderadas.
+# Cada modelo pesa lo que su `n_samples` (1 si no lo trae) y un "parcial" es la suma
+# ponderada de los parametros de varios trozos:
+#
+#   {'task_type', 'count', 'weight', 'sums': {campo: vector plano}, 'shapes': {campo: dims},
+#    'masks': {campo: peso por elemento}, 'nodes': [executed_by]}
+#
+# Si los modelos no tienen la misma forma (un trozo sin la ultima clase entrena un MLP con
+# menos salidas) se rellenan con ceros hasta la forma mayor y `masks` guarda el peso de
+# cada elemento, asi cada salida se promedia solo entre los modelos que la tienen.
+#
+# Los parametros (escalares, vectores o matrices de cualquier forma) se aplanan a vectores
+# float64 (ndarray con NumPy, listas sin el) y se suman de golpe, sin bucles por tarea.
+# Los parciales se suman en cualquier orden, asi que cada nodo reduce los trozos que calculo
+# y los de sus hijos en el arbol de reduccion, y el coordinador solo combina unos pocos
+# parciales antes de dividir por el peso total (FEDERATED_AVG / FEDERATED_MLP_AVG).
+
+# Campos que se promedian en cada tipo de tarea
+FIELDS = {
+    'ML_TRAIN': ('weights', 'bias', 'mse'),
+    'LOGISTIC': ('weights', 'bias', 'accuracy', 'loss'),
+    'MLP_TRAIN': ('input_to_hidden_w', 'hidden_bias', 'hidden_to_output_w', 'output_bias',
+                  'final_loss'),
+}
+# Metricas opcionales en el resultado de cada trozo (cuentan 0 si faltan)
+OPTIONAL = ('accuracy', 'final_loss', 'mse', 'loss')
+# Parametros del modelo (lo que se difunde como modelo global en el entrenamiento por rondas)
+PARAMS = {t: tuple(f for f in fields if f not in OPTIONAL) for t, fields in FIELDS.items()}
+# Metrica de error que informa cada tipo
+LOSS = {'ML_TRAIN': 'mse', 'LOGISTIC': 'loss', 'MLP_TRAIN': 'final_loss'}
+
+REDUCIBLE = tuple(FIELDS)
+
+
+def _samples(result):
+    n = result.get('n_samples')
+    return float(n) if n and n > 0 else 1.0
+
+
+def _shape(value):
+    shape = []
+    while not isinstance(value, Number):
+        shape.append(len(value))
+        if not len(value): break
+        value = value[0]
+    return shape
+
+
+def _flat(value):
+    """Parametro de cualquier forma (list, array.array, ndarray) -> vector plano float64"""
+    if np is not None: return np.asarray(value, dtype=np.float64).ravel()
+    if isinstance(value, Number): return [float(value)]
+    for _ in range(len(_shape(value)) - 1): value = chain.from_iterable(value)
+    return list(value)
+
+
+def _max_shape(shapes):
+    if len({len(s) for s in shapes}) > 1: raise ValueError(f"Formas incompatibles: {shapes}")
+    return [max(d) for d in zip(*shapes)]
+
+
+def _ones(shape, k=1.0):
+    n = 1
+    for d in shape: n *= d
+    return np.full(n, float(k)) if np is not None else [float(k)] * n
+
+
+def _pad(flat, shape, target):
+    """Vector plano con forma `shape` -> vector plano con forma `target` (mayor), relleno con 0"""
+    shape, target = list(shape), list(target)
+    if shape == target: return flat
+    if np is not None:
+        out = np.zeros(target)
+        out[tuple(slice(0, d) for d in shape)] = np.asarray(flat, dtype=np.float64).reshape(shape)
+        return out.ravel()
+
+    def pad(vals, dims, tdims):
+        if len(dims) == 1: return list(vals) + [0.0] * (tdims[0] - dims[0])
+        step = len(vals) // dims[0] if dims[0] else 0
+        out = []
+        for i in range(dims[0]): out.extend(pad(vals[i * step:(i + 1) * step], dims[1:], tdims[1:]))
+        return out + [0.0] * (len(_ones(tdims[1:])) * (tdims[0] - dims[0]))
+    return pad(list(flat), shape, target)
+
+
+def _weighted_sum(values, weights):
+    if np is not None:
+        return np.asarray(weights) @ np.stack([_flat(v) for v in values])
+    # Sin NumPy: map/operator recorren los vectores en C y los modelos con el mismo
+    # n_samples (lo normal) se suman antes de multiplicar una sola vez por su peso
+    groups = {}
+    for v, w in zip(values, weights):
+        x = _flat(v)
+        groups[w] = list(map(add, groups[w], x)) if w in groups else x
+    total = None
+    for w, x in groups.items():
+        scaled = map(mul, x, repeat(w))
+        total = list(scaled) if total is None else list(map(add, total, scaled))
+    return total
+
+
+def _accumulate(total, x):
+    """total + x (en sitio con NumPy)"""
+    if np is not None:
+        total += _flat(x)
+        return total
+    return list(map(add, total, x))
+
+
+def _divide(sums, mask):
+    """Promedio elemento a elemento (0 donde ningun modelo tiene el elemento)"""
+    if np is not None:
+        sums, mask = np.asarray(sums, dtype=np.float64), np.asarray(mask, dtype=np.float64)
+        return np.divide(sums, mask, out=np.zeros_like(sums), where=mask > 0)
+    return [a / m if m else 0.0 for a, m in zip(sums, mask)]
+
+
+def _unflat(flat, shape, k):
+    """Vector plano x k -> listas anidadas con la forma original (escalar si shape es [])"""
+    if np is not None:
+        return (np.asarray(flat, dtype=np.float64) * k).reshape(shape).tolist()
+    values = list(map(mul, flat, repeat(k)))
+
+    def nest(vals, dims):
+        if not dims: return vals[0]
+        if len(dims) == 1: return vals
+        step = len(vals) // dims[0] if dims[0] else 0
+        return [nest(vals[i * step:(i + 1) * step], dims[1:]) for i in range(dims[0])]
+    return nest(values, list(shape))
+
+
+def partial(task_type, results):
+    """Suma ponderada por n_samples de los resultados completos de varios trozos (None si no hay)"""
+    results = list(results)
+    if not results: return None
+    weights = [_samples(r) for r in results]
+    sums, shapes, masks = {}, {}, {}
+    for f in FIELDS[task_type]:
+        values = [r.get(f, 0) if f in OPTIONAL else r[f] for r in results]
+        value_shapes = [_shape(v) for v in values]
+        target = _max_shape(value_shapes)
+        if any(vs != target for vs in value_shapes):
+            values = [_pad(_flat(v), vs, target) for v, vs in zip(values, value_shapes)]
+            masks[f] = _weighted_sum([_pad(_ones(vs), vs, target) for vs in value_shapes], weights)
+        shapes[f] = target
+        sums[f] = _weighted_sum(values, weights)
+    return {'task_type': task_type, 'count': len(results), 'weight': sum(weights),
+            'sums': sums, 'shapes': shapes, 'masks': masks,
+            'nodes': [r.get('executed_by') for r in results]}
+
+
+def _fold(total, p):
+    """Suma el parcial `p` a `total` (en sitio)"""
+    t_masks, p_masks = total.setdefault('masks', {}), p.get('masks') or {}
+    for f, v in p['sums'].items():
+        ts, ps = list(total['shapes'][f]), list(p['shapes'][f])
+        if ts == ps and f not in t_masks and f not in p_masks:
+            total['sums'][f] = _accumulate(total['sums'][f], v)
+            continue
+        # Formas distintas: rellenar ambos a la mayor y sumar tambien el peso por elemento
+        target = _max_shape([ts, ps])
+        t_mask = t_masks[f] if f in t_masks else _ones(ts, total['weight'])
+        p_mask = p_masks[f] if f in p_masks else _ones(ps, p['weight'])
+        total['sums'][f] = _accumulate(_pad(total['sums'][f], ts, target), _pad(_flat(v), ps, target))
+        t_masks[f] = _accumulate(_pad(t_mask, ts, target), _pad(_flat(p_mask), ps, target))
+        total['shapes'][f] = target
+    total['count'] += p['count']
+    total['weight'] += p['weight']
+    total['nodes'].extend(p['nodes'])
+    return total
+
+
+def merge(partials):
+    """Combina parciales (de trozos distintos) en uno nuevo"""
+    partials = [p for p in partials if p and p.get('count')]
+    if not partials: return None
+    first = partials[0]
+    # Los vectores pueden llegar de otro nodo como list, array.array o ndarray
+    total = dict(first, nodes=list(first['nodes']), shapes=dict(first['shapes']),
+                 sums={f: _flat(v).copy() for f, v in first['sums'].items()},
+                 masks={f: _flat(v).copy() for f, v in (first.get('masks') or {}).items()})
+    for p in partials[1:]: _fold(total, p)
+    return total
+
+
+class StreamingAggregator:
+    """
+    Suma acumulada de los modelos a medida que llegan (callback `on_result` del ChunkScheduler).
+    Cada modelo se suma y se suelta, asi en memoria solo esta la suma; los modelos que se
+    quedaron en los pares (stubs con 'kept') se apuntan por nodo para el REDUCE final.
+    """
+
+    def __init__(self, task_type):
+        self.task_type = task_type
+        self.total = None
+        self.holders = {}           # ip -> [claves de trozos guardados en ese nodo]
+        self.lock = threading.Lock()
+
+    def add(self, result):
+        """Incorpora un resultado y devuelve lo que el trozo debe conservar de el"""
+        if 'kept' in result:
+            with self.lock: self.holders.setdefault(result['holder'], []).append(result['kept'])
+            return result
+        p = partial(self.task_type, [result])
+        with self.lock: self.total = p if self.total is None else _fold(self.total, p)
+        return {'status': 'success', 'executed_by': result.get('executed_by')}
+
+    def add_all(self, results):
+        for r in results:
+            if r and r.get('status') == 'success': self.add(r)
+
+
+def average(p):
+    """Parcial -> {campo: promedio ponderado con su forma original}"""
+    masks = p.get('masks') or {}
+    return {f: _unflat(_divide(v, masks[f]), p['shapes'][f], 1.0) if f in masks
+            else _unflat(v, p['shapes'][f], 1.0 / p['weight']) for f, v in p['sums'].items()}
+
+
+def model_delta(task_type, old, new):
+    """Cambio relativo ||new - old|| / ||old|| entre dos modelos (campos de PARAMS)"""
+    a = [_flat(old[f]) for f in PARAMS[task_type]]
+    b = [_flat(new[f]) for f in PARAMS[task_type]]
+    if np is not None:
+        a, b = np.concatenate(a), np.concatenate(b)
+        if a.shape != b.shape: return float('inf')
+        return float(np.linalg.norm(b - a) / max(np.linalg.norm(a), 1e-12))
+    a, b = list(chain.from_iterable(a)), list(chain.from_iterable(b))
+    if len(a) != len(b): return float('inf')
+    diff = sum((y - x) ** 2 for x, y in zip(a, b)) ** 0.5
+    return diff / max(sum(x * x for x in a) ** 0.5, 1e-12)
+
+
+def finalize(p):
+    """Parcial con todos los trozos -> respuesta del job (mismo formato que la agregacion clasica)"""
+    if not p: return {'status': 'error', 'msg': 'All nodes failed'}
+    task_type, weight = p['task_type'], p['weight']
+    avg = average(p)
+    common = {'nodes_involved': p['nodes'], 'nodes_count': p['count'], 'total_samples': round(weight)}
+
+    if task_type == 'ML_TRAIN':
+        return dict({'status': 'success', 'distribution_mode': 'FEDERATED_AVG',
+                     'algorithm': 'Linear Regression',
+                     'final_weights': avg['weights'], 'final_bias': avg['bias'],
+                     'avg_mse': avg['mse']}, **common)
+    if task_type == 'LOGISTIC':
+        return dict({'status': 'success', 'distribution_mode': 'FEDERATED_AVG',
+                     'algorithm': 'Logistic Regression',
+                     'final_weights': avg['weights'], 'final_bias': avg['bias'],
+                     'avg_accuracy': avg['accuracy'], 'avg_loss': avg['loss']}, **common)
+    return dict({'status': 'success', 'distribution_mode': 'FEDERATED_MLP_AVG',
+                 'algorithm': 'Multi-Layer Perceptron',
+                 'global_model': {
+                     'input_to_hidden_weights': avg['input_to_hidden_w'],
+                     'hidden_bias': avg['hidden_bias'],
+                     'hidden_to_output_weights': avg['hidden_to_output_w'],
+                     'output_bias': avg['output_bias'],
+                 },
+                 'avg_loss': avg['final_loss']}, **common)
+
+
+def build_tree(holders, fanout=4):
+    """
+    Arbol de reduccion sobre los nodos que guardan resultados ({ip: [claves]}).
+    Devuelve como mucho `fanout` subarboles [{'ip', 'keys', 'children'}]; cada nodo
+    tiene a su vez como mucho `fanout` hijos, asi nadie recibe mas de `fanout` parciales.
+    """
+    fanout = max(1, fanout)
+    nodes = sorted(holders.items())
+    if not nodes: return []
+    groups = [nodes[i::fanout] for i in range(min(fanout, len(nodes)))]
+    return [{'ip': g[0][0], 'keys': g[0][1], 'children': build_tree(dict(g[1:]), fanout)}
+            for g in groups]
+
+
+def subtree_keys(tree):
+    keys = list(tree['keys'])
+    for child in tree['children']: keys.extend(subtree_keys(child))
+    return keys
+
+
+def stub(result, key):
+    """Lo que viaja al coordinador en lugar del modelo de un trozo que se queda en el nodo"""
+    return {'status': 'success', 'kept': key, 'executed_by': result.get('executed_by'),
+            'compute_seconds': result.get('compute_seconds')}
+
+
+class KeptResults:
+    """
+    Modelos de trozos calculados en este nodo a la espera del REDUCE del coordinador.
+    Los de copias especulativas que perdieron la carrera nunca se piden: caducan a los `ttl` s.
+    """
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self.jobs = {}              # reduce_id -> (creado, {clave: resultado})
+        self.lock = threading.Lock()
+
+    def put(self, reduce_id, key, result):
+        now = time.time()
+        with self.lock:
+            for rid in [r for r, (ts, _) in self.jobs.items() if now - ts > self.ttl]:
+                del self.jobs[rid]
+            self.jobs.setdefault(reduce_id, (now, {}))[1][key] = result
+
+    def take(self, reduce_id, keys):
+        """Saca los resultados pedidos y olvida el resto del job; devuelve (resultados, claves que faltan)"""
+        with self.lock:
+            _, items = self.jobs.pop(reduce_id, (0, {}))
+        found = [items[k] for k in keys if k in items]
+        missing = [k for k in keys if k not in items]
+        return found, missing
@@ -0,0 +1,150 @@
+import math
+import threading
+import time
+from operator import add
+from libs.linear_models import LinearRegression
+from libs.logistic_regression import LogisticRegression
+
+# Descenso de gradiente distribuido exacto (modo `allreduce` de process_parallel).
+#
+# Cada nodo del anillo guarda un trozo contiguo del dataset durante todo el entrenamiento.
+# En cada epoca calcula la suma de los gradientes de sus filas y los nodos suman esos
+# vectores con un all-reduce en anillo: reduce-scatter y all-gather de 2 (n - 1) pasos, en
+# cada uno un nodo envia a su sucesor (RING_SEND) ~1/n del vector. Todos terminan con la
+# misma suma y aplican el mismo paso, que es el que daria un solo nodo con el dataset
+# completo (normalizado con las estadisticas globales): el modelo coincide con el de single
+# salvo el redondeo del orden de las sumas.
+
+ALLREDUCE_TASKS = {'ML_TRAIN': LinearRegression, 'LOGISTIC': LogisticRegression}
+# Epocas entre dos calculos de la loss (los mismos que en las libs)
+LOG_EVERY = {'ML_TRAIN': 200, 'LOGISTIC': 50}
+
+
+class RingAborted(Exception):
+    pass
+
+
+def _segments(n, size):
+    """Limites [inicio, fin) de `size` segmentos casi iguales de un vector de n elementos"""
+    return [(n * i // size, n * (i + 1) // size) for i in range(size)]
+
+
+def ring_allreduce(vector, rank, size, send, recv):
+    """
+    Suma elemento a elemento de `vector` entre los `size` miembros del anillo.
+    send(paso, valores) entrega al sucesor; recv(paso) devuelve lo recibido del predecesor.
+    Cada segmento se suma en un solo nodo y luego se copia, asi todos obtienen el mismo resultado.
+    """
+    out = [float(v) for v in vector]
+    if size == 1: return out
+    bounds = _segments(len(out), size)
+
+    # Reduce-scatter: tras size-1 pasos el nodo `rank` tiene la suma completa del segmento rank+1
+    for s in range(size - 1):
+        a, b = bounds[(rank - s) % size]
+        send(s, out[a:b])
+        a, b = bounds[(rank - s - 1) % size]
+        out[a:b] = map(add, out[a:b], recv(s))
+
+    # All-gather: cada segmento sumado da la vuelta al anillo
+    for s in range(size - 1):
+        a, b = bounds[(rank - s + 1) % size]
+        send(size - 1 + s, out[a:b])
+        a, b = bounds[(rank - s) % size]
+        out[a:b] = recv(size - 1 + s)
+    return out
+
+
+class RingMailbox:
+    """Segmentos recibidos (RING_SEND) de cada sesion de all-reduce, hasta que los lee recv"""
+
+    TTL = 600   # segundos que se guarda un segmento o un aborto que nadie reclama
+
+    def __init__(self):
+        self.items = {}         # (sesion, llamada, paso) -> (cuando, valores)
+        self.aborted = {}       # sesion -> (cuando, motivo)
+        self.cond = threading.Condition()
+
+    def _purge(self, now):
+        for k in [k for k, (t, _) in self.items.items() if now - t > self.TTL]: del self.items[k]
+        for k in [k for k, (t, _) in self.aborted.items() if now - t > self.TTL]: del self.aborted[k]
+
+    def deliver(self, d):
+        """Mensaje RING_SEND: un segmento del predecesor o el aborto de la sesion"""
+        now = time.time()
+        with self.cond:
+            self._purge(now)
+            if d.get('abort'):
+                self.aborted[d['session']] = (now, d['abort'])
+            else:
+                self.items[(d['session'], d['call'], d['step'])] = (now, d['values'])
+            self.cond.notify_all()
+        return {'status': 'success'}
+
+    def recv(self, session, call, step, timeout):
+        key = (session, call, step)
+        end = time.time() + timeout
+        with self.cond:
+            while key not in self.items:
+                if session in self.aborted:
+                    raise RingAborted(self.aborted[session][1])
+                remaining = end - time.time()
+                if remaining <= 0:
+                    raise RingAborted(f'sin datos del nodo anterior en {timeout}s')
+                self.cond.wait(remaining)
+            return [float(v) for v in self.items.pop(key)[1]]
+
+    def close(self, session):
+        with self.cond:
+            for k in [k for k in self.items if k[0] == session]: del self.items[k]
+            self.aborted.pop(session, None)
+
+
+def train_member(task_type, d, allreduce, progress_cb=None):
+    """
+    Entrenamiento de un miembro del anillo sobre su trozo (d['file_content']).
+    allreduce(vector) devuelve la suma del vector en todo el anillo; todos los miembros hacen
+    exactamente las mismas llamadas en el mismo orden.
+    """
+    model = ALLREDUCE_TASKS[task_type]()
+    n_features = d['n_features']
+    data = model.prepare(d.get('file_content') or '', d['scaling'])
+    # Un trozo sin filas validas participa igual (aporta gradiente 0)
+    X = data.get('X', [])
+    if X and len(X[0]) != n_features:
+        raise ValueError(f'El trozo tiene {len(X[0])} caracteristicas, se esperaban {n_features}')
+    y = data.get('y_normalized' if task_type == 'ML_TRAIN' else 'y', [])
+
+    model.weights = [0.0] * n_features
+    model.bias = 0.0
+    epochs = d.get('epochs') or model.EPOCHS
+    log_every = LOG_EVERY[task_type]
+    n_samples = allreduce([len(X)])[0]
+    if not n_samples: return {'status': 'error', 'msg': 'No valid data parsed'}
+
+    for epoch in range(epochs):
+        dw, db, predictions = model.gradient(X, y)
+        log = (epoch + 1) % log_every == 0
+        vector = dw + [db]
+        if log:
+            vector.append(model.loss_sum(predictions, y) if task_type == 'LOGISTIC'
+                          else sum((p - t) ** 2 for p, t in zip(predictions, y)))
+        total = allreduce(vector)
+        model.step(total[:n_features], total[n_features], n_samples, model.LEARNING_RATE)
+        if log:
+            loss = total[n_features + 1] / n_samples
+            print(f" [ALLREDUCE] Época {epoch+1}/{epochs} - Loss: {loss:.4f}")
+            if progress_cb: progress_cb(epoch + 1, epochs, loss)
+
+    predictions = model.predict_rows(X)
+    result = {'status': 'success', 'weights': model.weights, 'bias': model.bias,
+              'n_samples': int(n_samples), 'n_features': n_features, 'chunk_samples': len(X)}
+    if task_type == 'ML_TRAIN':
+        y_mean, y_std = d['scaling']['y_mean'], d['scaling']['y_std']
+        sse = allreduce([sum((p * y_std + y_mean - t) ** 2 for p, t in zip(predictions, data.get('y', [])))])[0]
+        result.update(mse=sse / n_samples, rmse=math.sqrt(sse / n_samples))
+    else:
+        correct = sum(1 for p, t in zip(predictions, y) if (1 if p >= 0.5 else 0) == t)
+        correct, loss = allreduce([correct, model.loss_sum(predictions, y)])
+        result.update(accuracy=correct / n_samples, loss=loss / n_samples)
+    return result
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from api.protocol import HEADER, MUX_HEADER, MUX_VERSION, pack_msg, pack_mux, decode_body, body_codec, negotiate_codec, check_frame_size
+
+
+class Deferred:
+    """
+    Respuesta que aun no esta lista (long-poll de jobs). El handler la devuelve al momento y
+    AsyncServer la espera en el event loop, sin ocupar un hilo del pool; `expire()` da la
+    respuesta si vence la espera.
+    """
+
+    def __init__(self, timeout, expire):
+        self.future = Future()
+        self.timeout = timeout
+        self.expire = expire
+
+    async def wait(self):
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.future), self.timeout)
+        except asyncio.TimeoutError:
+            return self.expire()
+
+    def result(self):
+        """Espera bloqueante (llamadas desde un hilo, fuera del servidor)"""
+        try:
+            return self.future.result(self.timeout)
+        except FutureTimeout:
+            return self.expire()
+
+
+class AsyncServer:
+    """
+    Servidor TCP sobre asyncio con el mismo protocolo de longitud prefijada.
+    Toda la E/S de red vive en un unico event loop; el trabajo de las apps
+    (entrenamiento, reenvio a otros nodos) se despacha a un pool acotado de hilos,
+    asi miles de conexiones abiertas no cuestan un hilo cada una.
+    """
+
+    def __init__(self, handler, port, max_workers=32, backlog=1024, max_frame=None):
+        self.handler = handler
+        self.max_frame = max_frame
+        self.port = port
+        self.backlog = backlog
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api-worker')
+        self.loop = None
+        self.server = None
+        self.ready = threading.Event()
+
+    async def _read_msg(self, reader):
+        """Devuelve (mensaje, codec); se responde con el mismo codec que uso el cliente"""
+        raw = await reader.readexactly(HEADER.size)
+        msg_len = HEADER.unpack(raw)[0]
+        check_frame_size(msg_len, self.max_frame)
+        data = await reader.readexactly(msg_len)
+        return decode_body(data), body_codec(data)
+
+    async def _read_mux(self, reader):
+        raw = await reader.readexactly(MUX_HEADER.size)
+        msg_len, req_id = MUX_HEADER.unpack(raw)
+        check_frame_size(msg_len, self.max_frame)
+        data = await reader.readexactly(msg_len)
+        return req_id, decode_body(data), body_codec(data)
+
+    async def _dispatch(self, msg):
+        try:
+            response = await self.loop.run_in_executor(self.executor, self.handler, msg)
+            if isinstance(response, Deferred): response = await response.wait()
+            return response
+        except Exception as e:
+            print(f" [API] [ERROR] Error procesando peticion: {e}")
+            return {'status': 'error', 'msg': str(e)}
+
+    async def _reply_mux(self, writer, req_id, msg, codec):
+        response = await self._dispatch(msg)
+        if writer.is_closing(): return
+        writer.write(pack_mux(req_id, response, codec))
+        try: await writer.drain()
+        except ConnectionError: pass
+
+    async def _serve_mux(self, reader, writer):
+        """Conexion persistente: cada trama lleva su request_id y se atiende de forma concurrente"""
+        tasks = set()
+        try:
+            while True:
+                req_id, msg, codec = await self._read_mux(reader)
+                task = asyncio.ensure_future(self._reply_mux(writer, req_id, msg, codec))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks: task.cancel()
+
+    async def _on_client(self, reader, writer):
+        try:
+            msg, codec = await self._read_msg(reader)
+
+            if msg.get('type') == 'MUX_HELLO':
+                writer.write(pack_msg({'status': 'success', 'mux': MUX_VERSION,
+                                       'codec': negotiate_codec(msg.get('codecs'))}, codec))
+                await writer.drain()
+                await self._serve_mux(reader, writer)
+                return
+
+            response = await self._dispatch(msg)
+            writer.write(pack_msg(response, codec))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f" [API] [ERROR] Error procesando cliente: {e}")
+        finally:
+            writer.close()
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(
+            self._on_client, '0.0.0.0', self.port, reuse_address=True, backlog=self.backlog)
+        self.ready.set()
+        async with self.server:
+            try: await self.server.serve_forever()
+            except asyncio.CancelledError: pass
+
+    def start(self):
+        threading.Thread(target=lambda: asyncio.run(self._main()), daemon=True).start()
+        self.ready.wait(5)
+
+    def stop(self):
+        if self.loop and self.server:
+            self.loop.call_soon_threadsafe(self.server.close)
+        self.executor.shutdown(wait=False)
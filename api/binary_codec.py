@@ -0,0 +1,215 @@
+import array
+import json
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Formato binario de mensajes (alternativa compacta a JSON):
+#
+#   MAGIC | >I len(esqueleto) | esqueleto JSON | >H n_buffers | tabla | buffers
+#
+# El esqueleto es el mensaje con cada array numerico (o texto largo) sustituido
+# por {"__buf__": i}. La tabla describe cada buffer: >B dtype, >B ndim, ndim x >I dims,
+# >I nbytes. Los buffers van en little-endian y alineados a 8 bytes.
+
+MAGIC = b'\x00SB1'
+
+DTYPES = {
+    # codigo: (typecode de array, dtype de numpy, bytes por elemento)
+    1: ('d', '<f8', 8),    # float64
+    2: ('f', '<f4', 4),    # float32
+    3: ('B', 'u1', 1),     # uint8 (pixeles)
+    4: ('i', '<i4', 4),    # int32
+    6: ('q', '<i8', 8),    # int64 (enteros de Python)
+}
+UTF8 = 5
+CODE_BY_TYPECODE = {v[0]: k for k, v in DTYPES.items()}
+CODE_BY_NUMPY = {'float64': 1, 'float32': 2, 'uint8': 3, 'int32': 4, 'int64': 6}
+
+# Por debajo de estos tamaños JSON sale igual de barato
+MIN_ELEMENTS = 8
+MIN_TEXT = 1024
+
+_SWAP = sys.byteorder != 'little'
+_ROW_TYPES = (list, array.array) if np is None else (list, array.array, np.ndarray)
+
+
+def is_binary(data):
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def _numeric_code(flat):
+    """
+    dtype sin perdida para una lista plana de numeros: float64 o, si son todos enteros, int64
+    (uno mas estrecho desbordaria en las cuentas del receptor). None si no es numerica o
+    algun valor no cabe: se queda en el JSON.
+    """
+    has_float = False
+    lo = hi = 0
+    for v in flat:
+        t = type(v)
+        if t is float:
+            has_float = True
+        elif t is int:
+            if v < lo: lo = v
+            if v > hi: hi = v
+        else:
+            return None
+    if has_float: return 1 if -2**53 <= lo and hi <= 2**53 else None
+    if -2**63 <= lo and hi < 2**63: return 6
+    return None
+
+
+def _flatten(obj):
+    """Lista 1D o 2D rectangular -> (lista plana, shape); None si no encaja"""
+    if not obj: return None
+    if isinstance(obj[0], _ROW_TYPES):
+        width = len(obj[0])
+        if width == 0 or any(not isinstance(r, _ROW_TYPES) or len(r) != width for r in obj):
+            return None
+        return [v.item() if np is not None and isinstance(v, np.generic) else v
+                for row in obj for v in row], (len(obj), width)
+    return obj, (len(obj),)
+
+
+def _as_buffer(obj):
+    """(codigo, shape, bytes) para arrays numericos, None si hay que dejarlo en el JSON"""
+    if np is not None and isinstance(obj, np.ndarray):
+        code = CODE_BY_NUMPY.get(obj.dtype.name)
+        if code is None:
+            # Se envia con el tipo del emisor; otros enteros se amplian a int64 sin perdida
+            if obj.dtype.kind == 'f' and obj.dtype.itemsize <= 8: code = 1
+            elif obj.dtype.kind == 'i' or (obj.dtype.kind == 'u' and obj.dtype.itemsize <= 4): code = 6
+            else: return None
+        arr = np.ascontiguousarray(obj, dtype=DTYPES[code][1])
+        return code, arr.shape, arr.tobytes()
+
+    if isinstance(obj, array.array):
+        code = CODE_BY_TYPECODE.get(obj.typecode)
+        if code is None: return None
+        if _SWAP:
+            obj = array.array(obj.typecode, obj)
+            obj.byteswap()
+        return code, (len(obj),), obj.tobytes()
+
+    flat = _flatten(obj)
+    if flat is None or len(flat[0]) < MIN_ELEMENTS: return None
+    values, shape = flat
+    code = _numeric_code(values)
+    if code is None: return None
+    packed = array.array(DTYPES[code][0], values)
+    if _SWAP: packed.byteswap()
+    return code, shape, packed.tobytes()
+
+
+def _extract(obj, buffers):
+    if isinstance(obj, dict):
+        return {k: _extract(v, buffers) for k, v in obj.items()}
+    if isinstance(obj, str):
+        if len(obj) < MIN_TEXT: return obj
+        raw = obj.encode()
+        buffers.append((UTF8, (len(raw),), raw))
+        return {'__buf__': len(buffers) - 1}
+    if isinstance(obj, (list, tuple, array.array)) or (np is not None and isinstance(obj, np.ndarray)):
+        buf = _as_buffer(obj)
+        if buf is not None:
+            buffers.append(buf)
+            return {'__buf__': len(buffers) - 1}
+        return [_extract(v, buffers) for v in obj]
+    if np is not None and isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def encode(msg):
+    buffers = []
+    skeleton = json.dumps(_extract(msg, buffers)).encode()
+
+    parts = [MAGIC, struct.pack('>I', len(skeleton)), skeleton, struct.pack('>H', len(buffers))]
+    for code, shape, raw in buffers:
+        parts.append(struct.pack('>BB', code, len(shape)))
+        parts.append(struct.pack(f'>{len(shape)}I', *shape))
+        parts.append(struct.pack('>I', len(raw)))
+    header_len = sum(len(p) for p in parts)
+
+    offset = header_len
+    for _, _, raw in buffers:
+        pad = -offset % 8
+        parts.append(b'\x00' * pad + raw)
+        offset += pad + len(raw)
+    return b''.join(parts)
+
+
+def _nest(flat, shape):
+    """Reconstruye filas a partir de un array plano (modo sin NumPy)"""
+    if len(shape) <= 1: return flat
+    step = len(flat) // shape[0] if shape[0] else 0
+    return [_nest(flat[i * step:(i + 1) * step], shape[1:]) for i in range(shape[0])]
+
+
+def _materialize(view, code, shape):
+    if code == UTF8:
+        return str(view, 'utf-8')
+    typecode, np_dtype, _ = DTYPES[code]
+    if np is not None:
+        # Sin copia: el array apunta directamente al buffer recibido
+        return np.frombuffer(view, dtype=np_dtype).reshape(shape)
+    flat = array.array(typecode)
+    flat.frombytes(view)
+    if _SWAP: flat.byteswap()
+    return _nest(flat, shape)
+
+
+def _inject(obj, arrays):
+    if isinstance(obj, dict):
+        if len(obj) == 1 and '__buf__' in obj:
+            return arrays[obj['__buf__']]
+        return {k: _inject(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_inject(v, arrays) for v in obj]
+    return obj
+
+
+def decode(data):
+    view = memoryview(data)
+    if view.readonly:
+        # Los arrays de NumPy sobre bytes serian de solo lectura
+        view = memoryview(bytearray(data))
+
+    pos = len(MAGIC)
+    skel_len = struct.unpack_from('>I', view, pos)[0]
+    pos += 4
+    skeleton = json.loads(str(view[pos:pos + skel_len], 'utf-8'))
+    pos += skel_len
+    n_buffers = struct.unpack_from('>H', view, pos)[0]
+    pos += 2
+
+    table = []
+    for _ in range(n_buffers):
+        code, ndim = struct.unpack_from('>BB', view, pos)
+        pos += 2
+        shape = struct.unpack_from(f'>{ndim}I', view, pos)
+        pos += 4 * ndim
+        nbytes = struct.unpack_from('>I', view, pos)[0]
+        pos += 4
+        table.append((code, shape, nbytes))
+
+    arrays = []
+    for code, shape, nbytes in table:
+        pos += -pos % 8
+        arrays.append(_materialize(view[pos:pos + nbytes], code, shape))
+        pos += nbytes
+    return _inject(skeleton, arrays)
+
+
+def to_builtin(obj):
+    """`default` de json.dumps: convierte arrays decodificados a listas para clientes JSON"""
+    if isinstance(obj, array.array) or (np is not None and isinstance(obj, np.ndarray)):
+        return obj.tolist()
+    if np is not None and isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
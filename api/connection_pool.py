@@ -0,0 +1,234 @@
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from api.protocol import send_msg, recv_msg, send_mux, recv_mux, MUX_VERSION, SUPPORTED_CODECS, CODEC_JSON
+
+
+class ConnectionLost(Exception):
+    pass
+
+
+class NotSent(ConnectionLost):
+    """La conexion cayo antes de escribir la peticion: el par no la llego a recibir"""
+    pass
+
+
+# Peticiones que se pueden repetir sin efecto doble si la conexion cae tras enviarlas
+IDEMPOTENT = {'PING', 'MONITOR', 'DATASET_PUT', 'DATASET_HAS', 'TASK_CANCEL',
+              'JOB_STATUS', 'JOB_PROGRESS', 'JOB_RESULT', 'JOB_CANCEL', 'JOB_LIST'}
+
+
+class MuxUnsupported(Exception):
+    pass
+
+
+class PeerConnection:
+    """
+    Conexion TCP persistente hacia un par.
+    Varias peticiones comparten el socket; las respuestas se emparejan por request_id.
+    """
+
+    def __init__(self, ip, port, connect_timeout=2.0):
+        self.ip = ip
+        self.port = port
+        self.pending = {}
+        self.next_id = 1
+        self.alive = True
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+
+        self.sock = socket.create_connection((ip, port), timeout=connect_timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            # Handshake en formato clasico: un nodo antiguo contestara 'Unknown Task'
+            send_msg(self.sock, {'type': 'MUX_HELLO', 'version': MUX_VERSION,
+                                 'codecs': SUPPORTED_CODECS, 'is_forwarded': True})
+            reply = recv_msg(self.sock)
+        except Exception:
+            self.sock.close()
+            raise
+        if not reply or reply.get('mux') != MUX_VERSION:
+            self.sock.close()
+            raise MuxUnsupported(ip)
+        # Codificacion acordada para el cuerpo de las tramas (JSON si el par no conoce otra)
+        self.codec = reply.get('codec', CODEC_JSON)
+
+        self.sock.settimeout(None)
+        threading.Thread(target=self._reader, daemon=True).start()
+
+    @property
+    def in_flight(self):
+        return len(self.pending)
+
+    def request(self, msg, timeout):
+        if not self.alive: raise NotSent(self.ip)
+
+        fut = Future()
+        with self.lock:
+            req_id = self.next_id
+            self.next_id = req_id % 0xFFFFFFFF + 1
+            self.pending[req_id] = fut
+        self.last_used = time.time()
+
+        try:
+            with self.send_lock:
+                send_mux(self.sock, req_id, msg, self.codec)
+        except OSError as e:
+            # Una trama a medias no se procesa: el par la descarta al cerrarse el socket
+            self._fail(e)
+            raise NotSent(self.ip)
+
+        try:
+            return fut.result(timeout)
+        except FutureTimeout:
+            # La conexion sigue siendo valida; la respuesta tardia se descarta
+            with self.lock: self.pending.pop(req_id, None)
+            raise
+        finally:
+            self.last_used = time.time()
+
+    def _reader(self):
+        try:
+            while self.alive:
+                req_id, msg = recv_mux(self.sock)
+                if req_id is None: break
+                with self.lock:
+                    fut = self.pending.pop(req_id, None)
+                if fut: fut.set_result(msg)
+            self._fail(ConnectionLost(self.ip))
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, exc):
+        with self.lock:
+            if not self.alive and not self.pending: return
+            self.alive = False
+            pending, self.pending = self.pending, {}
+        try: self.sock.close()
+        except: pass
+        for fut in pending.values():
+            if not fut.done(): fut.set_exception(ConnectionLost(f"{self.ip}: {exc}"))
+
+    def close(self):
+        self._fail(ConnectionLost('closed'))
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones persistentes por par.
+    - Reparte peticiones entre hasta `max_conns_per_peer` sockets multiplexados.
+    - Cierra conexiones ociosas tras `idle_timeout` segundos.
+    - Reconecta una vez si el socket cae a mitad de una peticion y la repite solo si no
+      llego a enviarse o es idempotente (una tarea no se ejecuta dos veces).
+    - Si el par no soporta multiplexado usa el protocolo clasico (un socket por peticion).
+    """
+
+    def __init__(self, port, max_conns_per_peer=2, max_inflight=16,
+                 idle_timeout=60.0, connect_timeout=2.0):
+        self.port = port
+        self.max_conns_per_peer = max_conns_per_peer
+        self.max_inflight = max_inflight
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+
+        self.conns = {}         # ip -> [PeerConnection]
+        self.legacy = set()     # ips que solo hablan el protocolo clasico
+        self.down = set()       # ips que discovery da por muertas
+        self.lock = threading.Lock()
+        self.peer_locks = {}
+        self.running = True
+        threading.Thread(target=self._reaper, daemon=True).start()
+
+    def _peer_lock(self, ip):
+        with self.lock:
+            return self.peer_locks.setdefault(ip, threading.Lock())
+
+    def _acquire(self, ip):
+        with self._peer_lock(ip):
+            conns = [c for c in self.conns.get(ip, []) if c.alive]
+            best = min(conns, key=lambda c: c.in_flight) if conns else None
+
+            if best is None or (best.in_flight >= self.max_inflight
+                                and len(conns) < self.max_conns_per_peer):
+                try:
+                    best = PeerConnection(ip, self.port, self.connect_timeout)
+                    conns.append(best)
+                except MuxUnsupported:
+                    self.legacy.add(ip)
+                    best = None
+
+            with self.lock: self.conns[ip] = conns
+            return best
+
+    def drop(self, ip):
+        """Par caido: falla ya las peticiones en curso y no se reconecta hasta revive()"""
+        with self.lock:
+            self.down.add(ip)
+            conns = self.conns.pop(ip, [])
+        for c in conns: c.close()
+
+    def revive(self, ip):
+        with self.lock: self.down.discard(ip)
+
+    def request(self, ip, msg, timeout=15):
+        if ip in self.down: raise ConnectionLost(f"{ip}: nodo caido")
+        for attempt in range(2):
+            conn = None if ip in self.legacy else self._acquire(ip)
+            if conn is None:
+                return self._legacy_request(ip, msg, timeout)
+            try:
+                return conn.request(msg, timeout)
+            except ConnectionLost as e:
+                if attempt == 1 or ip in self.down: raise
+                if not isinstance(e, NotSent) and msg.get('type') not in IDEMPOTENT: raise
+                print(f" [POOL] Conexion con {ip} perdida, reconectando...")
+
+    def _legacy_request(self, ip, msg, timeout):
+        s = socket.create_connection((ip, self.port), timeout=timeout)
+        try:
+            send_msg(s, msg)
+            return recv_msg(s)
+        finally:
+            s.close()
+
+    def probe(self, ip, timeout=1.0):
+        """Comprueba si el par esta vivo reutilizando (o abriendo) una conexion del pool"""
+        with self.lock:
+            if any(c.alive for c in self.conns.get(ip, [])): return True
+        try:
+            if ip in self.legacy:
+                socket.create_connection((ip, self.port), timeout=timeout).close()
+                return True
+            with self._peer_lock(ip):
+                conn = PeerConnection(ip, self.port, timeout)
+                with self.lock: self.conns.setdefault(ip, []).append(conn)
+            return True
+        except MuxUnsupported:
+            self.legacy.add(ip)
+            return True
+        except OSError:
+            return False
+
+    def _reaper(self):
+        while self.running:
+            time.sleep(max(1.0, self.idle_timeout / 2))
+            now = time.time()
+            with self.lock:
+                for ip, conns in list(self.conns.items()):
+                    keep = []
+                    for c in conns:
+                        if c.alive and (c.in_flight or now - c.last_used < self.idle_timeout):
+                            keep.append(c)
+                        else:
+                            c.close()
+                    if keep: self.conns[ip] = keep
+                    else: del self.conns[ip]
+
+    def close_all(self):
+        self.running = False
+        with self.lock:
+            for conns in self.conns.values():
+                for c in conns: c.close()
+            self.conns = {}
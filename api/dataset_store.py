@@ -0,0 +1,68 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class DatasetTooLarge(ValueError):
+    pass
+
+
+def content_hash(content):
+    """Identificador de un dataset: sha256 de su contenido"""
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class DatasetStore:
+    """
+    Almacen de datasets direccionado por contenido.
+    Los clientes suben cada fichero una vez y las tareas lo referencian por hash;
+    los pares guardan los trozos que se les asignan. Expulsion LRU por tamaño total.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()   # hash -> (contenido, bytes en UTF-8)
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def put(self, content, expected_hash=None):
+        """Guarda el contenido y devuelve su hash; DatasetTooLarge si no cabe en el almacen"""
+        # El limite es en bytes: un texto no ASCII ocupa mas bytes que caracteres
+        raw = content.encode()
+        h = hashlib.sha256(raw).hexdigest()
+        if expected_hash and expected_hash != h:
+            raise ValueError(f"Hash no coincide: {expected_hash} != {h}")
+
+        size = len(raw)
+        if size > self.max_bytes:
+            raise DatasetTooLarge(f"{size} bytes, el almacen admite {self.max_bytes}")
+
+        with self.lock:
+            if h in self.items:
+                self.items.move_to_end(h)
+                return h
+            self.items[h] = (content, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, old_size) = self.items.popitem(last=False)
+                self.size -= old_size
+        return h
+
+    def get(self, h):
+        with self.lock:
+            item = self.items.get(h)
+            if item is None: return None
+            self.items.move_to_end(h)
+            return item[0]
+
+    def missing(self, hashes):
+        with self.lock:
+            return [h for h in hashes if h not in self.items]
+
+    def hashes(self):
+        with self.lock:
+            return list(self.items.keys())
+
+    def stats(self):
+        with self.lock:
+            return {'datasets': len(self.items), 'bytes': self.size, 'max_bytes': self.max_bytes}
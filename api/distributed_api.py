@@ -1,72 +1,255 @@
 import socket
-import json
 import threading
-import struct
 import time
-from apps.ml_app import MLApp
-from apps.image_app import ImageApp
+import uuid
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from api import aggregation
+from api.allreduce import ALLREDUCE_TASKS, RingAborted, RingMailbox, ring_allreduce
+from api.connection_pool import ConnectionPool
+from api.async_server import AsyncServer
+from api.task_executor import TaskExecutor, TaskCancelled, CPU_TASKS
+from api.admission import AdmissionController, Busy, busy_response, is_busy
+from api.dataset_store import DatasetStore, DatasetTooLarge, content_hash
+from api.result_cache import ResultCache
+from api.job_manager import JobManager
+from scheduler.chunk_scheduler import ChunkScheduler
+from scheduler.cost_model import CostModel, EPOCHS
+from network.health import HealthChecker
 from apps.monitor_app import MonitorApp
-from apps.mlp_app import MLPApp
-from apps.logistic_app import LogisticApp
-from apps.decision_tree_app import DecisionTreeApp
+from libs.mlp import MLP
+from libs.preprocessing import data_lines, dataset_stats
 
 class DistributedAPI:
-    def __init__(self, node_id, discovery, scheduler, port=5001):
+    # Por debajo de este tamaño el contenido viaja dentro de la tarea (no compensa el hash)
+    DATASET_INLINE_BYTES = 4096
+    # Timeout al reenviar la tarea de un job asincrono a otro nodo
+    JOB_FORWARD_TIMEOUT = 3600
+    # Peticiones de control (timeout corto): su tiempo de respuesta es la latencia del par y
+    # si vencen el par cuenta como caido. Una tarea larga que vence solo indica que va lenta.
+    CONTROL_TIMEOUT = 2
+    # Nodos a probar cuando el elegido responde que esta saturado
+    BUSY_RETRIES = 2
+    # Parametros del entrenamiento por rondas (no se reenvian a los nodos)
+    ROUND_KEYS = ('rounds', 'tol', 'local_epochs')
+    ROUND_TOL = 1e-3
+    # Segundos sin noticias del nodo anterior del anillo antes de abortar el all-reduce
+    RING_TIMEOUT = 30
+    # Jobs de otros nodos cuyo nodo de origen se recuerda (para enviarle el progreso)
+    JOB_OWNERS = 1024
+
+    def __init__(self, node_id, discovery, scheduler, port=5001, handler_threads=32,
+                 task_workers=0, task_limits=None, dataset_cache_bytes=256 * 1024 * 1024,
+                 result_cache_entries=256, result_cache_dir=None, max_running_jobs=4,
+                 chunk_options=None, health_interval=2.0, task_queue=32, admission_max_wait=None,
+                 reduce_fanout=4):
         self. node_id = node_id
         self.discovery = discovery
         self.scheduler = scheduler
         self.port = port
         self. running = False
+        self.server = None
+        self.handler_threads = handler_threads
 
-        # Apps Locales
-        self.ml_app = MLApp(node_id)
-        self.image_app = ImageApp(node_id)
+        # Apps Locales (las de calculo corren en el pool de procesos)
         self.monitor_app = MonitorApp(node_id)
-        self.mlp_app = MLPApp(node_id)
-        self.logistic_app = LogisticApp(node_id)
-        self.tree_app = DecisionTreeApp(node_id)
+        self.executor = TaskExecutor(node_id, workers=task_workers)
+        # Cola acotada de tareas de calculo: por encima se responde "busy" y se reparte a otro nodo
+        self.admission = AdmissionController(self.executor.capacity, task_limits,
+                                             max_queue=task_queue, max_wait=admission_max_wait)
 
-    def _send_msg(self, sock, msg):
-        msg_bytes = json.dumps(msg).encode()
-        sock.sendall(struct.pack('>I', len(msg_bytes)) + msg_bytes)
+        # Conexiones persistentes hacia los pares
+        self.pool = ConnectionPool(port)
+        self.peer_stats = {}
+        # Coste estimado de cada tarea (calibrado con los tiempos reales)
+        self.costs = CostModel()
+        # Salud de los pares (vivo/caido, latencia) mantenida en segundo plano
+        self.health = HealthChecker(discovery, self._ping, interval=health_interval)
+        # Rendimiento medido: {(task_type, epocas): {ip: lineas/s por worker}}
+        self.throughput = {}
+        # Parametros del reparto dinamico de trozos (tamaño, copias especulativas, reintentos)
+        self.chunk_options = chunk_options or {}
+        # Modelos de trozos que se quedan en este nodo hasta el REDUCE (agregacion en arbol)
+        self.kept = aggregation.KeptResults()
+        self.reduce_fanout = reduce_fanout
+        # Segmentos recibidos en el all-reduce en anillo (modo `allreduce`)
+        self.ring = RingMailbox()
 
-    def _recv_msg(self, sock):
-        try:
-            raw_len = sock.recv(4)
-            if not raw_len: return None
-            msg_len = struct.unpack('>I', raw_len)[0]
-            data = b''
-            while len(data) < msg_len:
-                packet = sock.recv(min(4096, msg_len - len(data)))
-                if not packet: return None
-                data += packet
-            return json.loads(data. decode())
-        except: return None
-
-    def forward_request(self, target_ip, msg):
+        # Datasets y trozos recibidos, direccionados por hash
+        self.datasets = DatasetStore(dataset_cache_bytes)
+        # Resultados de tareas deterministas ya calculadas
+        self.results = ResultCache(result_cache_entries, result_cache_dir)
+        # Jobs asincronos (JOB_SUBMIT / JOB_STATUS / JOB_PROGRESS / JOB_RESULT / JOB_CANCEL)
+        self.jobs = JobManager(node_id, self.handle_message, self.executor, max_running=max_running_jobs)
+        # Tareas de jobs de otros nodos en curso aqui: job_id -> n (TASK_CANCEL las detiene)
+        self.remote_jobs = {}
+        # ... y nodo al que pertenece cada job: su progreso se le envia con JOB_EVENT. No se
+        # borra al terminar la tarea (el ultimo evento puede llegar despues); se guardan los ultimos
+        self.job_owners = OrderedDict()
+        self.remote_lock = threading.Lock()
+        self.jobs.remote_progress = self._forward_progress
+
+    def forward_request(self, target_ip, msg, timeout=15):
         try:
-            remote = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            remote.settimeout(15)
-            remote.connect((target_ip, self.port))
             msg['mode'] = 'single'
             msg['is_forwarded'] = True
-            self._send_msg(remote, msg)
-            response = self._recv_msg(remote)
-            remote.close()
+            slim, blobs = self._strip_datasets(msg)
+            control = timeout <= self.CONTROL_TIMEOUT
+            t0 = time.time()
+            response = self.pool.request(target_ip, slim, timeout)
+            self.health.record(target_ip, True, time.time() - t0 if control else None)
+
+            if blobs and response and response.get('code') == 'DATASET_MISSING':
+                # El par no tiene los datos: subir solo lo que falta y repetir
+                stored = True
+                for h in response.get('missing', []):
+                    if h not in blobs: continue
+                    put = self.pool.request(target_ip, {
+                        'type': 'DATASET_PUT', 'is_forwarded': True,
+                        'data': {'file_content': blobs[h], 'dataset_hash': h}
+                    }, timeout)
+                    stored = stored and bool(put) and put.get('status') == 'success'
+                response = self.pool.request(target_ip, slim if stored else msg, timeout)
+                if stored and response and response.get('code') == 'DATASET_MISSING':
+                    # No cabe en su almacen (o lo expulso otro dataset): el contenido va en la tarea
+                    response = self.pool.request(target_ip, msg, timeout)
             return response
+        except (FutureTimeout, socket.timeout):
+            print(f" [API] [ERROR] {target_ip} no respondio en {timeout}s")
+            if control: self.health.record(target_ip, False)
+            return None
         except Exception as e:
             print(f" [API] [ERROR] Fallo conexion con {target_ip}: {e}")
+            self.health.record(target_ip, False)
             return None
 
-    def _split_data(self, content, num_parts):
-        lines = content.strip().split('\n')
-        total_lines = len(lines)
-        if total_lines == 0: return []
-        chunk_size = -(-total_lines // num_parts)
-        chunks = []
-        for i in range(0, total_lines, chunk_size):
-            chunks.append('\n'.join(lines[i:i + chunk_size]))
-        return chunks
+    def on_member_change(self, node_id, ip, old, new):
+        """
+        Callback de discovery: un par sospechoso deja de recibir trabajo al instante, pero sus
+        peticiones en curso siguen (puede ser una pausa). Solo la muerte confirmada por SWIM
+        corta las conexiones, y sus trozos en curso se reintentan en otros nodos.
+        """
+        if new == 'alive':
+            self.pool.revive(ip)
+            self.health.set_alive(ip, True)
+        elif new in ('suspect', 'dead'):
+            self.health.set_alive(ip, False)
+            if new == 'dead': self.pool.drop(ip)
+
+    @contextmanager
+    def _cancellable(self, job_id, owner=None):
+        """
+        Marca las tareas de `job_id` como en curso en este nodo mientras dura el bloque.
+        `owner`: IP del nodo del job, que recibe el progreso de estas tareas.
+        """
+        if job_id is None:
+            yield
+            return
+        with self.remote_lock:
+            self.remote_jobs[job_id] = self.remote_jobs.get(job_id, 0) + 1
+            if owner:
+                self.job_owners[job_id] = owner
+                self.job_owners.move_to_end(job_id)
+                while len(self.job_owners) > self.JOB_OWNERS: self.job_owners.popitem(last=False)
+        try:
+            yield
+        finally:
+            with self.remote_lock:
+                self.remote_jobs[job_id] -= 1
+                if not self.remote_jobs[job_id]:
+                    del self.remote_jobs[job_id]
+                    self.executor.forget(job_id)
+
+    def _forward_progress(self, task_id, event):
+        """Progreso de una tarea de un job de otro nodo: se envia al nodo del job (JOB_EVENT)"""
+        with self.remote_lock:
+            owner = self.job_owners.get(task_id)
+        if owner:
+            self.forward_request(owner, {'type': 'JOB_EVENT', 'data': {
+                'job_id': task_id, 'event': dict(event, node=self.node_id)}}, timeout=self.CONTROL_TIMEOUT)
+
+    def cancel_task(self, job_id):
+        """
+        TASK_CANCEL: detiene en el siguiente punto de progreso las tareas `job_id` en curso
+        aqui y las que cuelgan de el ('<job_id>/...', p. ej. cada trozo de '<job>/chunks').
+        """
+        with self.remote_lock:
+            active = [t for t in self.remote_jobs if t == job_id or t.startswith(f'{job_id}/')]
+            for t in active: self.executor.cancel(t)
+        if active: print(f" [API] {len(active)} tarea(s) de {job_id} canceladas")
+        return {'status': 'success', 'cancelled': bool(active)}
+
+    def _cancel_task_on(self, ip, task_id):
+        """Detiene las tareas `task_id` en el nodo `ip` (en un hilo si es otro nodo)"""
+        if ip == 'local': return self.cancel_task(task_id)
+        threading.Thread(target=self.forward_request, daemon=True, args=(
+            ip, {'type': 'TASK_CANCEL', 'data': {'job_id': task_id}}, self.CONTROL_TIMEOUT)).start()
+
+    def _cancel_on(self, job_id, ip, task_id):
+        """Al cancelar el job, avisar al nodo `ip` de que detenga sus tareas `task_id`"""
+        if job_id is None: return
+        self.jobs.on_cancel(job_id, ('task', ip), lambda: self._cancel_task_on(ip, task_id))
+
+    def _cancelled(self, job_id):
+        return {'status': 'error', 'code': 'CANCELLED', 'msg': f'Job {job_id} cancelado',
+                'executed_by': self.node_id}
+
+    def _ping(self, ip, timeout):
+        """Sondeo del HealthChecker: cualquier respuesta indica que el nodo esta vivo"""
+        try:
+            return self.pool.request(ip, {'type': 'PING', 'is_forwarded': True}, timeout) is not None
+        except Exception:
+            return False
+
+    def _strip_datasets(self, msg):
+        """Sustituye el contenido por su hash antes de reenviar; devuelve (mensaje, {hash: contenido})"""
+        data = dict(msg.get('data') or {})
+        blobs = {}
+
+        content = data.get('file_content')
+        if isinstance(content, str) and len(content) >= self.DATASET_INLINE_BYTES:
+            h = content_hash(content)
+            blobs[h] = content
+            del data['file_content']
+            data['dataset_hash'] = h
+
+        chunks = data.get('chunks')
+        if chunks and sum(len(c) for c in chunks) >= self.DATASET_INLINE_BYTES:
+            hashes = []
+            for c in data.pop('chunks'):
+                h = content_hash(c)
+                blobs[h] = c
+                hashes.append(h)
+            data['chunk_hashes'] = hashes
+
+        if not blobs: return msg, blobs
+        slim = dict(msg)
+        slim['data'] = data
+        return slim, blobs
+
+    def _resolve_datasets(self, msg):
+        """Rellena file_content/chunks a partir de los hashes; devuelve los hashes que faltan"""
+        data = msg.get('data') or {}
+        missing = []
+
+        h = data.get('dataset_hash')
+        if h:
+            if data.get('file_content'):
+                # Subida junto a la tarea: guardarla para las siguientes (si cabe)
+                try: self.datasets.put(data['file_content'], h)
+                except DatasetTooLarge: pass
+            else:
+                content = self.datasets.get(h)
+                if content is None: missing.append(h)
+                else: data['file_content'] = content
+
+        if 'chunk_hashes' in data:
+            chunks = [self.datasets.get(ch) for ch in data['chunk_hashes']]
+            missing.extend(ch for ch, c in zip(data['chunk_hashes'], chunks) if c is None)
+            data['chunks'] = chunks
+
+        return missing
 
     def _aggregate_results(self, results, task_type):
         valid_results = [r for r in results if r and r. get('status') == 'success']
@@ -76,113 +259,12 @@ class DistributedAPI:
 
         # --- LOGICA DE AGREGACION (FEDERATED LEARNING) ---
         
-        # 1. Regresión Lineal (Vector simple de pesos)
-        if task_type == 'ML_TRAIN':
-            count = len(valid_results)
-            num_weights = len(valid_results[0]['weights'])
-            avg_weights = [0.0] * num_weights
-            avg_bias = 0.0
-            
-            for res in valid_results:
-                w = res['weights']
-                b = res['bias']
-                avg_bias += b
-                for i in range(num_weights): avg_weights[i] += w[i]
-            
-            return {
-                'status': 'success',
-                'distribution_mode': 'FEDERATED_AVG',
-                'algorithm': 'Linear Regression',
-                'final_weights': [x/count for x in avg_weights],
-                'final_bias': avg_bias/count,
-                'nodes_involved': [r['executed_by'] for r in valid_results],
-                'nodes_count': len(valid_results)
-            }
-
-        # 2. Regresión Logística
-        elif task_type == 'LOGISTIC':
-            count = len(valid_results)
-            num_weights = len(valid_results[0]['weights'])
-            avg_weights = [0.0] * num_weights
-            avg_bias = 0.0
-            total_accuracy = 0.0
-            
-            for res in valid_results:
-                w = res['weights']
-                b = res['bias']
-                avg_bias += b
-                total_accuracy += res. get('accuracy', 0)
-                for i in range(num_weights): avg_weights[i] += w[i]
-            
-            return {
-                'status': 'success',
-                'distribution_mode': 'FEDERATED_AVG',
-                'algorithm': 'Logistic Regression',
-                'final_weights': [x/count for x in avg_weights],
-                'final_bias': avg_bias/count,
-                'avg_accuracy': total_accuracy/count,
-                'nodes_involved': [r['executed_by'] for r in valid_results],
-                'nodes_count': len(valid_results)
-            }
-
-        # 3. MLP (Promedio de Matrices complejas)
-        elif task_type == 'MLP_TRAIN':
-            count = len(valid_results)
-            base = valid_results[0]
-            
-            # Inicializar matrices suma
-            W1_sum = [[cell for cell in row] for row in base['input_to_hidden_w']]
-            b1_sum = base['hidden_bias'][:]
-            W2_sum = [[cell for cell in row] for row in base['hidden_to_output_w']]
-            b2_sum = base['output_bias'][:]
-            total_loss = base. get('final_loss', 0)
-
-            # Sumar resto de nodos
-            for i in range(1, count):
-                res = valid_results[i]
-                total_loss += res.get('final_loss', 0)
-                
-                # Sumar W1
-                for r in range(len(W1_sum)):
-                    for c in range(len(W1_sum[0])):
-                        W1_sum[r][c] += res['input_to_hidden_w'][r][c]
-                
-                # Sumar b1
-                for j in range(len(b1_sum)):
-                    b1_sum[j] += res['hidden_bias'][j]
-                
-                # Sumar W2
-                for r in range(len(W2_sum)):
-                    for c in range(len(W2_sum[0])):
-                        W2_sum[r][c] += res['hidden_to_output_w'][r][c]
-                
-                # Sumar b2
-                for j in range(len(b2_sum)):
-                    b2_sum[j] += res['output_bias'][j]
-
-            # Promediar todo
-            W1_avg = [[x / count for x in row] for row in W1_sum]
-            b1_avg = [x / count for x in b1_sum]
-            W2_avg = [[x / count for x in row] for row in W2_sum]
-            b2_avg = [x / count for x in b2_sum]
-            
-            return {
-                'status': 'success',
-                'distribution_mode': 'FEDERATED_MLP_AVG',
-                'algorithm': 'Multi-Layer Perceptron',
-                'global_model': {
-                    'input_to_hidden_weights': W1_avg,
-                    'hidden_bias': b1_avg,
-                    'hidden_to_output_weights': W2_avg,
-                    'output_bias': b2_avg
-                },
-                'avg_loss': total_loss / count,
-                'nodes_involved': [r['executed_by'] for r in valid_results],
-                'nodes_count': len(valid_results)
-            }
+        # 1-3. Regresion lineal, logistica y MLP: promedio de pesos por sumas parciales
+        if task_type in aggregation.REDUCIBLE:
+            return aggregation.finalize(aggregation.partial(task_type, valid_results))
 
         # 4. Árboles de Decisión (Ensemble voting)
-        elif task_type == 'TREE_TRAIN':
+        if task_type == 'TREE_TRAIN':
             count = len(valid_results)
             avg_accuracy = sum(r.get('accuracy', 0) for r in valid_results) / count
             
@@ -220,7 +302,7 @@ class DistributedAPI:
 
         return {'status': 'success', 'results': valid_results}
 
-    def process_parallel(self, msg):
+    def process_parallel(self, msg, job_id=None):
         peers = self.discovery.get_peers()
         candidates = [{'ip': p['ip']} for p in peers. values()]
         candidates.append({'ip': 'local'})
@@ -229,107 +311,559 @@ class DistributedAPI:
         print(f" [PARALLEL] [BUSCANDO] Buscando nodos para {msg['type']}...")
         for w in candidates:
             target = w['ip']
+            # Estado cacheado por el HealthChecker: no se abre ninguna conexion aqui
             if target == 'local': 
                 active_workers.append(w)
+            elif self.health.is_alive(target):
+                active_workers.append(w)
+                print(f" [PARALLEL] [OK] Nodo {target} disponible")
             else:
-                try:
-                    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    s.settimeout(1.0)
-                    s.connect((target, self.port))
-                    s.close()
-                    active_workers.append(w)
-                    print(f" [PARALLEL] [OK] Nodo {target} disponible")
-                except: 
-                    print(f" [PARALLEL] [ADVERTENCIA] Nodo {target} no responde")
+                print(f" [PARALLEL] [ADVERTENCIA] Nodo {target} no responde")
         
-        num_workers = len(active_workers)
-        print(f" [PARALLEL] [INICIANDO] Distribuyendo a {num_workers} nodos...")
-        chunks = self._split_data(msg['data']. get('file_content',''), num_workers)
-        
-        threads = []
+        # Cola compartida de trozos: cada nodo pide un lote (un trozo por worker) al terminar el anterior
+        workers = [self._worker_info(w['ip']) for w in active_workers]
+        print(f" [PARALLEL] [INICIANDO] Distribuyendo a {len(workers)} nodos "
+              f"({sum(w['slots'] for w in workers)} workers)...")
+        for w in workers:
+            print(f" [PARALLEL]   {w['ip']}: {w['slots']} workers, capacidad {w['capacity']:.1f}")
+
+        # Solo cuentan las filas de datos: un bloque de comentarios no forma un trozo vacio
+        lines = data_lines(msg['data'].get('file_content', ''))
+        params = {k: v for k, v in msg['data'].items()
+                  if k not in ('file_content', 'dataset_hash', 'deadline', 'allreduce') + self.ROUND_KEYS}
+        # Plazo opcional (segundos): al vencer se responde con lo agregado hasta entonces
+        deadline = msg['data'].get('deadline')
+
+        if msg['data'].get('allreduce') and msg['type'] in ALLREDUCE_TASKS and \
+                msg['data'].get('algorithm', 'linear') == 'linear':
+            return self._ring_train(msg['type'], msg['data'], workers, params, job_id)
+
+        if msg['type'] in aggregation.REDUCIBLE:
+            try:
+                rounds, tol, local_epochs = self._round_options(msg['type'], msg['data'])
+            except ValueError as e:
+                return {'status': 'error', 'msg': str(e)}
+            if rounds > 1:
+                return self._federated_rounds(msg['type'], msg['data'], lines, workers, params,
+                                              rounds, tol, local_epochs, job_id)
+
+        scheduler, results, merged = self._run_chunks(msg['type'], lines, workers, params, deadline, job_id)
+        if msg['type'] in aggregation.REDUCIBLE:
+            final = aggregation.finalize(merged)
+        else:
+            final = self._aggregate_results(results, msg['type'])
+        # Intentos por trozo: permite ver que parte del dataset se reintento o se perdio
+        final.update(scheduler.report())
+        if scheduler.stopped and final.get('status') == 'success': final['partial'] = True
+        return final
+
+    def _run_chunks(self, task_type, lines, workers, params, deadline=None, job_id=None):
+        """
+        Una pasada del dataset por la cola de trozos.
+        Devuelve (scheduler, resultados por trozo, parcial agregado o None si no es promediable).
+        Si se cancela el job se deja de repartir y cada nodo con trozos en curso los detiene.
+        """
+        # Promedios federados: cada modelo se suma al llegar (o se queda en el par que lo
+        # calculo y se suma en arbol al final); el coordinador no guarda los modelos
+        stream = reduce_id = None
+        if task_type in aggregation.REDUCIBLE:
+            stream = aggregation.StreamingAggregator(task_type)
+            reduce_id = uuid.uuid4().hex
+
+        # Id de las tareas de los trozos: '<job>/chunks/<clave>' (el del job lo usa su propio
+        # progreso). Sin job tambien llevan id, para cancelar la copia perdedora de un rezagado
+        task_id = f"{job_id or uuid.uuid4().hex}/chunks"
+
+        def run_batch(ip, contents, keys):
+            self._cancel_on(job_id, ip, task_id)
+            if ip == 'local':
+                return self.process_batch(task_type, params, contents, keys=keys, job_id=task_id)
+            # Un solo reenvio con todos los trozos del lote
+            data = {'task_type': task_type, 'params': params, 'chunks': contents, 'keys': keys,
+                    'job_id': task_id}
+            if job_id: data['job_owner'] = self.discovery.my_ip
+            if reduce_id: data['keep'] = reduce_id
+            response = self.forward_request(ip, {'type': 'BATCH', 'data': data})
+            results = (response or {}).get('results')
+            for r in results or []:
+                if r and 'kept' in r: r['holder'] = ip
+            return results
+
+        # Las lineas/s dependen de las epocas: las rondas cortas no falsean el tamaño de trozo
+        rate_key = (task_type, params.get('epochs'))
+        scheduler = ChunkScheduler(lines, workers, run_batch,
+                                   throughput=self.throughput.get(rate_key),
+                                   on_result=stream.add if stream else None,
+                                   on_discard=lambda ip, key: self._cancel_task_on(ip, f"{task_id}/{key}"),
+                                   fixed_chunks=task_type in aggregation.REDUCIBLE, **self.chunk_options)
+        if job_id: self.jobs.on_cancel(job_id, 'chunks', scheduler.stop)
+        results = scheduler.run(deadline)
+        self.throughput[rate_key] = scheduler.throughput
+
+        merged = self._tree_aggregate(stream, reduce_id, scheduler, params) if stream else None
+        return scheduler, results, merged
+
+    def _round_options(self, task_type, data):
+        """(rounds, tol, local_epochs) de la peticion; ausentes o null toman el valor por defecto"""
+        try:
+            rounds = int(1 if data.get('rounds') is None else data['rounds'])
+            tol = float(self.ROUND_TOL if data.get('tol') is None else data['tol'])
+            local_epochs = int(max(1, EPOCHS[task_type] // 10) if data.get('local_epochs') is None
+                               else data['local_epochs'])
+        except (TypeError, ValueError):
+            raise ValueError("'rounds' y 'local_epochs' deben ser enteros y 'tol' un numero")
+        if rounds < 1 or local_epochs < 1 or not tol >= 0:
+            raise ValueError("'rounds' y 'local_epochs' deben ser >= 1 y 'tol' >= 0")
+        return rounds, tol, local_epochs
+
+    def _federated_rounds(self, task_type, data, lines, workers, params, rounds, tol, local_epochs,
+                          job_id=None):
+        """
+        Entrenamiento federado por rondas (FedAvg): en cada ronda los nodos entrenan
+        `local_epochs` epocas sobre sus trozos partiendo del modelo global, y el promedio
+        ponderado pasa a ser el modelo global de la siguiente. Termina tras `rounds` rondas,
+        cuando el cambio relativo del modelo baja de `tol` o al vencer el plazo.
+        """
+        deadline = data.get('deadline')
+        end = time.time() + deadline if deadline else None
+
+        # Todos los nodos normalizan con las estadisticas del dataset completo
+        stats = dataset_stats(data.get('file_content', ''))
+        if stats is None: return {'status': 'error', 'msg': 'No valid data'}
+        params = dict(params, epochs=local_epochs)
+        params['scaling'] = {k: stats[k] for k in ('means', 'stds', 'y_mean', 'y_std')}
+
+        model = None
+        if task_type == 'MLP_TRAIN':
+            # Inicializacion comun: promediar redes con pesos iniciales distintos no converge
+            net = MLP(stats['n_features'], 5, stats['n_classes'], params.get('seed'))
+            model = {'input_to_hidden_w': net.W1, 'hidden_bias': net.b1,
+                     'hidden_to_output_w': net.W2, 'output_bias': net.b2}
+
+        # `source`: planificador de la ronda de la que sale el modelo devuelto
+        history, merged, scheduler, source, converged = [], None, None, None, False
+        print(f" [FEDAVG] {rounds} rondas de {params['epochs']} epocas locales (tol {tol})")
+        for r in range(1, rounds + 1):
+            remaining = None if end is None else end - time.time()
+            if remaining is not None and remaining <= 0: break
+            if model is not None: params['init_model'] = model
+            t0 = time.time()
+            scheduler, _, round_merged = self._run_chunks(task_type, lines, workers, params, remaining, job_id)
+            if not round_merged: break
+            merged, source = round_merged, scheduler
+
+            avg = aggregation.average(merged)
+            new_model = {f: avg[f] for f in aggregation.PARAMS[task_type]}
+            delta = aggregation.model_delta(task_type, model, new_model) if model is not None else None
+            loss = avg[aggregation.LOSS[task_type]]
+            history.append({'round': r, 'loss': round(loss, 6), 'chunks': merged['count'],
+                            'delta': None if delta is None else round(delta, 6),
+                            'seconds': round(time.time() - t0, 3)})
+            print(f" [FEDAVG] Ronda {r}/{rounds} - loss {loss:.4f}"
+                  + ('' if delta is None else f", cambio del modelo {delta:.2e}"))
+            model = new_model
+            if scheduler.stopped: break
+            if delta is not None and delta < tol:
+                converged = True
+                break
+
+        final = aggregation.finalize(merged)
+        if final.get('status') != 'success': return final
+        final.update(source.report())
+        final.update(rounds=len(history), converged=converged, local_epochs=params['epochs'],
+                     total_epochs=len(history) * params['epochs'], history=history,
+                     scaling=params['scaling'])
+        # Plazo vencido o ronda fallida: se responde con el ultimo modelo global
+        if scheduler.stopped or (len(history) < rounds and not converged): final['partial'] = True
+        if scheduler is not source: final['failed_round'] = len(history) + 1
+        return final
+
+    def _ring_train(self, task_type, data, workers, params, job_id=None):
+        """
+        Descenso de gradiente por all-reduce en anillo (api/allreduce.py): cada nodo recibe un
+        trozo contiguo del dataset (proporcional a su rendimiento medido por worker) y los
+        gradientes se suman en cada epoca. El modelo es el del modo single con el dataset entero.
+        """
+        content = data.get('file_content', '')
+        stats = dataset_stats(content)
+        if stats is None: return {'status': 'error', 'msg': 'No valid data'}
+
+        # El coordinador es el miembro 0 del anillo; los pares le envian a su IP real
+        members = sorted(workers, key=lambda w: w['ip'] != 'local')
+        ring = [self.discovery.my_ip if w['ip'] == 'local' else w['ip'] for w in members]
+        rates = self.throughput.get((task_type, None)) or {}
+        default = sum(rates.values()) / len(rates) if rates else 1.0
+        shares = [rates.get(w['ip'], default) for w in members]
+        lines = data_lines(content)
+        cuts = [0]
+        for i in range(len(members)):
+            cuts.append(round(len(lines) * sum(shares[:i + 1]) / sum(shares)))
+
+        session = uuid.uuid4().hex
+        base = dict(params, task_type=task_type, session=session, ring=ring,
+                    n_features=stats['n_features'],
+                    scaling={k: stats[k] for k in ('means', 'stds', 'y_mean', 'y_std')})
+        replies = [None] * len(members)
+        print(f" [ALLREDUCE] Anillo de {len(ring)} nodos, trozos de "
+              f"{[cuts[i + 1] - cuts[i] for i in range(len(members))]} lineas")
+
+        def abort(reason):
+            msg = {'session': session, 'abort': reason}
+            self.ring.deliver(msg)
+            for ip in ring[1:]:
+                self.forward_request(ip, {'type': 'RING_SEND', 'data': msg}, timeout=2)
+
+        def run(rank):
+            d = dict(base, rank=rank, file_content='\n'.join(lines[cuts[rank]:cuts[rank + 1]]))
+            try:
+                if members[rank]['ip'] == 'local':
+                    reply = self.ring_member(d)
+                else:
+                    reply = self.forward_request(members[rank]['ip'], {'type': 'RING_TRAIN', 'data': d},
+                                                 timeout=self.JOB_FORWARD_TIMEOUT)
+            except Exception as e:
+                reply = {'status': 'error', 'msg': f'{ring[rank]}: {e}'}
+            replies[rank] = reply
+            if not reply or reply.get('status') != 'success':
+                # Un miembro caido bloquea el anillo: despertar al resto en vez de esperar el timeout
+                abort((reply or {}).get('msg') or f'{ring[rank]} no responde')
+
+        # Cancelar el job aborta el anillo en todos los miembros
+        if job_id: self.jobs.on_cancel(job_id, 'ring', lambda: abort(f'job {job_id} cancelado'))
+
+        t0 = time.time()
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(members))]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        failed = [r for r in replies if not r or r.get('status') != 'success']
+        busy = [r for r in failed if is_busy(r)]
+        if busy:
+            # Todo o nada: sin un worker libre en cada miembro no hay anillo; reintentar despues
+            return busy_response(self.node_id, f"miembro {busy[0].get('node')} del anillo sin worker libre")
+        if failed:
+            return {'status': 'error', 'msg': f"All-reduce interrumpido: {(failed[0] or {}).get('msg', 'nodo caido')}"}
+        model = replies[0]
+        final = {'status': 'success', 'distribution_mode': 'RING_ALLREDUCE',
+                 'algorithm': 'Linear Regression' if task_type == 'ML_TRAIN' else 'Logistic Regression',
+                 'final_weights': model['weights'], 'final_bias': model['bias'],
+                 'total_samples': model['n_samples'], 'epochs': model['epochs'],
+                 'nodes_involved': [r['executed_by'] for r in replies], 'nodes_count': len(replies),
+                 'chunk_samples': [r['chunk_samples'] for r in replies],
+                 'comm_seconds': [r['comm_seconds'] for r in replies],
+                 'seconds': round(time.time() - t0, 3), 'scaling': base['scaling']}
+        for k in ('mse', 'rmse', 'accuracy', 'loss'):
+            if k in model: final[k] = model[k]
+        return final
+
+    def ring_member(self, d):
+        """RING_TRAIN: entrena el trozo de este nodo como miembro d['rank'] del anillo d['ring']"""
+        ring, rank, session = d['ring'], d['rank'], d['session']
+        successor = ring[(rank + 1) % len(ring)]
+        calls = [0]
+        comm = [0.0]
+
+        def allreduce(vector):
+            call = calls[0]
+            calls[0] += 1
+
+            def send(step, values):
+                reply = self.forward_request(successor, {'type': 'RING_SEND', 'data': {
+                    'session': session, 'call': call, 'step': step, 'values': values}},
+                    timeout=self.RING_TIMEOUT)
+                if not reply or reply.get('status') != 'success':
+                    raise RingAborted(f'{successor} no responde')
+
+            t0 = time.time()
+            total = ring_allreduce(vector, rank, len(ring), send,
+                                   lambda step: self.ring.recv(session, call, step, self.RING_TIMEOUT))
+            comm[0] += time.time() - t0
+            return total
+
+        t = d['task_type']
+        estimate = self.costs.estimate(t, d)
+        try:
+            # Sin cola: un miembro encolado detendria a los demas ya admitidos (dos anillos
+            # cruzados se bloquearian hasta RING_TIMEOUT); si no hay worker libre se aborta ya
+            self.admission.acquire(t, estimate, wait=False)
+        except Busy as e:
+            return busy_response(self.node_id, e)
+        try:
+            result = self.executor.run_ring(t, d, allreduce)
+        except RingAborted as e:
+            print(f" [ALLREDUCE] [ERROR] Anillo interrumpido: {e}")
+            return {'status': 'error', 'msg': str(e), 'executed_by': self.node_id}
+        except Exception as e:
+            # Datos invalidos, proceso caido...: quien coordina el anillo aborta a los demas
+            print(f" [ALLREDUCE] [ERROR] Fallo del miembro {rank}: {e}")
+            return {'status': 'error', 'msg': f'{self.node_id}: {e}', 'executed_by': self.node_id}
+        finally:
+            self.admission.release(t, estimate)
+            self.ring.close(session)
+        result.update(executed_by=self.node_id, epochs=d.get('epochs') or ALLREDUCE_TASKS[t].EPOCHS,
+                      comm_seconds=round(comm[0], 4))
+        return result
+
+    def _worker_info(self, ip):
+        """Workers y capacidad libre de un nodo (consulta MONITOR con cache de 30 s)"""
+        if ip == 'local':
+            stats = self.monitor_app.get_stats()
+            stats['workers'] = self.executor.capacity
+        else:
+            cached = self.peer_stats.get(ip)
+            if cached and time.time() - cached[1] < 30:
+                stats = cached[0]
+            else:
+                stats = self.forward_request(ip, {'type': 'MONITOR', 'data': {}}, timeout=2) or {}
+                self.peer_stats[ip] = (stats, time.time())
+
+        slots = max(1, int(stats.get('workers', 1)))
+        return {'ip': ip, 'slots': slots, 'capacity': self._capacity(stats, slots)}
+
+    @staticmethod
+    def _capacity(stats, slots):
+        """Nucleos libres: nucleos x (1 - uso de CPU); sin estadisticas, un nucleo por worker"""
+        cores = stats.get('cores') or slots
+        cpu = stats.get('cpu')
+        if cpu is None: return float(slots)
+        # Un nodo saturado sigue recibiendo una parte minima
+        return cores * max(0.1, 1 - cpu / 100.0)
+
+    def _tree_aggregate(self, stream, reduce_id, scheduler, params):
+        """
+        Cierra la agregacion en arbol: a la suma acumulada de los modelos recibidos se añaden
+        los parciales de `reduce_fanout` subarboles de nodos que guardan modelos. Los trozos
+        cuyo modelo se perdio (nodo caido antes del REDUCE) se recalculan aqui, salvo que
+        ya haya vencido el plazo del job. Devuelve el parcial con todos los modelos.
+        """
+        task_type = stream.task_type
+        trees = aggregation.build_tree(stream.holders, self.reduce_fanout)
+        partials, missing = self._reduce_subtrees(task_type, reduce_id, trees)
+        if missing and not scheduler.stopped:
+            print(f" [REDUCE] [ADVERTENCIA] {len(missing)} modelo(s) perdidos, recalculando en local")
+            stream.add_all(self.process_batch(task_type, params, [scheduler.content(k) for k in missing]))
+        elif missing:
+            print(f" [REDUCE] [ADVERTENCIA] {len(missing)} modelo(s) perdidos tras el plazo")
+        merged = aggregation.merge([stream.total] + partials)
+        print(f" [REDUCE] {(merged or {}).get('count', 0)} modelos agregados ({len(trees)} "
+              f"parcial(es) de {len(stream.holders)} nodo(s))")
+        return merged
+
+    def _reduce_subtrees(self, task_type, reduce_id, trees):
+        """REDUCE en paralelo a la raiz de cada subarbol; devuelve (parciales, claves perdidas)"""
+        replies = [None] * len(trees)
+
+        def run(i):
+            tree = trees[i]
+            replies[i] = self.forward_request(tree['ip'], {'type': 'REDUCE', 'data': {
+                'task_type': task_type, 'reduce_id': reduce_id,
+                'keys': tree['keys'], 'children': tree['children']}})
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(trees))]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        partials, missing = [], []
+        for tree, reply in zip(trees, replies):
+            if reply and reply.get('status') == 'success':
+                partials.append(reply.get('partial'))
+                missing.extend(reply.get('missing', []))
+            else:
+                missing.extend(aggregation.subtree_keys(tree))
+        return partials, missing
+
+    def reduce_subtree(self, d):
+        """REDUCE: suma los modelos guardados aqui y los parciales de los hijos"""
+        results, missing = self.kept.take(d['reduce_id'], d.get('keys', []))
+        partials, lost = self._reduce_subtrees(d['task_type'], d['reduce_id'], d.get('children', []))
+        partials.append(aggregation.partial(d['task_type'], results))
+        return {'status': 'success', 'partial': aggregation.merge(partials), 'missing': missing + lost}
+
+    def process_batch(self, task_type, params, chunks, keep=None, keys=None, job_id=None, owner=None):
+        """
+        Ejecuta varios trozos de la misma tarea a la vez sobre el pool de procesos.
+        Con `keep` los modelos se guardan aqui (para el REDUCE) y solo se devuelve un resumen.
+        Con `job_id` cada trozo corre como la tarea '<job_id>/<clave>', que se puede detener con
+        TASK_CANCEL (el trozo o todo el lote), y su progreso va a `owner`.
+        """
         results = [None] * len(chunks)
-        
-        def worker(idx, ip, data):
-            sub = msg. copy()
-            sub['data'] = msg['data']. copy()
-            sub['data']['file_content'] = data
-            if ip == 'local': 
-                results[idx] = self.process_local(sub)
-            else: 
-                results[idx] = self.forward_request(ip, sub)
-
-        for i, w in enumerate(active_workers):
-            if i < len(chunks):
-                t = threading.Thread(target=worker, args=(i, w['ip'], chunks[i]))
-                t.start()
-                threads.append(t)
-        
-        for t in threads: 
-            t.join()
-        
-        return self._aggregate_results(results, msg['type'])
 
-    def process_local(self, msg):
+        def run(i):
+            sub_data = dict(params)
+            sub_data['file_content'] = chunks[i]
+            task_id = f"{job_id}/{keys[i]}" if job_id and keys else job_id
+            with self._cancellable(task_id, owner):
+                try:
+                    results[i] = self.process_local({'type': task_type, 'data': sub_data}, task_id)
+                except TaskCancelled:
+                    results[i] = self._cancelled(task_id)
+            if keep and results[i] and results[i].get('status') == 'success':
+                self.kept.put(keep, keys[i], results[i])
+                results[i] = aggregation.stub(results[i], keys[i])
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(chunks))]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        return results
+
+    def process_local(self, msg, job_id=None):
         t = msg.get('type')
         d = msg['data']
         
         print(f" [LOCAL] Procesando {t} en nodo {self.node_id}")
         
-        if t == 'ML_TRAIN': 
-            return self.ml_app.run_task(d)
-        elif t == 'LOGISTIC': 
-            return self.logistic_app.run_task(d)
-        elif t == 'MLP_TRAIN': 
-            return self.mlp_app. run_task(d)
-        elif t == 'TREE_TRAIN':
-            return self.tree_app.run_task(d)
-        elif t == 'IMAGE_PROC': 
-            return self.image_app.process(d)
+        if t in CPU_TASKS: 
+            key = self.results.key(t, d)
+            if key:
+                cached = self.results.get(key)
+                if cached is not None:
+                    print(f" [LOCAL] Resultado de {t} servido desde cache")
+                    return cached
+            units = self.costs.units(t, d)
+            estimate = self.costs.seconds(t, units)
+            try:
+                waited = self.admission.acquire(t, estimate)
+            except Busy as e:
+                print(f" [LOCAL] [OCUPADO] {t} rechazada: {e}")
+                return busy_response(self.node_id, e)
+            try:
+                result = self.executor.run(t, d, job_id)
+            finally:
+                self.admission.release(t, estimate)
+            if result and result.get('status') == 'success' and 'compute_seconds' in result:
+                self.costs.observe(t, units, result['compute_seconds'])
+            if key: self.results.put(key, result)
+            if isinstance(result, dict): result = dict(result, queue_seconds=round(waited, 4))
+            return result
+        elif t == 'BATCH':
+            return {'status': 'success',
+                    'results': self.process_batch(d['task_type'], d.get('params', {}), d['chunks'],
+                                                  d.get('keep'), d.get('keys'), d.get('job_id'),
+                                                  d.get('job_owner'))}
+        elif t == 'REDUCE':
+            return self.reduce_subtree(d)
+        elif t == 'RING_TRAIN':
+            return self.ring_member(d)
         elif t == 'MONITOR': 
-            return self.monitor_app.get_stats()
+            stats = self.monitor_app.get_stats()
+            stats['workers'] = self.executor.capacity
+            stats['datasets'] = self.datasets.stats()
+            stats['result_cache'] = self.results.stats()
+            stats['peers'] = self.health.snapshot()
+            stats['load'] = self.load()
+            stats['cost_model'] = self.costs.stats()
+            stats['admission'] = self.admission.stats()
+            return stats
         
         return {'status': 'error', 'msg': 'Unknown Task'}
 
-    def _handle_client(self, client):
-        try:
-            msg = self._recv_msg(client)
-            if not msg: return
-            
-            print(f" [API] Solicitud recibida: {msg. get('type')} en modo {msg.get('mode', 'single')}")
-            
-            if msg.get('mode') == 'parallel':
-                response = self.process_parallel(msg)
+    def handle_message(self, msg, job_id=None):
+        # Sondeo del HealthChecker de otro nodo (sin log: llega cada pocos segundos)
+        if msg.get('type') == 'PING':
+            return {'status': 'success', 'node': self.node_id, 'ts': time.time()}
+        # Segmento del all-reduce en anillo (varios por epoca: tampoco se registra)
+        if msg.get('type') == 'RING_SEND':
+            return self.ring.deliver(msg.get('data') or {})
+        if msg.get('type') == 'TASK_CANCEL':
+            return self.cancel_task((msg.get('data') or {}).get('job_id'))
+        # Progreso de una tarea de uno de nuestros jobs que corre en otro nodo
+        if msg.get('type') == 'JOB_EVENT':
+            return self.jobs.handle(msg)
+
+        print(f" [API] Solicitud recibida: {msg. get('type')} en modo {msg.get('mode', 'single')}")
+
+        # Gestion del almacen de datasets (siempre local)
+        if msg.get('type') == 'DATASET_PUT':
+            d = msg.get('data', {})
+            try:
+                h = self.datasets.put(d['file_content'], d.get('dataset_hash'))
+            except DatasetTooLarge as e:
+                # Quien lo subio debe enviar el contenido dentro de la tarea
+                return {'status': 'error', 'code': 'DATASET_TOO_LARGE', 'msg': f'Dataset demasiado grande: {e}'}
+            except (KeyError, ValueError) as e:
+                return {'status': 'error', 'msg': f'Dataset invalido: {e}'}
+            return {'status': 'success', 'dataset_hash': h}
+        if msg.get('type') == 'DATASET_HAS':
+            return {'status': 'success', 'missing': self.datasets.missing(msg.get('data', {}).get('hashes', []))}
+
+        # Jobs asincronos: se atienden en el nodo que los creo
+        if msg.get('type') == 'JOB_SUBMIT':
+            task = (msg.get('data') or {}).get('task') or {}
+            missing = self._resolve_datasets(task)
+            if missing: return self._dataset_missing(missing)
+            return {'status': 'success', 'job_id': self.jobs.submit(task)}
+        if str(msg.get('type', '')).startswith('JOB_'):
+            return self.jobs.handle(msg)
+
+        missing = self._resolve_datasets(msg)
+        if missing: return self._dataset_missing(missing)
+        
+        if msg.get('mode') == 'parallel':
+            return self.process_parallel(msg, job_id)
+
+        # Una tarea reenviada se ejecuta aqui (o se responde busy al nodo que la envio)
+        if msg.get('is_forwarded', False):
+            remote_job = msg.get('job_id')
+            with self._cancellable(remote_job, msg.get('job_owner')):
+                try:
+                    return self.process_local(msg, remote_job)
+                except TaskCancelled:
+                    return self._cancelled(remote_job)
+
+        # Coste estimado de la tarea: el scheduler lo usa para elegir nodo sin sobrecargarlo
+        cost = self.costs.estimate(msg.get('type'), msg.get('data'))
+        tried = set()
+        for _ in range(self.BUSY_RETRIES + 1):
+            target = self.scheduler.decide_node(cost, exclude=tried)
+            if target is None: break
+            if target == 'local':
+                result = self.process_local(msg, job_id)
             else:
-                is_fwd = msg.get('is_forwarded', False)
-                target = 'local' if is_fwd else self.scheduler.decide_node()
-                if target == 'local': 
-                    response = self. process_local(msg)
-                else: 
-                    response = self.forward_request(target, msg)
-            
-            self._send_msg(client, response)
-        except Exception as e: 
-            print(f" [API] [ERROR] Error procesando cliente: {e}")
-        finally: 
-            client.close()
+                # Un job en segundo plano no esta sujeto al timeout de una peticion interactiva
+                timeout = self.JOB_FORWARD_TIMEOUT if job_id else 15
+                self.scheduler.task_started(target, cost)
+                self._cancel_on(job_id, target, job_id)
+                try:
+                    forwarded = dict(msg, job_id=job_id)
+                    if job_id: forwarded['job_owner'] = self.discovery.my_ip
+                    result = self.forward_request(target, forwarded, timeout=timeout)
+                finally:
+                    self.scheduler.task_finished(target, cost)
+            if not is_busy(result): return result
+            # Saturado: se evita ese nodo un rato y se prueba con otro
+            print(f" [API] [OCUPADO] {target} saturado, probando otro nodo")
+            tried.add(target)
+            self.scheduler.mark_busy(target)
+        return result if tried else busy_response(self.node_id, 'sin nodos disponibles')
+
+    def load(self, stats=None):
+        """Carga de este nodo (la usa el scheduler y viaja en el resumen del heartbeat)"""
+        load = self.admission.load()
+        load['queue'] += self.jobs.queued()
+        load['cpu'] = (stats or self.monitor_app.get_stats())['cpu']
+        return load
+
+    def summary(self):
+        """Estado de este nodo que discovery empaqueta en cada heartbeat (network/node_summary.py)"""
+        stats = self.monitor_app.get_stats()
+        return dict(self.load(stats), cores=stats['cores'], ram_free_mb=stats['ram_free_mb'],
+                    datasets=self.datasets.hashes(), task_types=CPU_TASKS)
+
+    def _dataset_missing(self, missing):
+        return {'status': 'error', 'code': 'DATASET_MISSING', 'missing': missing,
+                'msg': 'Dataset no disponible en este nodo, subirlo con DATASET_PUT'}
 
     def start(self):
         self.running = True
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s. setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind(('0.0.0.0', self.port))
-        s.listen(20)
+        self.server = AsyncServer(self.handle_message, self.port, max_workers=self.handler_threads)
+        self.server.start()
+        self.health.start()
         print(f" [API] Listening on port {self.port}")
-        
-        def run():
-            while self.running:
-                try: 
-                    c, a = s.accept()
-                    threading.Thread(target=self._handle_client, args=(c,)). start()
-                except: 
-                    pass
-        
-        threading.Thread(target=run, daemon=True).start()
 
     def stop(self): 
         self.running = False
+        if self.server: self.server.stop()
+        self.health.stop()
+        self.pool.close_all()
+        self.jobs.shutdown()
+        self.executor.shutdown()
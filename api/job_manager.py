@@ -0,0 +1,245 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import InvalidStateError, ThreadPoolExecutor
+from api.async_server import Deferred
+from api.task_executor import TaskCancelled
+
+# Estados de un job
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    def __init__(self, job_id, msg):
+        self.id = job_id
+        self.msg = msg
+        self.state = QUEUED
+        self.events = []
+        self.result = None
+        self.future = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_hooks = {}      # clave -> funcion que detiene una parte del job (trozos, pares)
+
+    def info(self):
+        return {
+            'job_id': self.id,
+            'type': self.msg.get('type'),
+            'state': self.state,
+            'progress': self.events[-1] if self.events else None,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class JobManager:
+    """
+    Jobs asincronos: JOB_SUBMIT devuelve un id al momento y la tarea corre en segundo plano.
+    El cliente consulta el estado, sigue el progreso por epocas (long-poll), recoge el
+    resultado cuando quiera o cancela el job.
+    """
+
+    MAX_WAIT = 10.0   # segundos maximos de una consulta long-poll
+
+    def __init__(self, node_id, runner, executor, max_running=4, max_jobs=1000):
+        self.node_id = node_id
+        self.runner = runner          # runner(msg, job_id) -> resultado
+        self.executor = executor      # TaskExecutor (progreso y cancelacion)
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.ids = itertools.count(1)
+        self.cond = threading.Condition()
+        self.waiters = []             # [(condicion, respuesta, Deferred)] de los long-poll
+        self.pool = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix='job')
+        # remote_progress(task_id, evento): progreso de tareas de jobs de otros nodos
+        self.remote_progress = None
+        executor.progress_listener = self._on_progress
+
+    def submit(self, msg):
+        with self.cond:
+            job = Job(f"{self.node_id}-job-{next(self.ids)}", msg)
+            self.jobs[job.id] = job
+            self._evict()
+        job.future = self.pool.submit(self._run, job)
+        print(f" [JOBS] Job {job.id} ({msg.get('type')}) en cola")
+        return job.id
+
+    def _run(self, job):
+        with self.cond:
+            if job.state == CANCELLED:
+                job.finished = time.time()
+                return
+            job.state = RUNNING
+            job.started = time.time()
+        try:
+            result = self.runner(job.msg, job.id)
+            state = DONE if result and result.get('status') not in ('error', 'busy') else FAILED
+        except TaskCancelled:
+            result, state = None, CANCELLED
+        except Exception as e:
+            result, state = {'status': 'error', 'msg': str(e)}, FAILED
+        finally:
+            self.executor.forget(job.id)
+
+        with self.cond:
+            # Un job cancelado mientras se reenviaba a otro nodo descarta su resultado
+            if job.state != CANCELLED:
+                job.state = state
+                job.result = result
+            job.finished = time.time()
+            job.cancel_hooks.clear()
+            self._notify()
+        print(f" [JOBS] Job {job.id} terminado: {job.state}")
+
+    def _on_progress(self, task_id, event):
+        """Progreso del pool de procesos: de un job de este nodo o de una tarea de un job ajeno"""
+        if not self.record(task_id, event) and self.remote_progress:
+            self.remote_progress(task_id, event)
+
+    def record(self, task_id, event):
+        """
+        Añade un evento de progreso a su job; `task_id` es el id del job o el de una de sus
+        tareas ('<job>/chunks'). Devuelve False si el job no es de este nodo.
+        """
+        with self.cond:
+            job = self.jobs.get(str(task_id).split('/')[0])
+            if job is None: return False
+            event['ts'] = time.time()
+            job.events.append(event)
+            self._notify()
+            return True
+
+    def _evict(self):
+        """Olvida los jobs terminados mas antiguos por encima de max_jobs"""
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in [j.id for j in self.jobs.values() if j.state in FINISHED][:max(excess, 0)]:
+            del self.jobs[job_id]
+
+    def _notify(self):
+        """Con self.cond tomado: despierta a los hilos y responde los long-poll ya listos"""
+        self.cond.notify_all()
+        pending = []
+        for ready, respond, deferred in self.waiters:
+            if deferred.future.done(): continue         # vencido o cliente desconectado
+            if not ready():
+                pending.append((ready, respond, deferred))
+                continue
+            try: deferred.future.set_result(respond())
+            except InvalidStateError: pass
+        self.waiters = pending
+
+    def _reply(self, ready, respond, wait):
+        """
+        Con self.cond tomado: la respuesta si ya esta lista o no se quiere esperar; si no,
+        un Deferred que se completa en _notify o, al vencer `wait`, con el estado de ese momento.
+        """
+        wait = min(max(wait or 0, 0), self.MAX_WAIT)
+        if wait <= 0 or ready(): return respond()
+
+        def expire():
+            with self.cond:
+                return respond()
+
+        deferred = Deferred(wait, expire)
+        self.waiters.append((ready, respond, deferred))
+        return deferred
+
+    def status(self, job_id):
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None: return {'status': 'error', 'msg': f'Job desconocido: {job_id}'}
+            return dict(job.info(), status='success')
+
+    def progress(self, job_id, since=0, wait=0):
+        """
+        Eventos de progreso a partir del indice `since`; si no hay nuevos espera hasta `wait` s
+        (devuelve un Deferred: la espera no ocupa un hilo del servidor).
+        """
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None: return {'status': 'error', 'msg': f'Job desconocido: {job_id}'}
+            return self._reply(
+                lambda: len(job.events) > since or job.state in FINISHED,
+                lambda: {'status': 'success', 'job_id': job_id, 'state': job.state,
+                         'events': job.events[since:], 'next': len(job.events)},
+                wait)
+
+    def result(self, job_id, wait=0):
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None: return {'status': 'error', 'msg': f'Job desconocido: {job_id}'}
+
+            def respond():
+                if job.state not in FINISHED:
+                    return {'status': 'pending', 'job_id': job_id, 'state': job.state}
+                return {'status': 'success', 'job_id': job_id, 'state': job.state, 'result': job.result}
+            return self._reply(lambda: job.state in FINISHED, respond, wait)
+
+    def cancel(self, job_id):
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None: return {'status': 'error', 'msg': f'Job desconocido: {job_id}'}
+            if job.state in FINISHED:
+                return {'status': 'success', 'job_id': job_id, 'state': job.state}
+            if job.future and job.future.cancel():
+                job.finished = time.time()
+            job.state = CANCELLED
+            hooks = list(job.cancel_hooks.values())
+            job.cancel_hooks.clear()
+            self._notify()
+        # Si ya esta entrenando, se detiene en el siguiente punto de progreso
+        self.executor.cancel(job_id)
+        # Trozos en curso en otros nodos, reparto pendiente, anillos de all-reduce...
+        for hook in hooks:
+            try: hook()
+            except Exception as e: print(f" [JOBS] [ERROR] Cancelando {job_id}: {e}")
+        print(f" [JOBS] Job {job_id} cancelado")
+        return {'status': 'success', 'job_id': job_id, 'state': CANCELLED}
+
+    def on_cancel(self, job_id, key, hook):
+        """
+        Registra `hook()` para detener parte del trabajo de un job si se cancela (uno por `key`:
+        el ultimo sustituye al anterior). Si el job ya esta cancelado se llama al momento.
+        """
+        with self.cond:
+            job = self.jobs.get(job_id)
+            if job is None: return
+            if job.state != CANCELLED:
+                if job.state not in FINISHED: job.cancel_hooks[key] = hook
+                return
+        hook()
+
+    def is_cancelled(self, job_id):
+        with self.cond:
+            job = self.jobs.get(job_id)
+            return job is not None and job.state == CANCELLED
+
+    def queued(self):
+        with self.cond:
+            return sum(1 for j in self.jobs.values() if j.state == QUEUED)
+
+    def handle(self, msg):
+        """Atiende los mensajes JOB_*"""
+        t = msg.get('type')
+        d = msg.get('data') or {}
+        if t == 'JOB_STATUS': return self.status(d.get('job_id'))
+        if t == 'JOB_PROGRESS': return self.progress(d.get('job_id'), d.get('since', 0), d.get('wait', 0))
+        if t == 'JOB_RESULT': return self.result(d.get('job_id'), d.get('wait', 0))
+        if t == 'JOB_CANCEL': return self.cancel(d.get('job_id'))
+        if t == 'JOB_EVENT':
+            return {'status': 'success', 'recorded': self.record(d.get('job_id'), dict(d.get('event') or {}))}
+        if t == 'JOB_LIST':
+            with self.cond:
+                return {'status': 'success', 'jobs': [j.info() for j in self.jobs.values()]}
+        return {'status': 'error', 'msg': f'Mensaje de jobs desconocido: {t}'}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,105 @@
+import json
+import struct
+from api import binary_codec
+from kernel.config import MAX_FRAME_BYTES
+
+# Trama clasica: [longitud >I][cuerpo]
+HEADER = struct.Struct('>I')
+# Trama multiplexada: [longitud >I][request_id >I][cuerpo]
+MUX_HEADER = struct.Struct('>II')
+
+MUX_VERSION = 1
+
+# Codificacion del cuerpo. JSON es lo que entienden los clientes antiguos;
+# 'bin1' empaqueta los arrays numericos (ver api/binary_codec.py).
+CODEC_JSON = 'json'
+CODEC_BINARY = 'bin1'
+SUPPORTED_CODECS = [CODEC_BINARY, CODEC_JSON]
+
+
+def encode_body(msg, codec=CODEC_JSON):
+    if codec == CODEC_BINARY:
+        return binary_codec.encode(msg)
+    return json.dumps(msg, default=binary_codec.to_builtin).encode()
+
+
+def body_codec(data):
+    return CODEC_BINARY if binary_codec.is_binary(data) else CODEC_JSON
+
+
+def decode_body(data):
+    if binary_codec.is_binary(data):
+        return binary_codec.decode(data)
+    return json.loads(data)
+
+
+class FrameTooLarge(Exception):
+    pass
+
+
+def check_frame_size(msg_len, max_size=None):
+    """Rechaza cabeceras que anuncian mas de max_size bytes antes de reservar memoria"""
+    limit = MAX_FRAME_BYTES if max_size is None else max_size
+    if msg_len > limit:
+        raise FrameTooLarge(f"Trama de {msg_len} bytes supera el maximo de {limit}")
+
+
+def negotiate_codec(offered):
+    """Primer codec de la lista del cliente que este nodo soporta"""
+    for codec in offered or []:
+        if codec in SUPPORTED_CODECS: return codec
+    return CODEC_JSON
+
+
+def recv_exact(sock, n):
+    """
+    Lee exactamente n bytes del socket (None si el par cierra).
+    El buffer se reserva una sola vez y se rellena con recv_into, sin concatenar.
+    """
+    data = bytearray(n)
+    view = memoryview(data)
+    pos = 0
+    while pos < n:
+        got = sock.recv_into(view[pos:], n - pos)
+        if not got: return None
+        pos += got
+    return data
+
+
+def pack_msg(msg, codec=CODEC_JSON):
+    body = encode_body(msg, codec)
+    return HEADER.pack(len(body)) + body
+
+
+def pack_mux(req_id, msg, codec=CODEC_JSON):
+    body = encode_body(msg, codec)
+    return MUX_HEADER.pack(len(body), req_id) + body
+
+
+def send_msg(sock, msg, codec=CODEC_JSON):
+    sock.sendall(pack_msg(msg, codec))
+
+
+def recv_msg(sock, max_size=None):
+    raw_len = recv_exact(sock, HEADER.size)
+    if not raw_len: return None
+    msg_len = HEADER.unpack(raw_len)[0]
+    check_frame_size(msg_len, max_size)
+    data = recv_exact(sock, msg_len)
+    if data is None: return None
+    return decode_body(data)
+
+
+def send_mux(sock, req_id, msg, codec=CODEC_JSON):
+    sock.sendall(pack_mux(req_id, msg, codec))
+
+
+def recv_mux(sock, max_size=None):
+    """Devuelve (request_id, mensaje) o (None, None) si la conexion se cerro"""
+    raw = recv_exact(sock, MUX_HEADER.size)
+    if not raw: return None, None
+    msg_len, req_id = MUX_HEADER.unpack(raw)
+    check_frame_size(msg_len, max_size)
+    data = recv_exact(sock, msg_len)
+    if data is None: return None, None
+    return req_id, decode_body(data)
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from api.binary_codec import to_builtin
+from api.dataset_store import content_hash
+
+# Tareas cuyo resultado depende solo de (parametros, datos)
+DETERMINISTIC_TASKS = ('ML_TRAIN', 'LOGISTIC', 'TREE_TRAIN', 'IMAGE_PROC')
+# Tareas aleatorias: solo se cachean si la peticion fija una semilla
+SEEDED_TASKS = ('MLP_TRAIN',)
+
+
+class ResultCache:
+    """
+    Cache LRU de resultados de process_local, con clave (tipo, parametros, hash del dataset).
+    Si se indica `persist_dir`, cada entrada se guarda tambien en disco y se recarga al arrancar.
+    """
+
+    def __init__(self, max_entries=256, persist_dir=None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+            self._load()
+
+    def key(self, task_type, data):
+        """Clave de la peticion, o None si no es cacheable"""
+        if self.max_entries <= 0: return None
+        if task_type not in DETERMINISTIC_TASKS:
+            if task_type not in SEEDED_TASKS or data.get('seed') is None: return None
+
+        dataset = data.get('dataset_hash')
+        if not dataset:
+            content = data.get('file_content')
+            if not isinstance(content, str): return None
+            dataset = content_hash(content)
+
+        params = {k: v for k, v in data.items() if k not in ('file_content', 'dataset_hash')}
+        raw = json.dumps([task_type, params, dataset], sort_keys=True, default=to_builtin)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            result = self.items.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+        hit = dict(result)
+        hit['cached'] = True
+        return hit
+
+    def put(self, key, result):
+        if result.get('status') != 'success': return
+        with self.lock:
+            self.items[key] = result
+            self.items.move_to_end(key)
+            evicted = []
+            while len(self.items) > self.max_entries:
+                evicted.append(self.items.popitem(last=False)[0])
+
+        if self.persist_dir:
+            self._write(key, result)
+            for old in evicted: self._remove(old)
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {'entries': len(self.items), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / total if total else 0.0}
+
+    # --- Persistencia en disco (un fichero JSON por entrada) ---
+
+    def _path(self, key):
+        return os.path.join(self.persist_dir, f'{key}.json')
+
+    def _write(self, key, result):
+        tmp = self._path(key) + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(result, f, default=to_builtin)
+            os.replace(tmp, self._path(key))
+        except (OSError, TypeError) as e:
+            print(f" [CACHE] [ERROR] No se pudo guardar {key[:12]}: {e}")
+
+    def _remove(self, key):
+        try: os.remove(self._path(key))
+        except OSError: pass
+
+    def _load(self):
+        files = [f for f in os.listdir(self.persist_dir) if f.endswith('.json')]
+        files.sort(key=lambda f: os.path.getmtime(os.path.join(self.persist_dir, f)))
+        for name in files[-self.max_entries:]:
+            try:
+                with open(os.path.join(self.persist_dir, name)) as f:
+                    self.items[name[:-5]] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        print(f" [CACHE] {len(self.items)} resultados cargados de {self.persist_dir}")
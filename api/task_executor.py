@@ -0,0 +1,195 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from api.allreduce import RingAborted, train_member
+
+# Tareas de calculo puro Python (limitadas por el GIL si corren en hilos)
+CPU_TASKS = ('ML_TRAIN', 'LOGISTIC', 'MLP_TRAIN', 'TREE_TRAIN', 'IMAGE_PROC')
+
+# Apps instanciadas en cada proceso trabajador (ver _warm_up)
+_apps = None
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+def _warm_up(node_id):
+    """Inicializador de cada proceso: importa las libs y crea las apps una sola vez"""
+    global _apps
+    from apps.ml_app import MLApp
+    from apps.logistic_app import LogisticApp
+    from apps.mlp_app import MLPApp
+    from apps.decision_tree_app import DecisionTreeApp
+    from apps.image_app import ImageApp
+
+    _apps = {
+        'ML_TRAIN': MLApp(node_id).run_task,
+        'LOGISTIC': LogisticApp(node_id).run_task,
+        'MLP_TRAIN': MLPApp(node_id).run_task,
+        'TREE_TRAIN': DecisionTreeApp(node_id).run_task,
+        'IMAGE_PROC': ImageApp(node_id).process,
+    }
+
+
+def _ping():
+    return True
+
+
+def _run_task(task_type, data, job_id=None, progress=None, cancelled=None):
+    progress_cb = None
+    if job_id is not None:
+        def progress_cb(epoch, epochs, loss=None):
+            # Punto de cancelacion cooperativa: las libs informan cada N epocas
+            if cancelled is not None and cancelled.get(job_id):
+                raise TaskCancelled(job_id)
+            if progress is not None:
+                progress.put((job_id, {'epoch': epoch, 'epochs': epochs, 'loss': loss}))
+    t0 = time.time()
+    result = _apps[task_type](data, progress_cb)
+    # Tiempo de calculo puro (sin esperas de cola): calibra el modelo de coste
+    if isinstance(result, dict): result['compute_seconds'] = round(time.time() - t0, 4)
+    return result
+
+
+def _run_ring(task_type, d, requests, replies):
+    """
+    Miembro de un anillo de all-reduce en un proceso trabajador. Cada suma del anillo la
+    resuelve el proceso del nodo (que tiene la red): se le envia el vector por `requests` y
+    devuelve la suma por `replies`, o el motivo del aborto como texto.
+    """
+    def allreduce(vector):
+        requests.put(vector)
+        total = replies.get()
+        if isinstance(total, str): raise RingAborted(total)
+        return total
+    return train_member(task_type, d, allreduce)
+
+
+class TaskExecutor:
+    """
+    Capa de ejecucion de process_local.
+    Las tareas de CPU se ejecutan en un ProcessPoolExecutor (un proceso por nucleo por defecto),
+    con las libs ya importadas. La cola y los limites por tipo los pone AdmissionController.
+    Con workers=0 se ejecutan en el hilo que llama (modo antiguo).
+    """
+
+    def __init__(self, node_id, workers=1):
+        self.node_id = node_id
+        self.workers = workers
+        self.pool = None
+        self.lock = threading.Lock()
+
+        # Canales de progreso/cancelacion de jobs (se crean con el primer job)
+        self.manager = None
+        self.progress = None
+        self.cancelled = None
+        self.progress_listener = None
+
+        if workers > 0:
+            self._start_pool()
+        else:
+            _warm_up(node_id)
+
+    def _start_pool(self):
+        # 'spawn' evita heredar los hilos del nodo (event loop, pool de conexiones) al hacer fork
+        self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_warm_up, initargs=(self.node_id,))
+        # Warm-up: forzar el arranque de todos los procesos antes de la primera tarea
+        for f in [self.pool.submit(_ping) for _ in range(self.workers)]: f.result()
+        print(f" [EXEC] Pool de {self.workers} procesos listo")
+
+    @property
+    def capacity(self):
+        """Numero de tareas de CPU que el nodo puede ejecutar a la vez"""
+        return max(1, self.workers)
+
+    def _manager(self):
+        # Llamar con self.lock tomado
+        if self.manager is None:
+            self.manager = multiprocessing.get_context('spawn').Manager()
+        return self.manager
+
+    def _job_channels(self):
+        """Cola de progreso y marcas de cancelacion compartidas con los procesos trabajadores"""
+        with self.lock:
+            if self.progress is None:
+                if self.pool is None:
+                    self.progress, self.cancelled = queue.Queue(), {}
+                else:
+                    manager = self._manager()
+                    self.progress, self.cancelled = manager.Queue(), manager.dict()
+                threading.Thread(target=self._pump_progress, daemon=True).start()
+        return self.progress, self.cancelled
+
+    def _pump_progress(self):
+        while True:
+            try:
+                job_id, event = self.progress.get()
+            except (EOFError, OSError):
+                return
+            if self.progress_listener: self.progress_listener(job_id, event)
+
+    def cancel(self, job_id):
+        if self.cancelled is not None: self.cancelled[job_id] = True
+
+    def forget(self, job_id):
+        if self.cancelled is not None: self.cancelled.pop(job_id, None)
+
+    def run(self, task_type, data, job_id=None):
+        args = (task_type, data)
+        if job_id is not None:
+            args += (job_id,) + self._job_channels()
+
+        if self.pool is None:
+            return _run_task(*args)
+        pool = self.pool
+        try:
+            return pool.submit(_run_task, *args).result()
+        except BrokenProcessPool:
+            # Un proceso murio (OOM, señal...): recrear el pool y reintentar una vez
+            self._restart(pool)
+            return self.pool.submit(_run_task, *args).result()
+
+    def run_ring(self, task_type, d, allreduce):
+        """
+        train_member (api/allreduce.py) en un proceso del pool. El calculo no compite por el
+        GIL con el event loop; las sumas del anillo (red) las hace este hilo con `allreduce`.
+        """
+        if self.pool is None:
+            return train_member(task_type, d, allreduce)
+        with self.lock:
+            manager = self._manager()
+        requests, replies = manager.Queue(), manager.Queue()
+        pool = self.pool
+        future = pool.submit(_run_ring, task_type, d, requests, replies)
+        try:
+            while True:
+                try:
+                    vector = requests.get(timeout=0.05)
+                except queue.Empty:
+                    if future.done(): return future.result()
+                    continue
+                try:
+                    replies.put(allreduce(vector))
+                except RingAborted as e:
+                    # El proceso lo relanza y termina; future.result() lo propaga
+                    replies.put(str(e) or 'anillo abortado')
+        except BrokenProcessPool:
+            # Sin reintento: el resto del anillo ya avanzo sin este miembro
+            self._restart(pool)
+            raise RingAborted(f'proceso de {self.node_id} caido')
+
+    def _restart(self, pool):
+        with self.lock:
+            if self.pool is pool:
+                print(" [EXEC] [ERROR] Pool de procesos roto, reiniciando...")
+                self._start_pool()
+
+    def shutdown(self):
+        if self.pool: self.pool.shutdown(wait=False, cancel_futures=True)
+        if self.manager: self.manager.shutdown()
@@ -4,7 +4,7 @@ class DecisionTreeApp:
     def __init__(self, node_id):
         self.node_id = node_id
 
-    def run_task(self, task_data):
+    def run_task(self, task_data, progress_cb=None):
         """
         Entrena un árbol de decisión. 
         Recibe: { 'file_content': '... ', 'max_depth': 5 }
@@ -5,7 +5,7 @@ class ImageApp:
         self.node_id = node_id
         self.processor = ImageProcessor()
 
-    def process(self, task_data):
+    def process(self, task_data, progress_cb=None):
         content = task_data.get('file_content')
         op = task_data.get('operation', 'invert')
         
@@ -4,12 +4,15 @@ class LogisticApp:
     def __init__(self, node_id):
         self.node_id = node_id
 
-    def run_task(self, task_data):
+    def run_task(self, task_data, progress_cb=None):
         content = task_data.get('file_content')
         if not content: return {'status': 'error', 'msg': 'No content'}
         
         print(f" [LOGISTIC APP] [INICIANDO] Ejecutando Regresion Logistica...")
         model = LogisticRegression()
-        result = model.fit_from_content(content)
+        result = model.fit_from_content(content, progress_cb,
+                                        epochs=task_data.get('epochs'),
+                                        init_model=task_data.get('init_model'),
+                                        scaling=task_data.get('scaling'))
         result['executed_by'] = self.node_id
         return result
@@ -5,7 +5,7 @@ class MLApp:
     def __init__(self, node_id):
         self.node_id = node_id
 
-    def run_task(self, task_data):
+    def run_task(self, task_data, progress_cb=None):
         """
         Manejador principal.
         Recibe: { 'algorithm': 'linear', 'file_content': '...' }
@@ -21,7 +21,10 @@ class MLApp:
         if algo == 'linear':
             model = LinearRegression()
             # Llamamos al método inteligente que creamos antes
-            result = model.fit_from_content(content)
+            result = model.fit_from_content(content, progress_cb,
+                                            epochs=task_data.get('epochs'),
+                                            init_model=task_data.get('init_model'),
+                                            scaling=task_data.get('scaling'))
             
             # Añadimos quién lo ejecutó
             result['executed_by'] = self.node_id
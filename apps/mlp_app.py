@@ -4,10 +4,10 @@ class MLPApp:
     def __init__(self, node_id):
         self.node_id = node_id
 
-    def run_task(self, task_data):
+    def run_task(self, task_data, progress_cb=None):
         """
         Entrena una red neuronal MLP. 
-        Recibe: { 'file_content': '...' }
+        Recibe: { 'file_content': '...', 'seed': 42 (opcional) }
         """
         content = task_data.get('file_content')
         
@@ -18,8 +18,11 @@ class MLPApp:
 
         # El MLP se instanciará dentro del método fit_from_content
         # que detectará automáticamente el tamaño de entrada y salida
-        model = MLP(input_size=4, hidden_size=5, output_size=3)  # Valores por defecto
-        result = model.fit_from_content(content)
+        model = MLP(input_size=4, hidden_size=5, output_size=3, seed=task_data.get('seed'))  # Valores por defecto
+        result = model.fit_from_content(content, progress_cb,
+                                        epochs=task_data.get('epochs'),
+                                        init_model=task_data.get('init_model'),
+                                        scaling=task_data.get('scaling'))
         
         # Añadir quién lo ejecutó
         result['executed_by'] = self.node_id
@@ -1,14 +1,51 @@
 import psutil
+import threading
 import time
 
+
+class CpuSampler:
+    """
+    Uso de CPU medido por un solo hilo en ventanas de `interval` s.
+    psutil.cpu_percent() sin intervalo mide desde la llamada anterior de todo el proceso:
+    con varios lectores (heartbeat, MONITOR, reparto de trozos) cada uno acortaba la ventana
+    de los demas. Aqui todos leen el ultimo valor medido.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.value = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def _loop(self):
+        while True:
+            self.value = psutil.cpu_percent(interval=self.interval)
+
+    def read(self):
+        with self.lock:
+            if self.thread is None:
+                # Primera lectura: una ventana corta para no devolver un valor vacio
+                self.value = psutil.cpu_percent(interval=0.1)
+                self.thread = threading.Thread(target=self._loop, daemon=True, name='cpu-sampler')
+                self.thread.start()
+        return self.value
+
+
+# Uno por proceso: la medida de psutil es global
+cpu_sampler = CpuSampler()
+
+
 class MonitorApp:
     def __init__(self, node_id):
         self.node_id = node_id
 
     def get_stats(self):
+        ram = psutil.virtual_memory()
         return {
             'node': self.node_id,
-            'cpu': psutil.cpu_percent(),
-            'ram': psutil.virtual_memory().percent,
+            'cpu': cpu_sampler.read(),
+            'ram': ram.percent,
+            'ram_free_mb': ram.available // (1024 * 1024),
+            'cores': psutil.cpu_count(),
             'ts': time.time()
         }
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la agregacion federada: bucles anidados de la version anterior frente al
+motor vectorizado de api/aggregation.py (NumPy si esta instalado, listas + operator si no).
+
+    python3 bench_aggregation.py [nodos] [ocultas]
+"""
+import random
+import sys
+import time
+
+from api import aggregation
+
+
+def bucles_mlp(results):
+    """Promedio del MLP como lo hacia _aggregate_results (suma con bucles y division por count)"""
+    count = len(results)
+    base = results[0]
+    W1_sum = [[cell for cell in row] for row in base['input_to_hidden_w']]
+    b1_sum = base['hidden_bias'][:]
+    W2_sum = [[cell for cell in row] for row in base['hidden_to_output_w']]
+    b2_sum = base['output_bias'][:]
+    for res in results[1:]:
+        for r in range(len(W1_sum)):
+            for c in range(len(W1_sum[0])):
+                W1_sum[r][c] += res['input_to_hidden_w'][r][c]
+        for j in range(len(b1_sum)):
+            b1_sum[j] += res['hidden_bias'][j]
+        for r in range(len(W2_sum)):
+            for c in range(len(W2_sum[0])):
+                W2_sum[r][c] += res['hidden_to_output_w'][r][c]
+        for j in range(len(b2_sum)):
+            b2_sum[j] += res['output_bias'][j]
+    return {
+        'input_to_hidden_weights': [[x / count for x in row] for row in W1_sum],
+        'hidden_bias': [x / count for x in b1_sum],
+        'hidden_to_output_weights': [[x / count for x in row] for row in W2_sum],
+        'output_bias': [x / count for x in b2_sum],
+    }
+
+
+def modelo_mlp(rng, inputs, hidden, outputs, n_samples):
+    return {
+        'status': 'success', 'executed_by': 'bench', 'n_samples': n_samples,
+        'input_to_hidden_w': [[rng.random() for _ in range(hidden)] for _ in range(inputs)],
+        'hidden_bias': [rng.random() for _ in range(hidden)],
+        'hidden_to_output_w': [[rng.random() for _ in range(outputs)] for _ in range(hidden)],
+        'output_bias': [rng.random() for _ in range(outputs)],
+        'final_loss': rng.random(),
+    }
+
+
+def max_diff(a, b):
+    if isinstance(a, list): return max((max_diff(x, y) for x, y in zip(a, b)), default=0.0)
+    return abs(a - b)
+
+
+def medir(fn, repeticiones=5):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        out = fn()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, out
+
+
+def main():
+    nodos = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    ocultas = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    rng = random.Random(0)
+    # Mismo n_samples en todos: el promedio ponderado coincide con el simple
+    results = [modelo_mlp(rng, 64, ocultas, 10, 100) for _ in range(nodos)]
+    params = 64 * ocultas + ocultas + ocultas * 10 + 10
+
+    motor = 'NumPy' if aggregation.np is not None else 'listas + operator'
+    print(f"--- Agregacion MLP: {nodos} modelos x {params} parametros (motor {motor}) ---")
+
+    t_loops, ref = medir(lambda: bucles_mlp(results))
+    t_vec, out = medir(lambda: aggregation.finalize(aggregation.partial('MLP_TRAIN', results)))
+    t_stream, _ = medir(lambda: _stream(results))
+
+    print(f"   Bucles anidados (anterior):  {t_loops * 1000:9.2f} ms")
+    print(f"   Vectorizado (partial):       {t_vec * 1000:9.2f} ms  ({t_loops / t_vec:.1f}x)")
+    print(f"   Vectorizado (streaming):     {t_stream * 1000:9.2f} ms  ({t_loops / t_stream:.1f}x)")
+    diff = max(max_diff(ref[k], out['global_model'][k]) for k in ref)
+    print(f"   Diferencia maxima con el anterior: {diff:.2e}")
+
+    if aggregation.np is not None:
+        # Con el codec binario los pesos llegan de los pares como ndarray (sin conversion)
+        arrays = [dict(r, **{k: aggregation.np.asarray(r[k]) for k in aggregation.FIELDS['MLP_TRAIN']
+                             if k != 'final_loss'}) for r in results]
+        t_arr, _ = medir(lambda: aggregation.finalize(aggregation.partial('MLP_TRAIN', arrays)))
+        print(f"   Vectorizado (ndarray):       {t_arr * 1000:9.2f} ms  ({t_loops / t_arr:.1f}x)")
+
+
+def _stream(results):
+    stream = aggregation.StreamingAggregator('MLP_TRAIN')
+    for r in results: stream.add(r)
+    return aggregation.finalize(stream.total)
+
+
+if __name__ == '__main__':
+    main()
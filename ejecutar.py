@@ -2,40 +2,50 @@ import sys
 import json
 import socket
 import os
-import struct
+from api.protocol import send_msg, recv_msg, SUPPORTED_CODECS
+from api.binary_codec import to_builtin
+from api.dataset_store import content_hash
 
 API_IP = '127.0.0.1'
 API_PORT = 5001
 
 def enviar_al_kernel(payload):
+    # Primero en binario (el fichero viaja sin escapar); un nodo antiguo no lo
+    # entiende y cierra sin responder, en ese caso se reintenta en JSON
     try:
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.settimeout(30)  # Timeout más largo para procesos distribuidos
-        client.connect((API_IP, API_PORT))
-        
-        # Protocolo con longitud (Seguro)
-        msg_bytes = json.dumps(payload).encode()
-        client.sendall(struct.pack('>I', len(msg_bytes)) + msg_bytes)
-        
-        # Recibir
-        raw_len = client.recv(4)
-        if not raw_len: return None
-        msg_len = struct.unpack('>I', raw_len)[0]
-        
-        data = b''
-        while len(data) < msg_len:
-            packet = client.recv(min(4096, msg_len - len(data)))
-            if not packet: break
-            data += packet
+        for codec in SUPPORTED_CODECS:
+            client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            client.settimeout(30)  # Timeout más largo para procesos distribuidos
+            client.connect((API_IP, API_PORT))
             
-        client.close()
-        return json.loads(data.decode())
+            # Protocolo con longitud (Seguro)
+            send_msg(client, payload, codec)
+            response = recv_msg(client)
+            client.close()
+            if response is not None: return response
+        return {'status': 'error', 'msg': 'Conexion cerrada sin respuesta'}
     except Exception as e:
         return {'status': 'error', 'msg': str(e)}
 
+def seguir_job(job_id):
+    """Muestra el progreso del job por epocas y devuelve su resultado"""
+    since = 0
+    while True:
+        prog = enviar_al_kernel({'type': 'JOB_PROGRESS', 'data': {'job_id': job_id, 'since': since, 'wait': 10}})
+        if prog.get('status') != 'success': return prog
+        for ev in prog['events']:
+            print(f"   Época {ev['epoch']}/{ev['epochs']} - Loss: {ev['loss']:.4f}")
+        since = prog['next']
+        if prog['state'] in ('done', 'failed', 'cancelled'): break
+    return enviar_al_kernel({'type': 'JOB_RESULT', 'data': {'job_id': job_id}})
+
 if __name__ == "__main__":
+    # --async: la tarea se envia como job y se sigue su progreso (sin limite de 30 s)
+    asincrono = '--async' in sys.argv
+    if asincrono: sys.argv.remove('--async')
+
     if len(sys.argv) < 3:
-        print("[ERROR] Uso: python3 ejecutar.py <archivo> <app> [modo]")
+        print("[ERROR] Uso: python3 ejecutar.py <archivo> <app> [modo] [--async]")
         print("\nApps disponibles:")
         print("   • linear    - Regresión Lineal")
         print("   • logistic  - Regresión Logística")
@@ -45,12 +55,14 @@ if __name__ == "__main__":
         print("\nModos:")
         print("   • single   - Ejecuta en un solo nodo (defecto)")
         print("   • parallel - Distribuye entre todos los nodos")
+        print("   • --async  - Envia la tarea como job y muestra el progreso")
         print("\nEjemplos:")
         print("   python3 ejecutar.py mis_datos/regresion.txt linear parallel")
         print("   python3 ejecutar.py mis_datos/clasificacion.txt logistic parallel")
         print("   python3 ejecutar.py mis_datos/red_neuronal.txt mlp parallel")
         print("   python3 ejecutar.py mis_datos/arbol.txt tree parallel")
         print("   python3 ejecutar.py mis_datos/imagen. txt image parallel")
+        print("   python3 ejecutar.py mis_datos/red_neuronal.txt mlp single --async")
         sys.exit(1)
 
     archivo_path = sys.argv[1]
@@ -64,9 +76,11 @@ if __name__ == "__main__":
     with open(archivo_path, 'r') as f:
         contenido = f.read()
 
+    # El fichero se referencia por su hash; solo se sube si el nodo no lo tiene ya
+    dataset_hash = content_hash(contenido)
     payload = {
         'mode': modo,
-        'data': {'file_content': contenido}
+        'data': {'dataset_hash': dataset_hash}
     }
 
     if app_type == 'linear':
@@ -100,10 +114,28 @@ if __name__ == "__main__":
     print(f"[INICIANDO] Enviando tarea en modo: {modo. upper()}")
     print(f"Archivo: {archivo_path}\n")
     
-    res = enviar_al_kernel(payload)
+    peticion = payload
+    if asincrono:
+        peticion = {'type': 'JOB_SUBMIT', 'is_forwarded': True, 'data': {'task': payload}}
+
+    res = enviar_al_kernel(peticion)
+    if res and res.get('code') == 'DATASET_MISSING':
+        print(f"Subiendo dataset {dataset_hash[:12]}... al nodo")
+        subida = enviar_al_kernel({'type': 'DATASET_PUT', 'is_forwarded': True,
+                                   'data': {'file_content': contenido, 'dataset_hash': dataset_hash}})
+        if not subida or subida.get('status') != 'success':
+            # El nodo no puede guardarlo (p. ej. mayor que su cache): se envia dentro de la tarea
+            print(f"No se pudo subir ({(subida or {}).get('msg', 'sin respuesta')}), enviando el contenido en la tarea")
+            payload['data'].pop('dataset_hash', None)
+            payload['data']['file_content'] = contenido
+        res = enviar_al_kernel(peticion)
+
+    if asincrono and res.get('status') == 'success':
+        print(f"Job creado: {res['job_id']}")
+        res = seguir_job(res['job_id'])
     
     print("\n" + "="*60)
     print("RESULTADO FINAL")
     print("="*60)
-    print(json.dumps(res, indent=2, ensure_ascii=False))
+    print(json.dumps(res, indent=2, ensure_ascii=False, default=to_builtin))
     print("="*60)
@@ -5,6 +5,7 @@ import time
 from network.discovery import NodeDiscovery
 from scheduler.distributed_scheduler import DistributedScheduler
 from api.distributed_api import DistributedAPI
+from kernel import config
 
 sys.path.append(os.getcwd())
 
@@ -14,14 +15,36 @@ def main():
     print(f" [KERNEL] Iniciando nodo {node_id}...")
 
     # Iniciar componentes
-    discovery = NodeDiscovery(node_id)
+    discovery = NodeDiscovery(node_id, port=config.DISCOVERY_PORT, seeds=config.SEEDS,
+                              interval=config.GOSSIP_INTERVAL,
+                              heartbeat_interval=config.HEARTBEAT_INTERVAL,
+                              phi_suspect=config.PHI_SUSPECT, acceptable_pause=config.PHI_PAUSE)
     discovery.start()
 
-    scheduler = DistributedScheduler(node_id, discovery)
+    scheduler = DistributedScheduler(node_id, discovery, policy=config.SCHEDULER_POLICY,
+                                     max_wait=config.SCHEDULER_MAX_WAIT)
     
-    api = DistributedAPI(node_id, discovery, scheduler)
+    api = DistributedAPI(node_id, discovery, scheduler, port=config.API_PORT,
+                         handler_threads=config.HANDLER_THREADS,
+                         task_workers=config.TASK_WORKERS,
+                         task_limits=config.TASK_LIMITS,
+                         dataset_cache_bytes=config.DATASET_CACHE_BYTES,
+                         result_cache_entries=config.RESULT_CACHE_ENTRIES,
+                         result_cache_dir=config.RESULT_CACHE_DIR,
+                         chunk_options=config.CHUNK_OPTIONS,
+                         health_interval=config.HEALTH_INTERVAL,
+                         task_queue=config.TASK_QUEUE,
+                         admission_max_wait=config.ADMISSION_MAX_WAIT,
+                         reduce_fanout=config.REDUCE_FANOUT)
     api.start()
 
+    # El estado del nodo (carga, datasets, tipos de tarea) viaja en los heartbeats
+    discovery.summary_provider = api.summary
+    scheduler.local_load = api.load
+    scheduler.health = api.health
+    # Un par sospechoso o muerto deja de recibir tareas en cuanto lo detecta discovery
+    discovery.add_listener(api.on_member_change)
+
     print(f" [KERNEL] [OK] Sistema Operativo en linea ({node_id}).")
     
     try:
@@ -0,0 +1,86 @@
+import os
+
+# Configuracion del nodo. Todos los valores se pueden sobrescribir con
+# variables de entorno (por ejemplo en el .env o en docker-compose.yml).
+
+
+def _int(name, default):
+    try: return int(os.environ.get(name, default))
+    except ValueError: return default
+
+
+def _limits(name):
+    """Parsea 'ML_TRAIN=4,MLP_TRAIN=2' -> {'ML_TRAIN': 4, 'MLP_TRAIN': 2}"""
+    limits = {}
+    for item in os.environ.get(name, '').split(','):
+        if '=' not in item: continue
+        key, value = item.split('=', 1)
+        try: limits[key.strip()] = int(value)
+        except ValueError: pass
+    return limits
+
+
+API_PORT = _int('SO_API_PORT', 5001)
+DISCOVERY_PORT = _int('SO_DISCOVERY_PORT', 5000)
+
+# Nodos semilla para entrar en el cluster (el resto se descubre por gossip)
+SEEDS = [ip.strip() for ip in os.environ.get('SO_SEEDS', '10.0.1.226,10.0.1.41,10.0.1.126').split(',')
+         if ip.strip()]
+# Periodo de sondeo del gossip (un PING a un miembro por periodo)
+GOSSIP_INTERVAL = float(os.environ.get('SO_GOSSIP_INTERVAL', 1.0))
+# Heartbeats ligeros a los vecinos del anillo y umbral phi del detector de fallos
+HEARTBEAT_INTERVAL = float(os.environ.get('SO_HEARTBEAT_INTERVAL', 0.2))
+PHI_SUSPECT = float(os.environ.get('SO_PHI_SUSPECT', 3.0))
+# Segundos de silencio extra que se toleran (GC, GIL, red) antes de sospechar de un nodo
+PHI_PAUSE = float(os.environ.get('SO_PHI_PAUSE', 2.0))
+
+# Tamaño maximo de una trama; una cabecera corrupta no puede reservar mas que esto
+MAX_FRAME_BYTES = _int('SO_MAX_FRAME_MB', 256) * 1024 * 1024
+
+# Hilos que atienden peticiones (E/S y reenvios); el calculo va al pool de procesos
+HANDLER_THREADS = _int('SO_HANDLER_THREADS', 32)
+
+# Procesos de calculo para el entrenamiento (0 = ejecutar en el propio proceso)
+TASK_WORKERS = _int('SO_TASK_WORKERS', os.cpu_count() or 1)
+
+# Concurrencia maxima por tipo de tarea dentro del nodo
+TASK_LIMITS = _limits('SO_TASK_LIMITS')
+
+# Tareas de calculo que pueden esperar turno; por encima el nodo responde "busy"
+TASK_QUEUE = _int('SO_TASK_QUEUE', 32)
+# Segundos de trabajo pendiente por worker a partir de los que se rechazan tareas (vacio = sin limite)
+ADMISSION_MAX_WAIT = float(os.environ['SO_ADMISSION_MAX_WAIT']) if os.environ.get('SO_ADMISSION_MAX_WAIT') else None
+
+# Memoria maxima para datasets y trozos cacheados (LRU)
+DATASET_CACHE_BYTES = _int('SO_DATASET_CACHE_MB', 256) * 1024 * 1024
+
+# Cache de resultados de tareas deterministas (0 = desactivada) y carpeta para persistirla
+RESULT_CACHE_ENTRIES = _int('SO_RESULT_CACHE_ENTRIES', 256)
+RESULT_CACHE_DIR = os.environ.get('SO_RESULT_CACHE_DIR') or None
+
+# Reparto dinamico de trozos en modo parallel
+CHUNK_OPTIONS = {
+    'target_seconds': float(os.environ.get('SO_CHUNK_TARGET_SECONDS', 2.0)),
+    'min_lines': _int('SO_CHUNK_MIN_LINES', 8),
+    'chunks_per_slot': _int('SO_CHUNKS_PER_SLOT', 4),
+    # Minimo de lineas por trozo en los entrenamientos que se promedian (un trozo por worker);
+    # un dataset con menos de minimo x nodos lineas se reparte en un trozo por nodo
+    'model_min_lines': _int('SO_CHUNK_MODEL_MIN_LINES', 256),
+    # Copias especulativas de trozos rezagados (SO_HEDGE=0 para desactivarlas)
+    'hedge': _int('SO_HEDGE', 1) == 1,
+    'hedge_percentile': float(os.environ.get('SO_HEDGE_PERCENTILE', 0.9)),
+    'hedge_factor': float(os.environ.get('SO_HEDGE_FACTOR', 1.5)),
+    # Ejecuciones maximas de un trozo (original + reintentos en otros nodos)
+    'max_attempts': _int('SO_CHUNK_MAX_ATTEMPTS', 3),
+}
+
+# Agregacion en arbol de los promedios federados: parciales que recibe cada nodo como mucho
+REDUCE_FANOUT = _int('SO_REDUCE_FANOUT', 4)
+
+# Cada cuantos segundos se sondean los pares sin noticias recientes
+HEALTH_INTERVAL = float(os.environ.get('SO_HEALTH_INTERVAL', 2.0))
+
+# Politica del scheduler en modo single: random, round_robin, least_loaded o p2c
+SCHEDULER_POLICY = os.environ.get('SO_SCHEDULER_POLICY', 'p2c')
+# Espera maxima prevista (s) en un nodo segun el modelo de coste; por encima no se le envian tareas
+SCHEDULER_MAX_WAIT = float(os.environ.get('SO_SCHEDULER_MAX_WAIT', 120.0))
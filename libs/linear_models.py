@@ -1,14 +1,18 @@
 import math
 
 class LinearRegression:
+    # Hiperparámetros (CORREGIDOS)
+    LEARNING_RATE = 0.01  # Reducido de 0.001 para estabilidad
+    EPOCHS = 1000
+
     def __init__(self):
         self.weights = []
         self.bias = 0.0
 
-    def fit_from_content(self, content):
+    def prepare(self, content, scaling=None):
         """
-        Entrena regresión lineal desde contenido CSV.
-        Formato esperado: x1,x2,... ,xn,y
+        CSV -> {'X', 'y', 'y_normalized', 'y_mean', 'y_std'} normalizados con las estadisticas
+        del propio contenido o con `scaling`; dict con 'status': 'error' si no hay datos.
         """
         lines = [l.strip() for l in content.strip().split('\n') if l.strip() and not l.startswith('#')]
         
@@ -42,14 +46,17 @@ class LinearRegression:
         means = [0.0] * n_features
         stds = [0.0] * n_features
         
-        # Calcular medias
-        for j in range(n_features):
-            means[j] = sum(X[i][j] for i in range(n_samples)) / n_samples
-        
-        # Calcular desviaciones estándar
-        for j in range(n_features):
-            variance = sum((X[i][j] - means[j])**2 for i in range(n_samples)) / n_samples
-            stds[j] = math.sqrt(variance) if variance > 0 else 1.0
+        if scaling:
+            means, stds = list(scaling['means']), list(scaling['stds'])
+        else:
+            # Calcular medias
+            for j in range(n_features):
+                means[j] = sum(X[i][j] for i in range(n_samples)) / n_samples
+            
+            # Calcular desviaciones estándar
+            for j in range(n_features):
+                variance = sum((X[i][j] - means[j])**2 for i in range(n_samples)) / n_samples
+                stds[j] = math.sqrt(variance) if variance > 0 else 1.0
         
         # Normalizar X
         for i in range(n_samples):
@@ -59,59 +66,91 @@ class LinearRegression:
                 normalized_row.append(normalized_val)
             X_normalized.append(normalized_row)
         
-        X = X_normalized
-        
         # Normalizar y
-        y_mean = sum(y) / n_samples
-        y_std = math.sqrt(sum((yi - y_mean)**2 for yi in y) / n_samples)
-        y_std = y_std if y_std > 0 else 1.0
+        if scaling:
+            y_mean, y_std = scaling['y_mean'], scaling['y_std']
+        else:
+            y_mean = sum(y) / n_samples
+            y_std = math.sqrt(sum((yi - y_mean)**2 for yi in y) / n_samples)
+            y_std = y_std if y_std > 0 else 1.0
         y_normalized = [(yi - y_mean) / y_std for yi in y]
         
-        # Inicializar pesos
-        self.weights = [0.0] * n_features
-        self.bias = 0.0
+        return {'X': X_normalized, 'y': y, 'y_normalized': y_normalized,
+                'y_mean': y_mean, 'y_std': y_std}
+
+    def predict_rows(self, X):
+        predictions = []
+        for row in X:
+            pred = self.bias
+            for j in range(len(self.weights)):
+                pred += self.weights[j] * row[j]
+            predictions.append(pred)
+        return predictions
+
+    def gradient(self, X, y):
+        """Suma (sin dividir por n) de los gradientes del MSE en las filas dadas: (dw, db, predicciones)"""
+        # Calcular predicciones
+        predictions = self.predict_rows(X)
+        
+        # Calcular gradientes
+        dw = [0.0] * len(self.weights)
+        db = 0.0
+        
+        for i in range(len(X)):
+            error = predictions[i] - y[i]
+            db += error
+            for j in range(len(self.weights)):
+                dw[j] += error * X[i][j]
+        return dw, db, predictions
+
+    def step(self, dw, db, n_samples, learning_rate):
+        """Paso de descenso con el gradiente sumado sobre n_samples filas"""
+        for j in range(len(self.weights)):
+            self.weights[j] -= learning_rate * (dw[j] / n_samples)
+        self.bias -= learning_rate * (db / n_samples)
+
+    def fit_from_content(self, content, progress_cb=None, epochs=None, init_model=None, scaling=None):
+        """
+        Entrena regresión lineal desde contenido CSV.
+        Formato esperado: x1,x2,... ,xn,y
+        progress_cb(epoca, total, mse) se llama cada vez que se calcula el MSE.
+        Entrenamiento federado por rondas: `init_model` ({'weights', 'bias'}) continua desde
+        el modelo global, `epochs` fija las epocas locales y `scaling` (libs/preprocessing.py)
+        normaliza con las estadisticas del dataset completo en vez de las del trozo.
+        """
+        data = self.prepare(content, scaling)
+        if 'status' in data: return data
+        X, y, y_normalized = data['X'], data['y'], data['y_normalized']
+        y_mean, y_std = data['y_mean'], data['y_std']
+        n_samples = len(X)
+        n_features = len(X[0])
         
-        # Hiperparámetros (CORREGIDOS)
-        learning_rate = 0.01  # Reducido de 0.001 para estabilidad
-        epochs = 1000
+        # Inicializar pesos (o continuar desde el modelo global de la ronda anterior)
+        if init_model:
+            self.weights = [float(w) for w in init_model['weights']]
+            self.bias = float(init_model['bias'])
+        else:
+            self.weights = [0.0] * n_features
+            self.bias = 0.0
+        
+        learning_rate = self.LEARNING_RATE
+        epochs = epochs or self.EPOCHS
         
         # Gradient Descent
         for epoch in range(epochs):
-            # Calcular predicciones
-            predictions = []
-            for i in range(n_samples):
-                pred = self.bias
-                for j in range(n_features):
-                    pred += self.weights[j] * X[i][j]
-                predictions.append(pred)
-            
-            # Calcular gradientes
-            dw = [0.0] * n_features
-            db = 0.0
-            
-            for i in range(n_samples):
-                error = predictions[i] - y_normalized[i]
-                db += error
-                for j in range(n_features):
-                    dw[j] += error * X[i][j]
+            dw, db, predictions = self.gradient(X, y_normalized)
             
             # Actualizar pesos
-            for j in range(n_features):
-                self.weights[j] -= learning_rate * (dw[j] / n_samples)
-            self.bias -= learning_rate * (db / n_samples)
+            self.step(dw, db, n_samples, learning_rate)
             
             # Calcular MSE cada 200 épocas
             if (epoch + 1) % 200 == 0:
                 mse = sum((predictions[i] - y_normalized[i])**2 for i in range(n_samples)) / n_samples
                 print(f" [LINEAR] Época {epoch+1}/{epochs} - MSE: {mse:.4f}")
+                if progress_cb: progress_cb(epoch + 1, epochs, mse)
         
         # Calcular MSE final en escala normalizada
-        final_predictions = []
-        for i in range(n_samples):
-            pred = self.bias
-            for j in range(n_features):
-                pred += self.weights[j] * X[i][j]
-            final_predictions.append(pred)
+        final_predictions = self.predict_rows(X)
         
         mse_normalized = sum((final_predictions[i] - y_normalized[i])**2 for i in range(n_samples)) / n_samples
         rmse_normalized = math.sqrt(mse_normalized)
@@ -1,6 +1,10 @@
 import math
 
 class LogisticRegression:
+    # Hiperparámetros
+    LEARNING_RATE = 0.1
+    EPOCHS = 200
+
     def __init__(self):
         self.weights = []
         self.bias = 0.0
@@ -13,10 +17,10 @@ class LogisticRegression:
             return 0.0
         return 1.0 / (1.0 + math.exp(-z))
 
-    def fit_from_content(self, content):
+    def prepare(self, content, scaling=None):
         """
-        Entrena regresión logística desde contenido CSV.
-        Formato: x1,x2,...,xn,y (y debe ser 0 o 1)
+        CSV -> {'X', 'y'} con X normalizada con las estadisticas del propio contenido o con
+        `scaling`; dict con 'status': 'error' si no hay datos.
         """
         lines = [l.strip() for l in content.strip().split('\n') if l.strip() and not l.startswith('#')]
         
@@ -49,14 +53,17 @@ class LogisticRegression:
         means = [0.0] * n_features
         stds = [0.0] * n_features
         
-        # Calcular medias
-        for j in range(n_features):
-            means[j] = sum(X[i][j] for i in range(n_samples)) / n_samples
-        
-        # Calcular desviaciones estándar
-        for j in range(n_features):
-            variance = sum((X[i][j] - means[j])**2 for i in range(n_samples)) / n_samples
-            stds[j] = math.sqrt(variance) if variance > 0 else 1.0
+        if scaling:
+            means, stds = list(scaling['means']), list(scaling['stds'])
+        else:
+            # Calcular medias
+            for j in range(n_features):
+                means[j] = sum(X[i][j] for i in range(n_samples)) / n_samples
+            
+            # Calcular desviaciones estándar
+            for j in range(n_features):
+                variance = sum((X[i][j] - means[j])**2 for i in range(n_samples)) / n_samples
+                stds[j] = math.sqrt(variance) if variance > 0 else 1.0
         
         # Normalizar
         for i in range(n_samples):
@@ -66,60 +73,89 @@ class LogisticRegression:
                 normalized_row.append(normalized_val)
             X_normalized.append(normalized_row)
         
-        X = X_normalized
+        return {'X': X_normalized, 'y': y}
+
+    def predict_rows(self, X):
+        """Probabilidad de la clase 1 para cada fila (ya normalizada)"""
+        predictions = []
+        for row in X:
+            z = self.bias
+            for j in range(len(self.weights)):
+                z += self.weights[j] * row[j]
+            predictions.append(self.sigmoid(z))
+        return predictions
+
+    def gradient(self, X, y):
+        """Suma (sin dividir por n) de los gradientes de la log-loss: (dw, db, predicciones)"""
+        # Predicciones
+        predictions = self.predict_rows(X)
+        
+        # Calcular gradientes
+        dw = [0.0] * len(self.weights)
+        db = 0.0
+        
+        for i in range(len(X)):
+            error = predictions[i] - y[i]
+            db += error
+            for j in range(len(self.weights)):
+                dw[j] += error * X[i][j]
+        return dw, db, predictions
+
+    def step(self, dw, db, n_samples, learning_rate):
+        """Paso de descenso con el gradiente sumado sobre n_samples filas"""
+        for j in range(len(self.weights)):
+            self.weights[j] -= learning_rate * (dw[j] / n_samples)
+        self.bias -= learning_rate * (db / n_samples)
+
+    @staticmethod
+    def loss_sum(predictions, y):
+        """Log-loss sumada (sin dividir por n)"""
+        return -sum(
+            y[i] * math.log(predictions[i] + 1e-10) + 
+            (1 - y[i]) * math.log(1 - predictions[i] + 1e-10)
+            for i in range(len(y))
+        )
+
+    def fit_from_content(self, content, progress_cb=None, epochs=None, init_model=None, scaling=None):
+        """
+        Entrena regresión logística desde contenido CSV.
+        Formato: x1,x2,...,xn,y (y debe ser 0 o 1)
+        progress_cb(epoca, total, loss) se llama cada vez que se calcula la loss.
+        `epochs`, `init_model` ({'weights', 'bias'}) y `scaling` como en LinearRegression.
+        """
+        data = self.prepare(content, scaling)
+        if 'status' in data: return data
+        X, y = data['X'], data['y']
+        n_samples = len(X)
+        n_features = len(X[0])
         
-        # Inicializar pesos
-        self.weights = [0.0] * n_features
-        self.bias = 0.0
+        # Inicializar pesos (o continuar desde el modelo global de la ronda anterior)
+        if init_model:
+            self.weights = [float(w) for w in init_model['weights']]
+            self.bias = float(init_model['bias'])
+        else:
+            self.weights = [0.0] * n_features
+            self.bias = 0.0
         
-        # Hiperparámetros
-        learning_rate = 0.1
-        epochs = 200
+        learning_rate = self.LEARNING_RATE
+        epochs = epochs or self.EPOCHS
         
         # Gradient Descent
         for epoch in range(epochs):
-            # Predicciones
-            predictions = []
-            for i in range(n_samples):
-                z = self.bias
-                for j in range(n_features):
-                    z += self.weights[j] * X[i][j]
-                predictions.append(self.sigmoid(z))
-            
-            # Calcular gradientes
-            dw = [0.0] * n_features
-            db = 0.0
-            
-            for i in range(n_samples):
-                error = predictions[i] - y[i]
-                db += error
-                for j in range(n_features):
-                    dw[j] += error * X[i][j]
+            dw, db, predictions = self.gradient(X, y)
             
             # Actualizar pesos
-            for j in range(n_features):
-                self.weights[j] -= learning_rate * (dw[j] / n_samples)
-            self.bias -= learning_rate * (db / n_samples)
+            self.step(dw, db, n_samples, learning_rate)
             
             # Log cada 50 épocas
             if (epoch + 1) % 50 == 0:
-                loss = -sum(
-                    y[i] * math.log(predictions[i] + 1e-10) + 
-                    (1 - y[i]) * math.log(1 - predictions[i] + 1e-10)
-                    for i in range(n_samples)
-                ) / n_samples
+                loss = self.loss_sum(predictions, y) / n_samples
                 print(f" [LOGISTIC] Época {epoch+1}/{epochs} - Loss: {loss:.4f}")
+                if progress_cb: progress_cb(epoch + 1, epochs, loss)
         
-        # Calcular accuracy final
-        correct = 0
-        for i in range(n_samples):
-            z = self.bias
-            for j in range(n_features):
-                z += self.weights[j] * X[i][j]
-            pred_class = 1 if self.sigmoid(z) >= 0.5 else 0
-            if pred_class == y[i]:
-                correct += 1
-        
+        # Calcular accuracy y loss finales
+        predictions = self.predict_rows(X)
+        correct = sum(1 for p, t in zip(predictions, y) if (1 if p >= 0.5 else 0) == t)
         accuracy = correct / n_samples
         
         print(f" [LOGISTIC] [OK] Entrenamiento completado - Accuracy: {accuracy*100:.2f}%")
@@ -129,6 +165,7 @@ class LogisticRegression:
             'weights': self.weights,
             'bias': self.bias,
             'accuracy': accuracy,
+            'loss': self.loss_sum(predictions, y) / n_samples,
             'n_samples': n_samples,
             'n_features': n_features
         }
@@ -2,20 +2,23 @@ import math
 import random
 
 class MLP:
-    def __init__(self, input_size, hidden_size, output_size):
+    def __init__(self, input_size, hidden_size, output_size, seed=None):
         self.input_size = input_size
         self.hidden_size = hidden_size
         self.output_size = output_size
+        self.seed = seed
+        # Con semilla la inicializacion (y el entrenamiento) es reproducible
+        rng = random.Random(seed)
         
         # Inicializar pesos con Xavier initialization
         limit_ih = math.sqrt(6.0 / (input_size + hidden_size))
         limit_ho = math.sqrt(6.0 / (hidden_size + output_size))
         
-        self.W1 = [[random.uniform(-limit_ih, limit_ih) for _ in range(hidden_size)] 
+        self.W1 = [[rng.uniform(-limit_ih, limit_ih) for _ in range(hidden_size)] 
                    for _ in range(input_size)]
         self.b1 = [0.0] * hidden_size
         
-        self.W2 = [[random.uniform(-limit_ho, limit_ho) for _ in range(output_size)] 
+        self.W2 = [[rng.uniform(-limit_ho, limit_ho) for _ in range(output_size)] 
                    for _ in range(hidden_size)]
         self.b2 = [0.0] * output_size
 
@@ -47,7 +50,7 @@ class MLP:
         
         return hidden, output
 
-    def train(self, X_train, y_train, epochs=100, learning_rate=0.1):
+    def train(self, X_train, y_train, epochs=100, learning_rate=0.1, progress_cb=None):
         """Entrenamiento con backpropagation"""
         n_samples = len(X_train)
         
@@ -105,11 +108,16 @@ class MLP:
             
             if (epoch + 1) % 20 == 0:
                 print(f" [MLP] Época {epoch+1}/{epochs} - Loss: {avg_loss:.4f}")
+                if progress_cb: progress_cb(epoch + 1, epochs, avg_loss)
         
         return avg_loss
 
-    def fit_from_content(self, content):
-        """Entrenar desde CSV"""
+    def fit_from_content(self, content, progress_cb=None, epochs=None, init_model=None, scaling=None):
+        """
+        Entrenar desde CSV.
+        `init_model` (campos del resultado: input_to_hidden_w, hidden_bias, hidden_to_output_w,
+        output_bias) continua desde el modelo global; `epochs` y `scaling` como en LinearRegression.
+        """
         lines = [l.strip() for l in content.strip().split('\n') 
                 if l.strip() and not l.startswith('#')]
         
@@ -139,12 +147,15 @@ class MLP:
         print(f" [MLP] Datos: {n_samples} muestras, {n_features} features, {n_classes} clases")
         
         # Normalizar
-        means = [sum(X_train[i][j] for i in range(n_samples)) / n_samples 
-                for j in range(n_features)]
-        stds = []
-        for j in range(n_features):
-            var = sum((X_train[i][j] - means[j])**2 for i in range(n_samples)) / n_samples
-            stds.append(math.sqrt(var) if var > 0 else 1.0)
+        if scaling:
+            means, stds = list(scaling['means']), list(scaling['stds'])
+        else:
+            means = [sum(X_train[i][j] for i in range(n_samples)) / n_samples 
+                    for j in range(n_features)]
+            stds = []
+            for j in range(n_features):
+                var = sum((X_train[i][j] - means[j])**2 for i in range(n_samples)) / n_samples
+                stds.append(math.sqrt(var) if var > 0 else 1.0)
         
         X_normalized = []
         for i in range(n_samples):
@@ -153,10 +164,22 @@ class MLP:
             X_normalized.append(row)
         
         # Reinitializar red con tamaños correctos
-        self.__init__(n_features, 5, n_classes)
+        if init_model:
+            # Modelo global de la ronda anterior: define el tamaño de la red
+            if len(init_model['output_bias']) < n_classes:
+                return {'status': 'error', 'msg': f'init_model con menos de {n_classes} clases'}
+            n_classes = len(init_model['output_bias'])
+            self.__init__(n_features, len(init_model['hidden_bias']), n_classes, self.seed)
+            self.W1 = [[float(w) for w in row] for row in init_model['input_to_hidden_w']]
+            self.b1 = [float(b) for b in init_model['hidden_bias']]
+            self.W2 = [[float(w) for w in row] for row in init_model['hidden_to_output_w']]
+            self.b2 = [float(b) for b in init_model['output_bias']]
+        else:
+            self.__init__(n_features, 5, n_classes, self.seed)
         
         # Entrenar
-        final_loss = self.train(X_normalized, y_train, epochs=100, learning_rate=0.1)
+        final_loss = self.train(X_normalized, y_train, epochs=epochs or 100, learning_rate=0.1,
+                                progress_cb=progress_cb)
         
         print(f" [MLP] [OK] Entrenamiento completado - Loss final: {final_loss:.4f}")
         
@@ -0,0 +1,49 @@
+import math
+
+
+def data_lines(content):
+    """Lineas con datos (sin vacias ni comentarios '#'): las que se reparten en trozos"""
+    return [l for l in content.strip().split('\n') if l.strip() and not l.strip().startswith('#')]
+
+
+def parse_rows(content):
+    """CSV x1,...,xn,y -> (X, y) con las mismas reglas que las libs (lineas invalidas se ignoran)"""
+    X, y = [], []
+    for line in content.strip().split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'): continue
+        try:
+            values = [float(v.strip()) for v in line.split(',')]
+        except ValueError:
+            continue
+        if len(values) < 2: continue
+        X.append(values[:-1])
+        y.append(values[-1])
+    return X, y
+
+
+def dataset_stats(content):
+    """
+    Estadisticas de normalizacion del dataset completo.
+    En entrenamiento federado por rondas el coordinador las calcula una vez y las envia a
+    todos los nodos (`scaling`), asi cada trozo se normaliza igual y los pesos son comparables.
+    """
+    X, y = parse_rows(content)
+    if not X: return None
+    n_samples, n_features = len(X), len(X[0])
+    means = [sum(row[j] for row in X) / n_samples for j in range(n_features)]
+    stds = []
+    for j in range(n_features):
+        var = sum((row[j] - means[j]) ** 2 for row in X) / n_samples
+        stds.append(math.sqrt(var) if var > 0 else 1.0)
+    y_mean = sum(y) / n_samples
+    y_std = math.sqrt(sum((v - y_mean) ** 2 for v in y) / n_samples)
+    return {
+        'n_samples': n_samples,
+        'n_features': n_features,
+        'means': means,
+        'stds': stds,
+        'y_mean': y_mean,
+        'y_std': y_std if y_std > 0 else 1.0,
+        'n_classes': int(max(y)) + 1,
+    }
@@ -1,15 +1,113 @@
 import socket
 import json
+import math
+import queue
+import random
 import threading
 import time
+from network.failure_detector import PhiAccrualDetector
+from network import node_summary
+
+# Estados de un miembro del cluster
+ALIVE = 'alive'
+SUSPECT = 'suspect'
+DEAD = 'dead'
+
+# Prioridad de los estados con la misma encarnacion (SWIM)
+_RANK = {ALIVE: 0, SUSPECT: 1, DEAD: 2}
+
+
+class Member:
+    def __init__(self, node_id, ip, incarnation=0):
+        self.id = node_id
+        self.ip = ip
+        self.incarnation = incarnation
+        self.state = ALIVE
+        self.changed = time.time()      # ultimo cambio de estado
+        self.last_seen = time.time()    # ultimo mensaje directo del nodo
+        self.load = None
+        self.summary = None             # ultimo resumen anunciado (ver node_summary)
+        self.legacy = False             # nodo de la version anterior (solo HELLO)
+
+    def info(self):
+        return {'ip': self.ip, 'last_seen': self.last_seen, 'load': self.load,
+                'summary': self.summary, 'state': self.state, 'incarnation': self.incarnation}
+
 
 class NodeDiscovery:
-    def __init__(self, node_id, port=5000):
+    """
+    Pertenencia al cluster por gossip (SWIM).
+    Cada periodo se sondea un solo miembro (PING -> ACK); si no contesta, se pide a `k`
+    miembros que lo sondeen por nosotros (PING_REQ) y, si tampoco, pasa a sospechoso.
+    Un sospechoso que no lo desmiente (subiendo su encarnacion) se da por muerto.
+    Los cambios de pertenencia viajan a cuestas de PING/ACK, cada uno un numero acotado
+    de veces, asi que el trafico por nodo es constante aunque crezca el cluster.
+    Los nodos semilla (config) solo sirven para entrar en el cluster.
+
+    Deteccion rapida: cada nodo envia un heartbeat minimo cada `heartbeat_interval` a sus
+    `heartbeat_fanout` sucesores en el anillo de ids (a todos en clusters pequeños) y un
+    detector phi-accrual sobre los intervalos de llegada marca al miembro como sospechoso
+    (phi >= `phi_suspect`) tras `acceptable_pause` s de silencio de mas: deja de recibir
+    trabajo, pero sigue siendo miembro y vuelve con su siguiente heartbeat. Solo se da por
+    muerto si la sospecha no se desmiente en el plazo de SWIM (sondeos fallidos durante
+    `suspicion_mult` periodos), asi una pausa de unos segundos no corta sus conexiones.
+    Solo se juzga a los predecesores que envian heartbeats a este nodo: si el anillo cambia y
+    un miembro deja de enviarlos, se borra su historial en vez de sospechar de el.
+    Los cambios de estado se notifican a los callbacks registrados con `add_listener`.
+
+    Cada HB y PING/ACK lleva ademas el resumen binario del nodo (carga, cores, RAM libre,
+    datasets en cache, tipos de tarea; ver network/node_summary.py), asi `get_peers` da el
+    estado de todo el cluster sin peticiones extra.
+
+    Un muerto solo vuelve con una encarnacion mayor: si sigue hablando se le responde con su
+    estado para que lo desmienta. Los miembros olvidados dejan una lapida (`TOMBSTONE_TTL`)
+    para que un gossip ALIVE atrasado no los resucite.
+
+    Compatibilidad con la version anterior (HELLO cada 2 s a una lista fija de IPs): se les
+    envia un HELLO cada `LEGACY_HELLO_INTERVAL` (a las semillas y a los nodos antiguos
+    conocidos) y un nodo antiguo es miembro mientras llegue su HELLO (`LEGACY_TTL`), como
+    antes. No se sondea ni se difunde por gossip porque no contesta a PING.
+    """
+
+    MAX_UPDATES = 8         # cambios de pertenencia por mensaje
+    DEAD_TTL = 60           # segundos que se recuerda a un miembro muerto
+    TOMBSTONE_TTL = 600     # segundos que se recuerda la encarnacion de un miembro olvidado
+    LEGACY_TTL = 15         # segundos sin HELLO tras los que se olvida a un nodo antiguo
+    LEGACY_HELLO_INTERVAL = 2.0
+    SUMMARY_TTL = 1.0       # segundos que se reutiliza el resumen propio ya empaquetado
+
+    def __init__(self, node_id, port=5000, seeds=None, interval=1.0, ack_timeout=0.3,
+                 indirect_probes=3, suspicion_mult=4, heartbeat_interval=0.2,
+                 heartbeat_fanout=32, phi_suspect=3.0, acceptable_pause=2.0):
         self.node_id = node_id
         self.port = port
-        self.peers = {}
+        self.interval = interval
+        self.ack_timeout = ack_timeout
+        self.indirect_probes = indirect_probes
+        self.suspicion_mult = suspicion_mult
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_fanout = heartbeat_fanout
+        self.phi_suspect = phi_suspect
+        self.detector = PhiAccrualDetector(first_interval=heartbeat_interval,
+                                           acceptable_pause=acceptable_pause)
+        self.listeners = []         # callback(node_id, ip, estado_anterior, estado_nuevo)
+        self.events = queue.Queue()
         self.running = False
-        
+        # Funcion que devuelve el estado de este nodo; viaja empaquetado en cada mensaje
+        self.summary_provider = None
+        self._summary = (0.0, None)     # (cuando, texto empaquetado)
+
+        self.members = {}           # id -> Member (sin incluirme)
+        self.tombstones = {}        # id -> (encarnacion, cuando) de los miembros olvidados
+        self.incarnation = 0
+        self.updates = {}           # id -> [actualizacion, veces enviada]
+        self.acks = {}              # seq -> Event
+        self.relays = {}            # seq local -> (ip que pidio el PING_REQ, seq original)
+        self.seq = 0
+        self.probe_order = []
+        self.lock = threading.RLock()
+        self.sock = None
+
         # 1. DETECTAR MI IP REAL (CRÍTICO PARA QUE FUNCIONE EN AWS)
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -18,47 +116,349 @@ class NodeDiscovery:
             s.close()
         except:
             self.my_ip = '127.0.0.1'
-            
+
         print(f" [NET] Mi IP publica es: {self.my_ip} (Ya no soy 127.0.0.1)")
 
-        # 2. LISTA DE AMIGOS (Tus IPs reales)
-        self.known_nodes = [
-            '10.0.1.226', 
-            '10.0.1.41', 
-            '10.0.1.126'
-        ]
-        
-    def broadcast_presence(self):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        msg = {'type': 'HELLO', 'id': self.node_id, 'ip': self.my_ip}
-        
+        # 2. NODOS SEMILLA (config): solo para entrar en el cluster
+        self.seeds = [ip for ip in (seeds or []) if ip and ip != self.my_ip]
+
+    @property
+    def peers(self):
+        with self.lock:
+            return {m.id: m.info() for m in self.members.values()}
+
+    # --- Difusion de cambios (gossip) ---
+
+    def _queue_update(self, node_id, ip, state, incarnation):
+        self.updates[node_id] = [{'id': node_id, 'ip': ip, 'state': state, 'inc': incarnation}, 0]
+
+    def _pick_updates(self):
+        """Los cambios menos difundidos; cada uno se reenvia ~3 log(n) veces y se descarta"""
+        limit = 3 * max(1, math.ceil(math.log2(len(self.members) + 2)))
+        chosen = sorted(self.updates.values(), key=lambda u: u[1])[:self.MAX_UPDATES]
+        for u in chosen: u[1] += 1
+        for node_id in [k for k, u in self.updates.items() if u[1] >= limit]:
+            del self.updates[node_id]
+        return [u[0] for u in chosen]
+
+    def _apply(self, update):
+        """Aplica un cambio recibido con las reglas de precedencia de SWIM"""
+        node_id, state, inc = update['id'], update['state'], update['inc']
+        if node_id == self.node_id:
+            if state != ALIVE and inc >= self.incarnation:
+                # Me dan por sospechoso o muerto: desmentirlo con una encarnacion nueva
+                self.incarnation = inc + 1
+                self._queue_update(self.node_id, self.my_ip, ALIVE, self.incarnation)
+            return
+
+        member = self.members.get(node_id)
+        if member is None:
+            if state == DEAD: return
+            tomb = self.tombstones.get(node_id)
+            if tomb and inc <= tomb[0]: return
+            self.tombstones.pop(node_id, None)
+            member = self.members[node_id] = Member(node_id, update['ip'], inc)
+            member.state = state
+            self._queue_update(node_id, member.ip, state, inc)
+            self.events.put((node_id, member.ip, None, state))
+            print(f" [NET] Nuevo miembro {node_id} ({member.ip})")
+            return
+
+        newer = inc > member.incarnation or (
+            inc == member.incarnation and _RANK[state] > _RANK[member.state])
+        if member.state == DEAD and state != DEAD and inc <= member.incarnation: newer = False
+        if not newer: return
+        self._set_state(member, state, inc)
+        self._queue_update(node_id, member.ip, state, inc)
+
+    def _set_state(self, member, state, inc=None):
+        if inc is not None: member.incarnation = inc
+        if member.state != state:
+            print(f" [NET] Miembro {member.id} ({member.ip}): {member.state} -> {state}")
+            self.events.put((member.id, member.ip, member.state, state))
+            if state == DEAD: self.detector.remove(member.id)
+            member.state = state
+            member.changed = time.time()
+
+    def add_listener(self, callback):
+        """callback(node_id, ip, estado_anterior, estado_nuevo) en cada cambio de estado"""
+        self.listeners.append(callback)
+
+    def _notify_loop(self):
+        # Fuera del lock: un callback lento no frena el protocolo
         while self.running:
-            for target_ip in self.known_nodes:
-                if target_ip == self.my_ip: continue
-                try:
-                    sock.sendto(json.dumps(msg).encode(), (target_ip, self.port))
-                except: pass
-            time.sleep(2)
+            try: event = self.events.get(timeout=1)
+            except queue.Empty: continue
+            for cb in list(self.listeners):
+                try: cb(*event)
+                except Exception as e: print(f" [NET] [ERROR] Callback de pertenencia: {e}")
+
+    def _tell_dead(self, node_id, ip, inc):
+        """Un nodo dado por muerto sigue hablando: se le envia su estado para que lo desmienta"""
+        self._queue_update(node_id, ip, DEAD, inc)
+        self._send(ip, {'type': 'ACK', 'seq': None})
+
+    def _heard_from(self, msg, addr, legacy=False):
+        """Un mensaje directo es prueba de vida del emisor (salvo que este muerto: ver _tell_dead)"""
+        node_id = msg.get('from')
+        if not node_id or node_id == self.node_id: return
+        ip, inc = msg.get('ip') or addr[0], msg.get('inc', 0)
+        member = self.members.get(node_id)
+        if member is None:
+            tomb = self.tombstones.get(node_id)
+            if tomb and inc <= tomb[0] and not legacy:
+                self._tell_dead(node_id, ip, tomb[0])
+                return
+            self.tombstones.pop(node_id, None)
+            member = self.members[node_id] = Member(node_id, ip, inc)
+            member.legacy = legacy
+            if not legacy: self._queue_update(node_id, member.ip, ALIVE, member.incarnation)
+            self.events.put((node_id, member.ip, None, ALIVE))
+            print(f" [NET] Nuevo miembro {node_id} ({member.ip})" + (' (version anterior)' if legacy else ''))
+        elif member.legacy:
+            if member.state != ALIVE: self._set_state(member, ALIVE)
+        elif member.state == DEAD and inc <= member.incarnation:
+            self._tell_dead(node_id, member.ip, member.incarnation)
+            return
+        elif member.state != ALIVE and inc >= member.incarnation:
+            self._set_state(member, ALIVE, inc)
+            self._queue_update(node_id, member.ip, ALIVE, member.incarnation)
+        member.last_seen = time.time()
+        if 's' in msg:
+            summary = node_summary.unpack(msg['s'])
+            if summary:
+                member.summary = summary
+                member.load = node_summary.load_of(summary)
+        elif 'load' in msg:
+            # Nodo anterior al resumen binario: carga en JSON
+            member.load = msg['load']
+
+    # --- Mensajes ---
+
+    def _packed_summary(self):
+        """Resumen propio en base64; se recalcula como mucho cada SUMMARY_TTL segundos"""
+        if not self.summary_provider: return None
+        ts, packed = self._summary
+        if time.time() - ts >= self.SUMMARY_TTL:
+            try: packed = node_summary.pack(self.summary_provider())
+            except Exception as e: print(f" [NET] [ERROR] Resumen del nodo: {e}")
+            self._summary = (time.time(), packed)
+        return packed
+
+    def _send(self, ip, msg):
+        with self.lock:
+            msg.update({'from': self.node_id, 'ip': self.my_ip, 'inc': self.incarnation,
+                        'updates': self._pick_updates()})
+        packed = self._packed_summary()
+        if packed: msg['s'] = packed
+        try:
+            self.sock.sendto(json.dumps(msg).encode(), (ip, self.port))
+        except OSError: pass
+
+    def _next_seq(self):
+        with self.lock:
+            self.seq += 1
+            return self.seq
+
+    def _ping(self, ip, timeout):
+        """PING directo; True si llega el ACK a tiempo"""
+        seq = self._next_seq()
+        event = threading.Event()
+        with self.lock: self.acks[seq] = event
+        self._send(ip, {'type': 'PING', 'seq': seq})
+        ok = event.wait(timeout)
+        with self.lock: self.acks.pop(seq, None)
+        return ok
+
+    def _hello(self):
+        """HELLO del protocolo anterior: un nodo antiguo solo conoce a quien se lo envia"""
+        with self.lock:
+            targets = set(self.seeds) | {m.ip for m in self.members.values() if m.legacy}
+        # 'from' lo distingue del HELLO de un nodo antiguo (que solo lee type, id e ip)
+        hello = json.dumps({'type': 'HELLO', 'id': self.node_id, 'ip': self.my_ip,
+                            'from': self.node_id}).encode()
+        for ip in targets:
+            try: self.sock.sendto(hello, (ip, self.port))
+            except OSError: pass
+
+    def _handle(self, msg, addr):
+        legacy = False
+        if msg.get('type') == 'HELLO':
+            # HELLO de compatibilidad de un nodo nuevo: es solo para los antiguos
+            if 'from' in msg: return
+            # Nodo con la version anterior (HELLO periodico): cuenta como mensaje directo
+            msg['from'] = msg.get('id')
+            legacy = True
+        if msg.get('type') == 'HB':
+            self.detector.heartbeat(msg.get('from'))
+        with self.lock:
+            self._heard_from(msg, addr, legacy)
+            for update in msg.get('updates', []):
+                self._apply(update)
+
+        t = msg.get('type')
+        if t in ('PING', 'JOIN'):
+            self._send(addr[0], {'type': 'ACK', 'seq': msg.get('seq')})
+        elif t == 'PING_REQ':
+            # Sondeo indirecto: hacer PING al objetivo y devolver su ACK a quien lo pidio
+            seq = self._next_seq()
+            with self.lock: self.relays[seq] = (addr[0], msg.get('seq'))
+            self._send(msg['target'], {'type': 'PING', 'seq': seq})
+        elif t == 'ACK':
+            with self.lock:
+                event = self.acks.get(msg.get('seq'))
+                relay = self.relays.pop(msg.get('seq'), None)
+            if event: event.set()
+            if relay: self._send(relay[0], {'type': 'ACK', 'seq': relay[1]})
 
     def listen(self):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.bind(('0.0.0.0', self.port))
-        
         while self.running:
             try:
-                data, addr = sock.recvfrom(1024)
-                msg = json.loads(data.decode())
-                if msg['type'] == 'HELLO' and msg['id'] != self.node_id:
-                    self.peers[msg['id']] = {'ip': msg['ip'], 'last_seen': time.time()}
-            except: pass
+                data, addr = self.sock.recvfrom(65535)
+                self._handle(json.loads(data.decode()), addr)
+            except Exception: pass
+
+    # --- Ciclo de sondeo ---
+
+    def _next_target(self):
+        """Miembros en orden aleatorio, recorriendo todos antes de repetir (round-robin de SWIM)"""
+        with self.lock:
+            live = [m for m in self.members.values() if m.state != DEAD and not m.legacy]
+            if not live: return None
+            if not self.probe_order:
+                self.probe_order = [m.id for m in live]
+                random.shuffle(self.probe_order)
+            while self.probe_order:
+                member = self.members.get(self.probe_order.pop())
+                if member and member.state != DEAD: return member
+            return None
+
+    def _probe(self, member):
+        if self._ping(member.ip, self.ack_timeout): return
+
+        # Sin respuesta directa: pedir a otros miembros que lo sondeen
+        with self.lock:
+            helpers = [m for m in self.members.values()
+                       if m.state == ALIVE and m.id != member.id and not m.legacy]
+            helpers = random.sample(helpers, min(self.indirect_probes, len(helpers)))
+            seq = self._next_seq()
+            event = threading.Event()
+            self.acks[seq] = event
+        for h in helpers:
+            self._send(h.ip, {'type': 'PING_REQ', 'seq': seq, 'target': member.ip})
+        ok = event.wait(max(self.interval - self.ack_timeout, self.ack_timeout))
+        with self.lock:
+            self.acks.pop(seq, None)
+            if not ok and member.state == ALIVE:
+                self._set_state(member, SUSPECT)
+                self._queue_update(member.id, member.ip, SUSPECT, member.incarnation)
+
+    def _expire(self):
+        """Sospechosos sin desmentir -> muertos; muertos antiguos se olvidan (dejando lapida)"""
+        now = time.time()
+        with self.lock:
+            timeout = self.suspicion_mult * self.interval * max(1.0, math.log2(len(self.members) + 1))
+            for m in list(self.members.values()):
+                if m.legacy:
+                    if now - m.last_seen > self.LEGACY_TTL:
+                        self._set_state(m, DEAD)
+                        del self.members[m.id]
+                elif m.state == SUSPECT and now - m.changed > timeout:
+                    self._set_state(m, DEAD)
+                    self._queue_update(m.id, m.ip, DEAD, m.incarnation)
+                elif m.state == DEAD and now - m.changed > self.DEAD_TTL:
+                    del self.members[m.id]
+                    self.tombstones[m.id] = (m.incarnation, now)
+            for node_id in [k for k, (_, t) in self.tombstones.items() if now - t > self.TOMBSTONE_TTL]:
+                del self.tombstones[node_id]
+
+    # --- Heartbeats y detector phi-accrual ---
+
+    def _heartbeat_targets(self):
+        """Sucesores en el anillo ordenado por id: cada nodo vigila siempre a los mismos"""
+        live = sorted((m for m in self.members.values() if m.state != DEAD and not m.legacy),
+                      key=lambda m: m.id)
+        if len(live) <= self.heartbeat_fanout: return live
+        after = [m for m in live if m.id > self.node_id] + [m for m in live if m.id < self.node_id]
+        return after[:self.heartbeat_fanout]
+
+    def _heartbeat_sources(self):
+        """Miembros que tienen a este nodo entre sus sucesores: los que le envian heartbeats"""
+        live = sorted((m for m in self.members.values() if m.state != DEAD and not m.legacy),
+                      key=lambda m: m.id)
+        if len(live) <= self.heartbeat_fanout: return live
+        before = [m for m in live if m.id > self.node_id] + [m for m in live if m.id < self.node_id]
+        return before[-self.heartbeat_fanout:]
+
+    def _check_phi(self):
+        now = time.time()
+        with self.lock:
+            sources = {m.id for m in self._heartbeat_sources()}
+            for m in list(self.members.values()):
+                if m.state == DEAD or m.legacy: continue
+                if m.id not in sources:
+                    # Ya no nos envia heartbeats (cambio el anillo): su silencio no es sospechoso,
+                    # y si vuelve a enviarlos se empieza con un historial limpio
+                    self.detector.remove(m.id)
+                    continue
+                phi = self.detector.phi(m.id, now)
+                if phi is None: continue
+                # Solo sospecha: la muerte la confirma SWIM (_expire) si nadie la desmiente
+                if phi >= self.phi_suspect and m.state == ALIVE:
+                    self._set_state(m, SUSPECT)
+                    self._queue_update(m.id, m.ip, SUSPECT, m.incarnation)
+
+    def heartbeat_loop(self):
+        while self.running:
+            started = time.time()
+            with self.lock:
+                targets = self._heartbeat_targets()
+                hb = {'type': 'HB', 'from': self.node_id, 'ip': self.my_ip, 'inc': self.incarnation}
+            packed = self._packed_summary()
+            if packed: hb['s'] = packed
+            hb = json.dumps(hb).encode()
+            for m in targets:
+                try: self.sock.sendto(hb, (m.ip, self.port))
+                except OSError: pass
+            self._check_phi()
+            time.sleep(max(0.0, self.heartbeat_interval - (time.time() - started)))
+
+    def _join(self):
+        for ip in self.seeds:
+            self._send(ip, {'type': 'JOIN', 'seq': 0})
+
+    def gossip_loop(self):
+        rounds = 0
+        last_hello = 0.0
+        while self.running:
+            # Sin miembros (o cada cierto tiempo, para unir particiones) se contacta a las semillas
+            with self.lock: alone = not any(m.state != DEAD for m in self.members.values())
+            if alone or rounds % 30 == 0: self._join()
+            rounds += 1
+            if time.time() - last_hello >= self.LEGACY_HELLO_INTERVAL:
+                self._hello()
+                last_hello = time.time()
+
+            started = time.time()
+            member = self._next_target()
+            if member: self._probe(member)
+            self._expire()
+            time.sleep(max(0.0, self.interval - (time.time() - started)))
 
     def start(self):
         self.running = True
-        threading.Thread(target=self.broadcast_presence, daemon=True).start()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('0.0.0.0', self.port))
+        with self.lock: self._queue_update(self.node_id, self.my_ip, ALIVE, self.incarnation)
         threading.Thread(target=self.listen, daemon=True).start()
+        threading.Thread(target=self.gossip_loop, daemon=True).start()
+        threading.Thread(target=self.heartbeat_loop, daemon=True).start()
+        threading.Thread(target=self._notify_loop, daemon=True).start()
 
     def stop(self): self.running = False
-    
-    def get_peers(self):
-        now = time.time()
-        return {k:v for k,v in self.peers.items() if now - v['last_seen'] < 15}
+
+    def get_peers(self, include_suspect=False):
+        """Miembros vivos (y sospechosos si se pide): {id: {'ip', 'last_seen', 'load', 'summary', 'state', ...}}"""
+        states = (ALIVE, SUSPECT) if include_suspect else (ALIVE,)
+        with self.lock:
+            return {m.id: m.info() for m in self.members.values() if m.state in states}
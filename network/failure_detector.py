@@ -0,0 +1,80 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+class _History:
+    """Ventana de intervalos entre heartbeats de un nodo (media y varianza incrementales)"""
+
+    def __init__(self, size):
+        self.intervals = deque(maxlen=size)
+        self.total = 0.0
+        self.squares = 0.0
+        self.last = None
+
+    def add(self, interval):
+        if len(self.intervals) == self.intervals.maxlen:
+            old = self.intervals[0]
+            self.total -= old
+            self.squares -= old * old
+        self.intervals.append(interval)
+        self.total += interval
+        self.squares += interval * interval
+
+    def mean(self):
+        return self.total / len(self.intervals)
+
+    def std(self):
+        m = self.mean()
+        return math.sqrt(max(self.squares / len(self.intervals) - m * m, 0.0))
+
+
+class PhiAccrualDetector:
+    """
+    Detector de fallos phi-accrual (Hayashibara et al.).
+    En vez de un timeout fijo, calcula phi = -log10(P(el siguiente heartbeat llegue aun mas
+    tarde)) suponiendo intervalos con distribucion normal ajustada a los observados.
+    phi 1 ~ 10% de probabilidad de equivocarse, phi 3 ~ 0.1%, phi 8 ~ 1e-8.
+    `acceptable_pause` y `min_std` hacen que una pausa de GC, del GIL o de la red de un par
+    de segundos no dispare la sospecha aunque los heartbeats lleguen muy regulares.
+    """
+
+    def __init__(self, window=100, min_std=0.25, acceptable_pause=2.0, first_interval=1.0):
+        self.window = window
+        self.min_std = min_std
+        self.acceptable_pause = acceptable_pause
+        self.first_interval = first_interval
+        self.histories = {}
+        self.lock = threading.Lock()
+
+    def heartbeat(self, node_id, now=None):
+        now = now or time.time()
+        with self.lock:
+            h = self.histories.get(node_id)
+            if h is None:
+                h = self.histories[node_id] = _History(self.window)
+                # Intervalo supuesto hasta tener medidas reales
+                h.add(self.first_interval)
+            elif h.last is not None:
+                h.add(now - h.last)
+            h.last = now
+
+    def phi(self, node_id, now=None):
+        """Sospecha sobre el nodo (0 = recien oido); None si nunca se ha oido"""
+        now = now or time.time()
+        with self.lock:
+            h = self.histories.get(node_id)
+            if h is None or h.last is None: return None
+            elapsed = now - h.last
+            mean = h.mean() + self.acceptable_pause
+            std = max(h.std(), self.min_std)
+
+        # P(X > elapsed) con X ~ N(mean, std), via la funcion de error complementaria
+        z = (elapsed - mean) / (std * math.sqrt(2))
+        p_later = 0.5 * math.erfc(z)
+        if p_later <= 1e-300: return 300.0
+        return -math.log10(p_later)
+
+    def remove(self, node_id):
+        with self.lock: self.histories.pop(node_id, None)
@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PeerHealth:
+    def __init__(self, ip):
+        self.ip = ip
+        self.alive = True           # optimista: un par recien descubierto se da por vivo
+        self.latency = None         # RTT medio en segundos (media movil)
+        self.failures = 0           # fallos consecutivos
+        self.last_ok = 0.0
+        self.last_fail = 0.0
+        self.last_seen = 0.0        # ultimo heartbeat de discovery
+        self.suspected = False      # discovery lo da por sospechoso o muerto (set_alive)
+
+    def info(self):
+        return {
+            'alive': self.alive and not self.suspected,
+            'suspected': self.suspected,
+            'latency_ms': round(self.latency * 1000, 2) if self.latency is not None else None,
+            'failures': self.failures,
+            'last_ok': self.last_ok,
+            'last_seen': self.last_seen,
+        }
+
+
+class HealthChecker:
+    """
+    Tabla de salud de los pares (vivo/caido y latencia), mantenida en segundo plano.
+    Se alimenta de los heartbeats de discovery, del resultado de cada peticion reenviada,
+    de un PING periodico a los pares de los que no se sabe nada reciente y de los cambios
+    de estado que notifica el detector de fallos (`set_alive`).
+    El reparto de trabajo solo consulta la tabla (`is_alive`), sin abrir conexiones.
+    """
+
+    def __init__(self, discovery, ping, interval=2.0, max_failures=2, probe_timeout=1.0):
+        self.discovery = discovery
+        self.ping = ping                    # ping(ip, timeout) -> True/False
+        self.interval = interval
+        self.max_failures = max_failures
+        self.probe_timeout = probe_timeout
+        self.peers = {}                     # ip -> PeerHealth
+        self.lock = threading.Lock()
+        self.running = False
+        self.probes = ThreadPoolExecutor(max_workers=8, thread_name_prefix='health')
+
+    def _peer(self, ip):
+        peer = self.peers.get(ip)
+        if peer is None:
+            peer = self.peers[ip] = PeerHealth(ip)
+        return peer
+
+    def heartbeat(self, ip, ts=None):
+        with self.lock:
+            peer = self._peer(ip)
+            peer.last_seen = max(peer.last_seen, ts or time.time())
+
+    def record(self, ip, ok, latency=None):
+        """Resultado de una peticion a `ip` (reenvio, PING...)"""
+        now = time.time()
+        with self.lock:
+            peer = self._peer(ip)
+            if ok:
+                if not peer.alive: print(f" [HEALTH] [OK] Nodo {ip} vuelve a responder")
+                peer.alive = True
+                peer.failures = 0
+                peer.last_ok = now
+                if latency is not None:
+                    peer.latency = latency if peer.latency is None else 0.7 * peer.latency + 0.3 * latency
+            else:
+                peer.failures += 1
+                peer.last_fail = now
+                if peer.alive and peer.failures >= self.max_failures:
+                    peer.alive = False
+                    print(f" [HEALTH] [ADVERTENCIA] Nodo {ip} marcado como caido")
+
+    def set_alive(self, ip, alive):
+        """
+        Veredicto externo (detector de fallos de discovery): se aplica al momento y, si es
+        sospechoso, dura hasta que discovery lo desmienta aunque el par conteste peticiones.
+        """
+        with self.lock:
+            peer = self._peer(ip)
+            peer.suspected = not alive
+            if alive:
+                peer.alive = True
+                peer.failures = 0
+
+    def is_alive(self, ip):
+        with self.lock:
+            peer = self.peers.get(ip)
+            return peer is None or (peer.alive and not peer.suspected)
+
+    def latency(self, ip):
+        with self.lock:
+            peer = self.peers.get(ip)
+            return peer.latency if peer else None
+
+    def snapshot(self):
+        with self.lock:
+            return {ip: p.info() for ip, p in self.peers.items()}
+
+    def _probe(self, ip):
+        t0 = time.time()
+        ok = self.ping(ip, self.probe_timeout)
+        self.record(ip, ok, time.time() - t0 if ok else None)
+
+    def _loop(self):
+        while self.running:
+            now = time.time()
+            try:
+                known = set()
+                # Los sospechosos siguen en la tabla con su veredicto: un par desconocido
+                # cuenta como vivo para is_alive
+                for info in self.discovery.get_peers(include_suspect=True).values():
+                    known.add(info['ip'])
+                    self.heartbeat(info['ip'], info.get('last_seen'))
+                # Los pares muertos u olvidados por discovery salen de la tabla (y dejan de sondearse)
+                with self.lock:
+                    for ip in [ip for ip in self.peers if ip not in known]: del self.peers[ip]
+            except Exception as e:
+                print(f" [HEALTH] [ERROR] Leyendo pares: {e}")
+
+            # Solo se sondean los pares sin noticias recientes (las peticiones ya informan)
+            with self.lock:
+                stale = [p.ip for p in self.peers.values()
+                         if now - max(p.last_ok, p.last_fail) >= self.interval]
+            for ip in stale:
+                self.probes.submit(self._probe, ip)
+            time.sleep(self.interval)
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self.probes.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,84 @@
+import base64
+import struct
+
+# Resumen binario del estado de un nodo que viaja en cada heartbeat (HB) y PING/ACK:
+#
+#   >B version | >H cores | >H workers | >H running | >H queue | >H cpu x10 |
+#   >I RAM libre (MB) | >f backlog (s) | >H mascara de tipos de tarea | >B n_hashes |
+#   n_hashes x 8 bytes (prefijo del sha256 de cada dataset en cache)
+#
+# Va en base64 dentro del JSON del mensaje: ~30 bytes mas 11 por dataset, frente a los
+# cientos de un diccionario JSON. Una version futura solo puede añadir campos al final.
+
+PROTOCOL_VERSION = 1
+
+# Orden fijo: el bit i de la mascara es TASK_TYPES[i]. Solo se añaden tipos al final.
+TASK_TYPES = ('ML_TRAIN', 'LOGISTIC', 'MLP_TRAIN', 'TREE_TRAIN', 'IMAGE_PROC')
+
+HASH_BYTES = 8
+MAX_HASHES = 32         # los datasets usados mas recientemente
+
+_HEAD = struct.Struct('>BHHHHHIfHB')
+
+# Campos que usa el scheduler para comparar nodos (ver scheduler/policies.py)
+LOAD_FIELDS = ('running', 'queue', 'workers', 'backlog', 'cpu')
+
+
+def _clamp(value, limit):
+    return max(0, min(int(value or 0), limit))
+
+
+def pack(summary):
+    """dict del nodo -> texto base64 para el mensaje de discovery"""
+    mask = 0
+    for t in summary.get('task_types', ()):
+        if t in TASK_TYPES: mask |= 1 << TASK_TYPES.index(t)
+    # El almacen los da del mas antiguo al mas reciente
+    hashes = list(summary.get('datasets', ()))[-MAX_HASHES:][::-1]
+    head = _HEAD.pack(PROTOCOL_VERSION,
+                      _clamp(summary.get('cores'), 0xFFFF),
+                      _clamp(summary.get('workers'), 0xFFFF),
+                      _clamp(summary.get('running'), 0xFFFF),
+                      _clamp(summary.get('queue'), 0xFFFF),
+                      _clamp((summary.get('cpu') or 0) * 10, 1000),
+                      _clamp(summary.get('ram_free_mb'), 0xFFFFFFFF),
+                      float(summary.get('backlog') or 0.0),
+                      mask, len(hashes))
+    body = b''.join(bytes.fromhex(h[:HASH_BYTES * 2]) for h in hashes)
+    return base64.b64encode(head + body).decode('ascii')
+
+
+def unpack(text):
+    """Texto base64 -> dict (None si no se puede leer)"""
+    try:
+        raw = base64.b64decode(text)
+        (version, cores, workers, running, queue, cpu, ram_free_mb, backlog,
+         mask, n_hashes) = _HEAD.unpack_from(raw)
+    except (ValueError, TypeError, struct.error):
+        return None
+
+    start = _HEAD.size
+    hashes = [raw[start + i * HASH_BYTES:start + (i + 1) * HASH_BYTES].hex()
+              for i in range(n_hashes)]
+    return {
+        'version': version,
+        'cores': cores,
+        'workers': workers,
+        'running': running,
+        'queue': queue,
+        'cpu': cpu / 10.0,
+        'ram_free_mb': ram_free_mb,
+        'backlog': round(backlog, 3),
+        'task_types': [t for i, t in enumerate(TASK_TYPES) if mask & (1 << i)],
+        'datasets': [h for h in hashes if len(h) == HASH_BYTES * 2],
+    }
+
+
+def load_of(summary):
+    """Parte del resumen que usa el scheduler"""
+    return {k: summary[k] for k in LOAD_FIELDS} if summary else None
+
+
+def has_dataset(summary, dataset_hash):
+    """True si el nodo anuncia tener en cache el dataset `dataset_hash` (sha256 completo)"""
+    return bool(summary) and dataset_hash[:HASH_BYTES * 2] in summary.get('datasets', ())
@@ -0,0 +1,329 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+class Chunk:
+    def __init__(self, start, end):
+        self.start = start      # primera linea (tambien sirve de orden del resultado)
+        self.end = end
+        self.result = None
+        self.done = False
+        self.started = None
+        self.copies = 0         # ejecuciones en curso (original + copia especulativa)
+        self.nodes = set()
+        self.hedged = False
+        self.attempts = []      # [{'node', 'status', 'seconds'}] de cada ejecucion
+        self.failed_on = set()
+        self.busy = 0           # rechazos por nodo saturado (no cuentan como intentos)
+
+    def report(self):
+        return {'lines': [self.start, self.end], 'status': 'success' if self.ok else 'failed',
+                'attempts': [dict(a) for a in self.attempts]}
+
+    @property
+    def ok(self):
+        return bool(self.result) and self.result.get('status') == 'success'
+
+    @property
+    def size(self):
+        return self.end - self.start
+
+
+class ChunkScheduler:
+    """
+    Reparto dinamico (work stealing) de un dataset en modo parallel.
+    Las lineas forman una cola compartida; cada nodo se lleva un lote de trozos
+    (uno por worker) cada vez que termina el anterior. El tamaño del trozo se adapta
+    al rendimiento observado del nodo (lineas/s por worker) para que cada lote dure
+    aprox. `target_seconds`: los nodos rapidos se llevan mas trabajo y la cola final se acorta.
+    Antes de medir, el primer lote de cada nodo es proporcional a su capacidad anunciada
+    (`capacity` del worker, p. ej. nucleos x (1 - uso de CPU)) o al rendimiento que tuvo en
+    jobs anteriores del mismo tipo (`throughput`), sin pasar de su parte proporcional.
+
+    Ejecucion especulativa: cuando la cola se vacia, un nodo ocioso lanza una copia de
+    cualquier trozo que lleve mas de `hedge_factor` x percentil `hedge_percentile` de las
+    latencias observadas. Gana el primer resultado valido: las copias que siguen en curso en
+    otros nodos se cancelan con `on_discard(ip, clave)` y su resultado, si llega, se descarta.
+
+    Reintentos: un trozo que falla vuelve a la cola (hasta `max_attempts` ejecuciones) y se
+    reasigna con preferencia a un nodo distinto de los que ya fallaron con el. Un nodo que no
+    responde deja de recibir trabajo; sus trozos pendientes se reparten entre los demas.
+    Un rechazo "busy" (nodo saturado) devuelve el trozo a la cola sin gastar un intento
+    (hasta `max_busy` veces) y el nodo espera un poco antes de pedir mas.
+
+    Con `fixed_chunks` (modelos que luego se promedian) no se adapta nada: un trozo por worker
+    del cluster, de al menos `model_min_lines` lineas. Un modelo entrenado con pocas filas
+    empeora el promedio, y unos limites que solo dependen del dataset y del numero de workers
+    se repiten entre jobs, asi la cache de resultados por trozo acierta. Un dataset pequeño
+    se reparte igualmente en un trozo por nodo (el minimo baja hasta lineas / nodos).
+
+    Con `on_result` cada resultado aceptado se entrega al momento (p. ej. para sumarlo a un
+    agregado) y el trozo guarda solo lo que devuelve el callback. `run(deadline)` corta el
+    job al vencer el plazo con los trozos terminados hasta entonces; `stop()` (job cancelado)
+    lo corta en cualquier momento.
+    """
+
+    def __init__(self, lines, workers, run_batch, target_seconds=2.0, min_lines=8,
+                 chunks_per_slot=4, hedge=True, hedge_percentile=0.9, hedge_factor=1.5,
+                 hedge_min_samples=3, max_attempts=3, max_busy=10, busy_backoff=0.5,
+                 throughput=None, on_result=None, fixed_chunks=False, model_min_lines=256,
+                 on_discard=None):
+        self.lines = lines
+        self.workers = workers          # [{'ip': ..., 'slots': n, 'capacity': c}]
+        self.run_batch = run_batch      # run_batch(ip, [contenido], [clave]) -> [resultado]
+        self.target_seconds = target_seconds
+        self.min_lines = min_lines
+        self.chunks_per_slot = chunks_per_slot
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_factor = hedge_factor
+        self.hedge_min_samples = hedge_min_samples
+        self.max_attempts = max_attempts
+        self.max_busy = max_busy
+        self.busy_backoff = busy_backoff
+        self.on_result = on_result      # on_result(resultado) -> lo que se conserva del trozo
+        self.on_discard = on_discard    # on_discard(ip, clave): cancelar la copia perdedora
+
+        # Primer trozo: lo bastante pequeño para que haya varios por worker, y mayor
+        # en los nodos con mas capacidad libre por worker
+        total_capacity = sum(w.get('capacity', w['slots']) for w in workers) or 1
+        per_capacity = len(lines) / (total_capacity * chunks_per_slot)
+        self.initial_lines = {
+            w['ip']: max(min_lines, math.ceil(w.get('capacity', w['slots']) / w['slots'] * per_capacity))
+            for w in workers
+        }
+        self.fixed_lines = None
+        self.tail_lines = min_lines
+        if fixed_chunks:
+            slots = sum(w['slots'] for w in workers) or 1
+            self.tail_lines = min(model_min_lines, math.ceil(len(lines) / max(1, len(workers))))
+            self.fixed_lines = max(self.tail_lines, math.ceil(len(lines) / slots))
+            # Trozos por lote de cada nodo: su parte, para que un nodo no se lleve los de otro
+            n_chunks = max(1, len(lines) // self.fixed_lines)
+            self.fixed_share = {w['ip']: max(1, n_chunks * w['slots'] // slots) for w in workers}
+
+        self.cursor = 0
+        self.chunks = []
+        self.latencies = []             # duracion de los lotes terminados con exito
+        self.hedges = 0
+        self.retries = deque()          # trozos fallidos pendientes de reasignar
+        self.throughput = dict(throughput or {})  # ip -> lineas/s por worker (media movil)
+        self.measured = set()           # nodos con rendimiento medido en este job
+        self.active = set()             # nodos que siguen pidiendo trabajo
+        self.stopped = False            # plazo vencido: no se reparte ni se acepta nada mas
+        self.cancelled = False          # stop(): igual que stopped, por cancelacion del job
+        self.cond = threading.Condition()
+
+    def _chunk_lines(self, ip):
+        if self.fixed_lines: return self.fixed_lines
+        initial = self.initial_lines.get(ip, self.min_lines)
+        rate = self.throughput.get(ip)
+        if rate is None: return initial
+        size = max(self.min_lines, int(rate * self.target_seconds))
+        # Un rendimiento de jobs anteriores no basta para llevarse mas que su parte del dataset
+        if ip not in self.measured: size = min(size, initial * self.chunks_per_slot)
+        return size
+
+    def _finished(self):
+        return self.cursor >= len(self.lines) and all(c.done for c in self.chunks)
+
+    def _start(self, chunk, ip):
+        chunk.copies += 1
+        chunk.nodes.add(ip)
+        if chunk.started is None: chunk.started = time.time()
+        attempt = {'node': ip, 'status': 'running', 'seconds': None}
+        chunk.attempts.append(attempt)
+        return chunk, attempt
+
+    def _next_batch(self, worker):
+        """Saca de la cola hasta un trozo por worker del nodo"""
+        batch = []
+        size = self._chunk_lines(worker['ip'])
+        limit = self.fixed_share[worker['ip']] if self.fixed_lines else worker['slots']
+        while len(batch) < min(worker['slots'], limit) and self.cursor < len(self.lines):
+            end = min(len(self.lines), self.cursor + size)
+            # No dejar un resto diminuto al final de la cola
+            if len(self.lines) - end < self.tail_lines: end = len(self.lines)
+            chunk = Chunk(self.cursor, end)
+            self.cursor = end
+            self.chunks.append(chunk)
+            batch.append(self._start(chunk, worker['ip']))
+        return batch
+
+    def _retry_batch(self, worker):
+        """Trozos fallidos que este nodo puede reintentar"""
+        ip = worker['ip']
+        batch = []
+        for chunk in list(self.retries):
+            if len(batch) >= worker['slots']: break
+            # Otro nodo vivo que no haya fallado con el trozo tiene preferencia
+            if ip in chunk.failed_on and not self.active <= chunk.failed_on: continue
+            self.retries.remove(chunk)
+            batch.append(self._start(chunk, ip))
+        if batch:
+            print(f" [CHUNKS] Reintentando {len(batch)} trozo(s) en {ip}")
+        return batch
+
+    def _hedge_threshold(self):
+        if len(self.latencies) < self.hedge_min_samples: return None
+        ordered = sorted(self.latencies)
+        p = ordered[int(self.hedge_percentile * (len(ordered) - 1))]
+        return p * self.hedge_factor
+
+    def _stragglers(self, worker):
+        """Copias especulativas de los trozos en curso que superan el umbral de latencia"""
+        if not self.hedge: return []
+        threshold = self._hedge_threshold()
+        if threshold is None: return []
+
+        now = time.time()
+        batch = []
+        for c in self.chunks:
+            if len(batch) >= worker['slots']: break
+            if c.done or c.hedged or c.copies == 0 or worker['ip'] in c.nodes: continue
+            if now - c.started > threshold:
+                c.hedged = True
+                batch.append(self._start(c, worker['ip']))
+        if batch:
+            self.hedges += len(batch)
+            print(f" [CHUNKS] Copia especulativa de {len(batch)} trozo(s) en {worker['ip']} "
+                  f"(umbral {threshold:.2f}s)")
+        return batch
+
+    def _take(self, worker):
+        """Siguiente lote para el nodo: trabajo nuevo, copias de rezagados, o None si ya no queda nada"""
+        with self.cond:
+            while True:
+                if self._finished() or self.stopped: return None
+                batch = (self._retry_batch(worker) or self._next_batch(worker)
+                         or self._stragglers(worker))
+                if batch: return batch
+                # Nada que hacer todavia: esperar a que algun trozo termine o se vuelva rezagado
+                self.cond.wait(0.1)
+
+    def _complete(self, ip, batch, results, elapsed):
+        ok = False
+        losers = []
+        with self.cond:
+            for (chunk, attempt), res in zip(batch, results):
+                chunk.copies -= 1
+                success = bool(res) and res.get('status') == 'success'
+                ok = ok or success
+                attempt['seconds'] = round(elapsed, 3)
+                if self.stopped:
+                    attempt['status'] = 'late'          # llego despues del plazo
+                    continue
+                if chunk.done:
+                    attempt['status'] = 'discarded'     # perdio la carrera
+                    continue
+                if success:
+                    attempt['status'] = 'success'
+                    chunk.result = self.on_result(res) if self.on_result else res
+                    chunk.done = True
+                    losers += [(a['node'], chunk.start) for a in chunk.attempts if a['status'] == 'running']
+                    continue
+
+                busy = bool(res) and res.get('status') == 'busy'
+                attempt['status'] = 'busy' if busy else 'error' if res else 'lost'
+                chunk.result = res
+                chunk.failed_on.add(ip)
+                if busy: chunk.busy += 1
+                if chunk.copies > 0: continue           # la otra copia aun puede terminar
+                if (len(chunk.attempts) - chunk.busy < self.max_attempts
+                        and chunk.busy <= self.max_busy):
+                    chunk.hedged = False
+                    chunk.started = None
+                    self.retries.append(chunk)
+                else:
+                    chunk.done = True
+                    print(f" [CHUNKS] [ERROR] Trozo {chunk.start}-{chunk.end} agoto sus intentos")
+            if ok:
+                self.latencies.append(elapsed)
+                lines = sum(c.size for c, _ in batch)
+                rate = lines / max(elapsed, 1e-3) / len(batch)
+                old = self.throughput.get(ip) if ip in self.measured else None
+                self.throughput[ip] = rate if old is None else 0.5 * old + 0.5 * rate
+                self.measured.add(ip)
+            self.cond.notify_all()
+        # Fuera del cerrojo: cancelar puede ser una peticion a otro nodo
+        if self.on_discard:
+            for node, key in losers: self.on_discard(node, key)
+        return any(r and r.get('status') == 'busy' for r in results)
+
+    def _puller(self, worker):
+        ip = worker['ip']
+        try:
+            while True:
+                batch = self._take(worker)
+                if batch is None: return
+
+                contents = ['\n'.join(self.lines[c.start:c.end]) for c, _ in batch]
+                t0 = time.time()
+                results = self.run_batch(ip, contents, [c.start for c, _ in batch])
+                busy = self._complete(ip, batch, results or [None] * len(batch), time.time() - t0)
+                if results is None:
+                    # Nodo caido: deja de pedir trabajo y sus trozos pasan a otros nodos
+                    print(f" [CHUNKS] [ADVERTENCIA] Nodo {ip} fallo, deja de recibir trozos")
+                    return
+                # Nodo saturado: dejar que otros se lleven los trozos devueltos
+                if busy: time.sleep(self.busy_backoff)
+        finally:
+            with self.cond:
+                self.active.discard(ip)
+                self.cond.notify_all()
+
+    def content(self, key):
+        """Lineas del trozo que empieza en `key` (la clave que recibe run_batch)"""
+        with self.cond:
+            chunk = next(c for c in self.chunks if c.start == key)
+        return '\n'.join(self.lines[chunk.start:chunk.end])
+
+    def report(self):
+        """Contabilidad de intentos por trozo (se añade a la respuesta del job)"""
+        with self.cond:
+            chunks = sorted(self.chunks, key=lambda c: c.start)
+            report = {
+                'chunks': len(chunks),
+                'chunks_retried': sum(1 for c in chunks if len(c.attempts) > 1),
+                'chunks_failed': sum(1 for c in chunks if not c.ok),
+                'chunk_attempts': [c.report() for c in chunks],
+            }
+            if self.stopped:
+                report.update(lines_total=len(self.lines),
+                              lines_processed=sum(c.size for c in chunks if c.ok))
+                report['cancelled' if self.cancelled else 'deadline_reached'] = True
+            return report
+
+    def stop(self):
+        """Job cancelado: no se reparten mas trozos y run() devuelve lo terminado hasta ahora"""
+        with self.cond:
+            self.stopped = self.cancelled = True
+            self.cond.notify_all()
+
+    def run(self, deadline=None):
+        """
+        Ejecuta todo el dataset y devuelve los resultados en el orden de las lineas.
+        Con `deadline` (segundos) devuelve lo terminado al vencer el plazo (None en el resto).
+        """
+        with self.cond:
+            self.active = {w['ip'] for w in self.workers}
+        for w in self.workers:
+            # daemon: el perdedor de una copia especulativa puede seguir corriendo sin bloquear el job
+            threading.Thread(target=self._puller, args=(w,), daemon=True).start()
+
+        end = time.time() + deadline if deadline else None
+        with self.cond:
+            while not self._finished() and self.active and not self.stopped:
+                if end is not None and time.time() >= end:
+                    self.stopped = True
+                    print(f" [CHUNKS] [ADVERTENCIA] Plazo de {deadline}s vencido: resultado parcial")
+                    break
+                self.cond.wait(0.5 if end is None else max(0.01, min(0.5, end - time.time())))
+            retried = sum(1 for c in self.chunks if len(c.attempts) > 1)
+
+        print(f" [CHUNKS] {len(self.chunks)} trozos repartidos ({self.hedges} copias especulativas, "
+              f"{retried} reintentados); rendimiento (lineas/s por worker): "
+              f"{ {ip: round(r, 1) for ip, r in self.throughput.items()} }")
+        return [c.result if c.ok else None for c in sorted(self.chunks, key=lambda c: c.start)]
@@ -0,0 +1,92 @@
+import math
+import threading
+
+# Epocas fijas de cada algoritmo (libs/)
+EPOCHS = {'ML_TRAIN': 1000, 'LOGISTIC': 200, 'MLP_TRAIN': 100}
+# Celdas vecinas que lee cada operacion de imagen por pixel
+KERNEL_SIZE = {'invert': 1, 'blur': 9, 'sharpen': 9, 'edge_detect': 12}
+# Segundos por unidad de coste de partida (se corrigen con los tiempos observados)
+DEFAULT_SECONDS_PER_UNIT = {
+    'ML_TRAIN': 2.5e-7,
+    'LOGISTIC': 5e-7,
+    'MLP_TRAIN': 6e-6,
+    'TREE_TRAIN': 2e-5,
+    'IMAGE_PROC': 3e-7,
+}
+
+
+def dataset_shape(content):
+    """(filas, columnas) de un CSV sin parsearlo entero: se ignoran las lineas de comentario"""
+    if not content: return 0, 0
+    rows = content.count('\n') + 1 - content.count('\n#') - content.startswith('#')
+    rows -= content.endswith('\n')
+    cols = 0
+    for line in content.split('\n', 64):
+        if line.strip() and not line.startswith('#'):
+            cols = line.count(',') + 1
+            break
+    return max(rows, 0), cols
+
+
+def _param(data, key, default):
+    """Parametro numerico de la tarea; ausente, null o no numerico cuenta como `default`"""
+    try:
+        return float(data.get(key) or default)
+    except (TypeError, ValueError):
+        return default
+
+
+class CostModel:
+    """
+    Estima el coste de una tarea antes de ejecutarla:
+      - linear / logistic / MLP: filas x features x epocas
+      - arbol: filas x features x log(filas) x profundidad
+      - imagen: pixeles x tamaño del kernel
+    Las unidades se convierten a segundos con un factor por tipo de tarea que se ajusta
+    (media movil) con los tiempos reales de cada ejecucion en este nodo.
+    """
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.seconds_per_unit = dict(DEFAULT_SECONDS_PER_UNIT)
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def units(self, task_type, data):
+        if task_type not in self.seconds_per_unit: return None
+        rows, cols = dataset_shape((data or {}).get('file_content'))
+        if not rows: return None
+        features = max(1, cols - 1)
+
+        if task_type in EPOCHS:
+            return rows * features * _param(data, 'epochs', EPOCHS[task_type])
+        if task_type == 'TREE_TRAIN':
+            return rows * features * math.log2(rows + 1) * _param(data, 'max_depth', 5)
+        if task_type == 'IMAGE_PROC':
+            return rows * cols * KERNEL_SIZE.get(data.get('operation', 'invert'), 9)
+        return None
+
+    def seconds(self, task_type, units):
+        if units is None: return None
+        with self.lock:
+            return units * self.seconds_per_unit[task_type]
+
+    def estimate(self, task_type, data):
+        """Segundos estimados de la tarea, o None si no se puede estimar"""
+        return self.seconds(task_type, self.units(task_type, data))
+
+    def observe(self, task_type, units, elapsed):
+        """Calibra el factor del tipo de tarea con una ejecucion real"""
+        if not units or task_type not in self.seconds_per_unit: return
+        rate = elapsed / units
+        with self.lock:
+            n = self.samples.get(task_type, 0)
+            old = self.seconds_per_unit[task_type]
+            # La primera medida sustituye al valor por defecto
+            self.seconds_per_unit[task_type] = rate if n == 0 else (1 - self.alpha) * old + self.alpha * rate
+            self.samples[task_type] = n + 1
+
+    def stats(self):
+        with self.lock:
+            return {t: {'seconds_per_unit': r, 'samples': self.samples.get(t, 0)}
+                    for t, r in self.seconds_per_unit.items()}
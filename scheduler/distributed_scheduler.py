@@ -1,33 +1,106 @@
-import random
+import threading
 import time
+from scheduler.policies import make_policy, load_score, expected_wait
 
 class DistributedScheduler:
-    def __init__(self, node_id, discovery):
+    """
+    Decide que nodo ejecuta cada tarea en modo single.
+    Los pares anuncian su carga (cola, tareas en curso, CPU) en el heartbeat de discovery;
+    la politica (random, round_robin, least_loaded, p2c) se elige al arrancar.
+    Si se conoce el coste estimado de la tarea, los nodos se comparan por la espera prevista
+    (segundos de trabajo pendiente por worker) y se descartan los que superarian `max_wait`;
+    si todos estan saturados la tarea se encola en el propio nodo.
+    """
+
+    # Pasado este tiempo la carga anunciada por un par no se tiene en cuenta
+    LOAD_TTL = 10
+    # Segundos que se evita un nodo que ha respondido "busy"
+    BUSY_COOLDOWN = 5
+
+    def __init__(self, node_id, discovery, policy='p2c', max_wait=120.0):
         self.node_id = node_id
         self.discovery = discovery
+        self.policy = make_policy(policy)
+        self.max_wait = max_wait
+        self.local_load = None      # callable -> carga del propio nodo
+        self.health = None          # HealthChecker: descarta pares caidos
+        # Tareas (y segundos estimados) que este nodo ha enviado a cada par y aun no han vuelto
+        self.inflight = {}
+        self.inflight_cost = {}
+        self.busy_until = {}
+        self.lock = threading.Lock()
+        print(f" [SCHEDULER] Politica de reparto: {self.policy.name}")
+
+    def _candidates(self, exclude=()):
+        now = time.time()
+        peers = []
+        for info in self.discovery.get_peers().values():
+            ip = info['ip']
+            if ip in exclude or self.busy_until.get(ip, 0) > now: continue
+            if self.health and not self.health.is_alive(ip): continue
+            load = info.get('load')
+            if load and now - info.get('last_seen', now) > self.LOAD_TTL: load = None
+            if load is not None:
+                # La carga anunciada no incluye lo que acabamos de enviarle
+                with self.lock:
+                    load = dict(load, inflight=self.inflight.get(ip, 0),
+                                inflight_cost=self.inflight_cost.get(ip, 0.0))
+            peers.append({'ip': ip, 'load': load})
+        local = None
+        if 'local' not in exclude:
+            local = {'ip': 'local', 'load': self.local_load() if self.local_load else None}
+        return local, peers
+
+    def decide_node(self, cost=None, exclude=()):
+        """IP del nodo elegido, 'local', o None si todos los candidatos estan excluidos"""
+        local, peers = self._candidates(exclude)
 
-    def decide_node(self):
-        # Obtener pares
-        peers = self.discovery.get_peers()
-        
         # --- DEBUG PRINT ---
         # Esto saldrá en los logs de docker y nos dirá la verdad
-        print(f" [DEBUG SCHEDULER] Veo {len(peers)} amigos: {list(peers.keys())}")
+        print(f" [DEBUG SCHEDULER] Veo {len(peers)} amigos: {[p['ip'] for p in peers]}")
         # -------------------
 
         # Si no hay nadie, local
         if not peers:
+            if local is None: return None
             print(" [DEBUG] [ERROR] Nadie disponible, me toca a mi (Local)")
             return "local"
-        
-        candidates = list(peers.values())
-        
-        # Forzamos un poco más la distribución (80% probabilidad de enviar fuera para probar)
-        if random.random() < 0.2: 
-            print(" [DEBUG] Decision aleatoria: Lo hago yo (Local)")
-            return "local"
-            
-        chosen_peer = random.choice(candidates)
-        target_ip = chosen_peer['ip']
-        print(f" [DEBUG] [INICIANDO] ENVIANDO TAREA A: {target_ip}")
+
+        candidates = ([local] if local else []) + peers
+        score = load_score
+        if cost is not None:
+            def score(c):
+                wait = expected_wait(c.get('load'), cost)
+                # Sin datos de carga: tan ocupado como el umbral a la mitad
+                return self.max_wait / 2 if wait is None else wait
+
+            fits = [c for c in candidates if score(c) + cost <= self.max_wait]
+            if not fits:
+                if local is None: return None
+                print(f" [DEBUG] Todos los nodos saturados (tarea de ~{cost:.1f}s): se encola en local")
+                return "local"
+            candidates = fits
+
+        # Si el propio nodo quedo fuera (saturado o ya rechazo la tarea) compiten solo los pares
+        head = local if local in candidates else candidates[0]
+        chosen = self.policy.choose(head, [c for c in candidates if c is not head], score)
+        target_ip = chosen['ip']
+        if target_ip == 'local':
+            print(f" [DEBUG] Decision ({self.policy.name}): Lo hago yo (Local)")
+        else:
+            print(f" [DEBUG] [INICIANDO] ENVIANDO TAREA A: {target_ip} ({self.policy.name})")
         return target_ip
+
+    def mark_busy(self, ip):
+        if ip == 'local': return
+        with self.lock: self.busy_until[ip] = time.time() + self.BUSY_COOLDOWN
+
+    def task_started(self, ip, cost=None):
+        with self.lock:
+            self.inflight[ip] = self.inflight.get(ip, 0) + 1
+            self.inflight_cost[ip] = self.inflight_cost.get(ip, 0.0) + (cost or 0.0)
+
+    def task_finished(self, ip, cost=None):
+        with self.lock:
+            self.inflight[ip] = max(0, self.inflight.get(ip, 0) - 1)
+            self.inflight_cost[ip] = max(0.0, self.inflight_cost.get(ip, 0.0) - (cost or 0.0))
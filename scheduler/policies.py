@@ -0,0 +1,71 @@
+import itertools
+import random
+
+
+def load_score(candidate):
+    """Carga normalizada de un nodo: tareas (en cola + corriendo) por worker, mas el uso de CPU"""
+    load = candidate.get('load')
+    if not load: return 1.0     # sin datos: ni el mejor ni el peor candidato
+    workers = max(1, load.get('workers', 1))
+    tasks = load.get('queue', 0) + load.get('running', 0) + load.get('inflight', 0)
+    return tasks / workers + load.get('cpu', 0) / 100.0
+
+
+def expected_wait(load, cost):
+    """Segundos que esperaria una tarea de coste `cost` en el nodo (trabajo pendiente / workers)"""
+    if not load: return None
+    workers = max(1, load.get('workers', 1))
+    backlog = load.get('backlog')
+    if backlog is None:
+        # Nodo sin modelo de coste: se supone que lo pendiente cuesta como esta tarea
+        backlog = (load.get('queue', 0) + load.get('running', 0)) * cost
+    backlog += load.get('inflight_cost', load.get('inflight', 0) * cost)
+    return backlog / workers
+
+
+class RandomPolicy:
+    """Comportamiento original: 20% local, el resto a un par al azar"""
+    name = 'random'
+
+    def choose(self, local, peers, score=load_score):
+        if not peers or random.random() < 0.2: return local
+        return random.choice(peers)
+
+
+class RoundRobinPolicy:
+    name = 'round_robin'
+
+    def __init__(self):
+        self.counter = itertools.count()
+
+    def choose(self, local, peers, score=load_score):
+        candidates = [local] + sorted(peers, key=lambda c: c['ip'])
+        return candidates[next(self.counter) % len(candidates)]
+
+
+class LeastLoadedPolicy:
+    name = 'least_loaded'
+
+    def choose(self, local, peers, score=load_score):
+        # En empate gana el propio nodo (no hay que mover los datos)
+        return min([local] + peers, key=score)
+
+
+class PowerOfTwoPolicy:
+    """Power of two choices: el menos cargado de dos candidatos al azar (incluido el propio nodo)"""
+    name = 'p2c'
+
+    def choose(self, local, peers, score=load_score):
+        candidates = [local] + peers
+        if len(candidates) == 1: return local
+        a, b = random.sample(candidates, 2)
+        return a if score(a) <= score(b) else b
+
+
+POLICIES = {p.name: p for p in (RandomPolicy, RoundRobinPolicy, LeastLoadedPolicy, PowerOfTwoPolicy)}
+
+
+def make_policy(name):
+    if name not in POLICIES:
+        raise ValueError(f"Politica desconocida: {name} (disponibles: {', '.join(POLICIES)})")
+    return POLICIES[name]()
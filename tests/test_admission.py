@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+from api.admission import AdmissionController, Busy, busy_response, is_busy
+
+
+def start(admission, task_type, cost=None):
+    """Encola una tarea en otro hilo; devuelve el evento que se activa cuando arranca"""
+    started = threading.Event()
+
+    def run():
+        admission.acquire(task_type, cost)
+        started.set()
+    threading.Thread(target=run, daemon=True).start()
+    return started
+
+
+def wait_queue(admission, n):
+    while admission.load()['queue'] < n: time.sleep(0.005)
+
+
+def test_full_queue_rejects_with_busy():
+    admission = AdmissionController(1, max_queue=1)
+    admission.acquire('ML_TRAIN')
+    start(admission, 'ML_TRAIN')
+    wait_queue(admission, 1)
+    with pytest.raises(Busy, match='en cola'):
+        admission.acquire('ML_TRAIN')
+    assert admission.stats()['rejected'] == 1
+
+
+def test_pending_work_over_max_wait_rejects():
+    admission = AdmissionController(2, max_wait=10)
+    admission.acquire('ML_TRAIN', cost=15)
+    admission.acquire('ML_TRAIN', cost=15)
+    # 30 s pendientes entre 2 workers: 15 s > max_wait
+    with pytest.raises(Busy, match='pendiente'):
+        admission.acquire('ML_TRAIN', cost=1)
+    admission.release('ML_TRAIN', cost=15)
+    admission.release('ML_TRAIN', cost=15)
+    assert admission.acquire('ML_TRAIN', cost=1) < 0.1
+
+
+def test_waiting_tasks_start_in_arrival_order():
+    admission = AdmissionController(1)
+    admission.acquire('A')
+    first = start(admission, 'A')
+    wait_queue(admission, 1)
+    second = start(admission, 'A')
+    wait_queue(admission, 2)
+    admission.release('A')
+    assert first.wait(1) and not second.wait(0.1)
+    admission.release('A')
+    assert second.wait(1)
+    assert admission.stats()['admitted'] == 3
+
+
+def test_type_at_its_limit_does_not_block_others():
+    admission = AdmissionController(2, limits={'MLP_TRAIN': 1})
+    admission.acquire('MLP_TRAIN')
+    blocked = start(admission, 'MLP_TRAIN')
+    wait_queue(admission, 1)
+    admission.acquire('LOGISTIC', wait=False)           # el MLP en cola no puede pasar antes
+    assert not blocked.is_set()
+    assert admission.load() == {'running': 2, 'queue': 1, 'workers': 2, 'backlog': 0.0}
+
+
+def test_busy_response_is_recognised():
+    reply = busy_response('n2', 'sin worker libre')
+    assert is_busy(reply) and reply['node'] == 'n2'
+    assert not is_busy({'status': 'success'}) and not is_busy(None)
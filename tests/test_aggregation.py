@@ -0,0 +1,143 @@
+import random
+import pytest
+from api import aggregation
+
+NUMPY = aggregation.np
+
+
+@pytest.fixture(params=['numpy', 'listas'])
+def backend(request, monkeypatch):
+    """Cada prueba corre con NumPy y con el camino de listas puras"""
+    if request.param == 'numpy':
+        if NUMPY is None: pytest.skip('NumPy no instalado')
+        monkeypatch.setattr(aggregation, 'np', NUMPY)
+    else:
+        monkeypatch.setattr(aggregation, 'np', None)
+    return request.param
+
+
+def model(task_type, rng, n_samples=None, outputs=3):
+    r = {'status': 'success', 'executed_by': f'n{rng.randint(1, 3)}'}
+    if task_type == 'MLP_TRAIN':
+        r.update(input_to_hidden_w=[[rng.random() for _ in range(5)] for _ in range(4)],
+                 hidden_bias=[rng.random() for _ in range(5)],
+                 hidden_to_output_w=[[rng.random() for _ in range(outputs)] for _ in range(5)],
+                 output_bias=[rng.random() for _ in range(outputs)],
+                 final_loss=rng.random())
+    else:
+        r.update(weights=[rng.random() for _ in range(4)], bias=rng.random(), mse=rng.random())
+        if task_type == 'LOGISTIC':
+            r['loss'] = rng.random()
+            if rng.random() < 0.7: r['accuracy'] = rng.random()
+    if n_samples: r['n_samples'] = n_samples
+    return r
+
+
+def baseline(results, task_type):
+    """Promedio con bucles como la agregacion original, ponderado por n_samples"""
+    weights = [r.get('n_samples') or 1 for r in results]
+    total = float(sum(weights))
+
+    def mean(field):
+        values = [r.get(field, 0) for r in results]
+        if isinstance(values[0], list) and isinstance(values[0][0], list):
+            return [[sum(w * v[i][j] for w, v in zip(weights, values)) / total
+                     for j in range(len(values[0][0]))] for i in range(len(values[0]))]
+        if isinstance(values[0], list):
+            return [sum(w * v[i] for w, v in zip(weights, values)) / total for i in range(len(values[0]))]
+        return sum(w * v for w, v in zip(weights, values)) / total
+    return {f: mean(f) for f in aggregation.FIELDS[task_type]}
+
+
+def assert_close(a, b):
+    if isinstance(a, list):
+        assert len(a) == len(b)
+        for x, y in zip(a, b): assert_close(x, y)
+    else:
+        assert abs(a - b) < 1e-9
+
+
+@pytest.mark.parametrize('task_type', aggregation.REDUCIBLE)
+@pytest.mark.parametrize('weighted', [False, True])
+def test_matches_baseline_in_any_grouping(backend, task_type, weighted):
+    rng = random.Random(7)
+    results = [model(task_type, rng, rng.randint(5, 50) if weighted else None) for _ in range(13)]
+    expected = baseline(results, task_type)
+
+    one = aggregation.partial(task_type, results)
+    split = aggregation.merge([aggregation.partial(task_type, results[:5]),
+                               aggregation.partial(task_type, results[5:6]),
+                               aggregation.merge([aggregation.partial(task_type, results[6:]), None])])
+    stream = aggregation.StreamingAggregator(task_type)
+    for r in reversed(results): stream.add(r)
+
+    for p in (one, split, stream.total):
+        avg = aggregation.average(p)
+        for f in aggregation.FIELDS[task_type]: assert_close(avg[f], expected[f])
+        assert p['count'] == 13
+
+
+def test_finalize_keeps_response_format(backend):
+    rng = random.Random(1)
+    results = [model('LOGISTIC', rng) for _ in range(3)]
+    final = aggregation.finalize(aggregation.partial('LOGISTIC', results))
+    assert final['distribution_mode'] == 'FEDERATED_AVG'
+    assert final['nodes_count'] == 3 and len(final['nodes_involved']) == 3
+    assert isinstance(final['final_weights'], list) and isinstance(final['final_bias'], float)
+    assert aggregation.finalize(None)['status'] == 'error'
+
+
+def test_ragged_mlp_outputs_average_only_where_present(backend):
+    def mlp(outputs, value, n):
+        return {'status': 'success', 'executed_by': 'x', 'n_samples': n,
+                'input_to_hidden_w': [[value] * 5] * 4, 'hidden_bias': [value] * 5,
+                'hidden_to_output_w': [[value] * outputs for _ in range(5)],
+                'output_bias': [value] * outputs, 'final_loss': value}
+    a, b, c = mlp(3, 1.0, 10), mlp(2, 4.0, 30), mlp(3, 7.0, 20)
+    # Salidas 0 y 1: (10*1 + 30*4 + 20*7) / 60; salida 2 solo en a y c: (10*1 + 20*7) / 30
+    expected = [4.5, 4.5, 5.0]
+
+    stream = aggregation.StreamingAggregator('MLP_TRAIN')
+    for r in (b, a, c): stream.add(r)
+    for p in (aggregation.partial('MLP_TRAIN', [a, b, c]),
+              aggregation.merge([aggregation.partial('MLP_TRAIN', [b]), aggregation.partial('MLP_TRAIN', [a, c])]),
+              aggregation.merge([aggregation.partial('MLP_TRAIN', [r]) for r in (a, b, c)]),
+              stream.total):
+        model_ = aggregation.finalize(p)['global_model']
+        assert_close(model_['output_bias'], expected)
+        assert_close(model_['hidden_to_output_weights'][0], expected)
+
+
+def test_pad_same_in_both_backends(monkeypatch):
+    flat = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    monkeypatch.setattr(aggregation, 'np', None)
+    plain = aggregation._pad(flat, [2, 3], [3, 4])
+    assert plain == [1, 2, 3, 0, 4, 5, 6, 0, 0, 0, 0, 0]
+    if NUMPY is not None:
+        monkeypatch.setattr(aggregation, 'np', NUMPY)
+        assert aggregation._pad(flat, [2, 3], [3, 4]).tolist() == plain
+
+
+def test_partials_from_other_backend_merge(monkeypatch):
+    """Un parcial llega de otro nodo como listas aunque aqui haya NumPy (y al reves)"""
+    rng = random.Random(3)
+    results = [model('MLP_TRAIN', rng, outputs=2 + i % 2) for i in range(4)]
+    monkeypatch.setattr(aggregation, 'np', None)
+    remote = aggregation.partial('MLP_TRAIN', results[:2])
+    if NUMPY is not None: monkeypatch.setattr(aggregation, 'np', NUMPY)
+    local = aggregation.partial('MLP_TRAIN', results[2:])
+    avg = aggregation.average(aggregation.merge([local, remote]))
+    assert_close(avg['output_bias'][:2], baseline(results, 'MLP_TRAIN')['output_bias'][:2])
+
+
+def test_reduce_tree_covers_every_key():
+    holders = {f'10.0.0.{i}': [i * 10, i * 10 + 1] for i in range(11)}
+    trees = aggregation.build_tree(holders, fanout=3)
+    assert len(trees) == 3
+
+    def fan(tree):
+        assert len(tree['children']) <= 3
+        for child in tree['children']: fan(child)
+    for t in trees: fan(t)
+    keys = sorted(k for t in trees for k in aggregation.subtree_keys(t))
+    assert keys == sorted(k for ks in holders.values() for k in ks)
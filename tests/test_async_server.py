@@ -0,0 +1,79 @@
+import socket
+import threading
+import time
+import pytest
+from api.async_server import AsyncServer, Deferred
+from api.protocol import CODEC_BINARY, recv_msg, send_msg
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def ask(port, msg, codec='json'):
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as s:
+        send_msg(s, msg, codec)
+        return recv_msg(s)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(handler, **kw):
+        server = AsyncServer(handler, free_port(), **kw)
+        server.start()
+        servers.append(server)
+        return server.port
+    yield start
+    for server in servers: server.stop()
+
+
+def test_classic_request_and_binary_reply(serve):
+    port = serve(lambda msg: {'status': 'success', 'sum': sum(msg['data'])})
+    assert ask(port, {'type': 'X', 'data': [1, 2, 3]}) == {'status': 'success', 'sum': 6}
+    values = [float(i) for i in range(16)]
+    # El servidor responde con el codec que uso el cliente
+    assert ask(port, {'type': 'X', 'data': values}, CODEC_BINARY)['sum'] == sum(values)
+
+
+def test_handler_error_becomes_error_reply(serve):
+    def handler(msg): raise RuntimeError('sin datos')
+    port = serve(handler)
+    assert ask(port, {'type': 'X'}) == {'status': 'error', 'msg': 'sin datos'}
+
+
+def test_deferred_waits_without_holding_a_worker(serve):
+    pending = []
+
+    def handler(msg):
+        if msg['type'] == 'WAIT':
+            deferred = Deferred(5, lambda: {'status': 'expired'})
+            pending.append(deferred)
+            return deferred
+        return {'status': 'success'}
+    port = serve(handler, max_workers=1)
+
+    replies = []
+    waiters = [threading.Thread(target=lambda: replies.append(ask(port, {'type': 'WAIT'}))) for _ in range(3)]
+    for t in waiters: t.start()
+    while len(pending) < 3: time.sleep(0.01)
+    # Tres esperas en curso y un unico hilo: el servidor sigue atendiendo
+    assert ask(port, {'type': 'PING'}) == {'status': 'success'}
+    for i, deferred in enumerate(pending): deferred.future.set_result({'status': 'done', 'i': i})
+    for t in waiters: t.join(5)
+    assert sorted(r['i'] for r in replies) == [0, 1, 2]
+
+
+def test_deferred_expires_with_fallback(serve):
+    port = serve(lambda msg: Deferred(0.1, lambda: {'status': 'timeout'}))
+    assert ask(port, {'type': 'WAIT'}) == {'status': 'timeout'}
+
+
+def test_deferred_result_blocks_outside_the_server():
+    deferred = Deferred(5, lambda: {'status': 'timeout'})
+    threading.Timer(0.05, deferred.future.set_result, [{'status': 'done'}]).start()
+    assert deferred.result() == {'status': 'done'}
+    assert Deferred(0.05, lambda: {'status': 'timeout'}).result() == {'status': 'timeout'}
@@ -0,0 +1,89 @@
+import array
+import json
+import random
+import pytest
+from api import binary_codec
+from api.protocol import CODEC_BINARY, decode_body, encode_body
+
+NUMPY = binary_codec.np
+
+
+@pytest.fixture(params=['numpy', 'listas'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if NUMPY is None: pytest.skip('NumPy no instalado')
+    else:
+        monkeypatch.setattr(binary_codec, 'np', None)
+        monkeypatch.setattr(binary_codec, '_ROW_TYPES', (list, array.array))
+    return request.param
+
+
+def message():
+    rng = random.Random(5)
+    return {
+        'status': 'success',
+        'input_to_hidden_w': [[rng.random() for _ in range(5)] for _ in range(4)],
+        'hidden_bias': [0.0] * 9,
+        'processed_matrix': [[rng.randint(0, 255) for _ in range(8)] for _ in range(32)],
+        'ints': [-5, 3, 100000, 2, 3, 4, 5, 6, 7],
+        'big': [2 ** 40] + [1] * 8,
+        'file_content': 'ñ,1,2\n' * 400,
+        'tree': {'type': 'leaf', 'class': 1},
+        'short': [1, 2],
+        'ragged': [[1.0, 2.0], [3.0]] * 5,
+        'mixed': [1, 'a', None, 2.5, 3, 4, 5, 6],
+    }
+
+
+def test_round_trip_equals_json(backend):
+    msg = message()
+    data = encode_body(msg, CODEC_BINARY)
+    assert binary_codec.is_binary(data)
+    back = json.loads(encode_body(decode_body(data)).decode())
+    assert back == msg
+
+
+def test_binary_is_smaller_for_numeric_payloads(backend):
+    msg = message()
+    assert len(encode_body(msg, CODEC_BINARY)) < len(encode_body(msg))
+
+
+def test_arrays_survive_reencoding(backend):
+    """Un nodo reenvia lo que recibio (ndarray o array.array) sin pasar por listas"""
+    msg = message()
+    once = binary_codec.decode(binary_codec.encode(msg))
+    twice = binary_codec.decode(binary_codec.encode(once))
+    assert json.loads(json.dumps(twice, default=binary_codec.to_builtin)) == msg
+
+
+def test_json_body_still_decodes():
+    msg = {'type': 'PING', 'data': [1, 2, 3]}
+    assert decode_body(encode_body(msg)) == msg
+
+
+def test_large_integers_are_exact(backend):
+    msg = {'ids': [2 ** 62, -2 ** 62, 2 ** 53 + 1, 7, 8, 9, 10, 11],
+           'huge': [2 ** 70] + [1] * 8,
+           'mixed': [0.5, 2 ** 60, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]}
+    back = binary_codec.decode(binary_codec.encode(msg))
+    assert [int(v) for v in back['ids']] == msg['ids']
+    assert back['huge'] == msg['huge'] and back['mixed'] == msg['mixed']
+    assert all(type(v) is int for v in back['mixed'][1:2])
+
+
+def test_small_integer_lists_do_not_wrap(backend):
+    back = binary_codec.decode(binary_codec.encode({'v': [200] * 9, 'neg': [-1, 0, 1, 2, 3, 4, 5, 6]}))
+    assert [v * 2 for v in back['v']] == [400] * 9
+    assert [v - 10 for v in back['neg']] == [-11, -10, -9, -8, -7, -6, -5, -4]
+    if backend == 'numpy': assert back['v'].dtype == NUMPY.int64
+
+
+def test_numpy_dtypes_keep_their_values():
+    if NUMPY is None: pytest.skip('NumPy no instalado')
+    msg = {'pixels': NUMPY.arange(16, dtype=NUMPY.uint8),
+           'wide': NUMPY.array([2 ** 60, 3, 4, 5, 6, 7, 8, 9], dtype=NUMPY.int64),
+           'short': NUMPY.array([-3, 1, 2, 3, 4, 5, 6, 7], dtype=NUMPY.int16)}
+    back = binary_codec.decode(binary_codec.encode(msg))
+    assert back['pixels'].dtype == NUMPY.uint8
+    assert back['wide'].tolist() == msg['wide'].tolist()
+    assert back['short'].tolist() == msg['short'].tolist()
@@ -0,0 +1,199 @@
+import threading
+import time
+from libs.preprocessing import data_lines
+from scheduler.chunk_scheduler import ChunkScheduler
+
+
+def echo(ip, contents, keys):
+    return [{'status': 'success', 'rows': len(c.split('\n'))} for c in contents]
+
+
+def workers(*slots):
+    return [{'ip': f'10.0.0.{i + 1}', 'slots': s} for i, s in enumerate(slots)]
+
+
+def bounds(scheduler):
+    return sorted((c.start, c.end) for c in scheduler.chunks)
+
+
+def test_data_lines_skip_comments_and_blanks():
+    content = '# cabecera\n# formato: x,y\n\n1,2\n  # otro\n3,4\n'
+    assert data_lines(content) == ['1,2', '3,4']
+
+
+def test_comment_header_never_forms_a_chunk():
+    content = '\n'.join(['# comentario'] * 8 + [f'{i},{i}' for i in range(40)])
+    scheduler = ChunkScheduler(data_lines(content), workers(2), echo, hedge=False)
+    results = scheduler.run()
+    assert all(r and r['status'] == 'success' for r in results)
+    assert sum(r['rows'] for r in results) == 40
+    assert scheduler.report()['chunks_failed'] == 0
+
+
+def test_fixed_chunks_one_per_slot_with_minimum():
+    lines = [f'{i},{i}' for i in range(1000)]
+    scheduler = ChunkScheduler(lines, workers(2, 2), echo, fixed_chunks=True, model_min_lines=100)
+    scheduler.run()
+    assert bounds(scheduler) == [(0, 250), (250, 500), (500, 750), (750, 1000)]
+
+    # Por debajo de minimo x nodos: un trozo por nodo
+    small = ChunkScheduler(lines[:300], workers(2, 2), echo, fixed_chunks=True, model_min_lines=256)
+    small.run()
+    assert bounds(small) == [(0, 150), (150, 300)]
+
+
+def test_shipped_datasets_still_spread_over_nodes():
+    for name in ('regresion.txt', 'clasificacion.txt', 'red_neuronal.txt'):
+        with open(f'mis_datos/{name}') as f:
+            lines = data_lines(f.read())
+        # Entrenar un trozo lleva tiempo: ningun nodo vuelve a pedir antes de que empiecen todos
+        scheduler = ChunkScheduler(lines, workers(2, 2), lambda *a: time.sleep(0.05) or echo(*a),
+                                   fixed_chunks=True)
+        scheduler.run()
+        nodes = {a['node'] for c in scheduler.report()['chunk_attempts'] for a in c['attempts']}
+        assert len(scheduler.chunks) >= 2 and nodes == {'10.0.0.1', '10.0.0.2'}
+
+
+def test_fixed_chunks_ignore_measured_throughput():
+    lines = [f'{i},{i}' for i in range(1000)]
+    cuts = []
+    for throughput in (None, {'10.0.0.1': 5.0, '10.0.0.2': 900.0}):
+        scheduler = ChunkScheduler(lines, workers(2, 2), echo, fixed_chunks=True,
+                                   model_min_lines=100, throughput=throughput)
+        scheduler.run()
+        cuts.append(bounds(scheduler))
+    assert cuts[0] == cuts[1]
+
+
+def test_failed_chunk_is_retried_on_another_node():
+    calls = []
+
+    def run_batch(ip, contents, keys):
+        calls.append((ip, tuple(keys)))
+        if ip == '10.0.0.1': return [{'status': 'error', 'msg': 'fallo'} for _ in contents]
+        return echo(ip, contents, keys)
+
+    scheduler = ChunkScheduler([f'{i},{i}' for i in range(40)], workers(1, 1), run_batch, hedge=False)
+    results = scheduler.run()
+    report = scheduler.report()
+    assert all(r and r['status'] == 'success' for r in results)
+    assert report['chunks_failed'] == 0 and report['chunks_retried'] >= 1
+    for chunk in report['chunk_attempts']:
+        assert chunk['attempts'][-1]['node'] == '10.0.0.2'
+
+
+def test_chunk_gives_up_after_max_attempts():
+    def run_batch(ip, contents, keys):
+        return [{'status': 'error', 'msg': 'fallo'} for _ in contents]
+
+    scheduler = ChunkScheduler([f'{i},{i}' for i in range(16)], workers(1, 1), run_batch,
+                               hedge=False, max_attempts=3)
+    results = scheduler.run()
+    report = scheduler.report()
+    assert results == [None] * len(results)
+    assert report['chunks_failed'] == report['chunks']
+    assert all(len(c['attempts']) == 3 for c in report['chunk_attempts'])
+
+
+def test_lost_node_stops_receiving_chunks():
+    def run_batch(ip, contents, keys):
+        if ip == '10.0.0.1': return None            # nodo caido
+        return echo(ip, contents, keys)
+
+    scheduler = ChunkScheduler([f'{i},{i}' for i in range(40)], workers(1, 1), run_batch, hedge=False)
+    results = scheduler.run()
+    assert all(r and r['status'] == 'success' for r in results)
+    lost = [a for c in scheduler.report()['chunk_attempts'] for a in c['attempts'] if a['status'] == 'lost']
+    assert len(lost) == 1
+
+
+def test_busy_does_not_spend_attempts():
+    rejected = set()
+
+    def run_batch(ip, contents, keys):
+        if ip == '10.0.0.1' and len(rejected) < 3:
+            rejected.add(len(rejected))
+            return [{'status': 'busy'} for _ in contents]
+        return echo(ip, contents, keys)
+
+    scheduler = ChunkScheduler([f'{i},{i}' for i in range(16)], workers(1), run_batch,
+                               hedge=False, max_attempts=1, busy_backoff=0.01)
+    results = scheduler.run()
+    assert all(r and r['status'] == 'success' for r in results)
+
+
+def test_deadline_returns_partial_result():
+    def run_batch(ip, contents, keys):
+        if keys[0] > 0: time.sleep(1.0)             # solo el primer trozo es rapido
+        return echo(ip, contents, keys)
+
+    lines = [f'{i},{i}' for i in range(40)]
+    scheduler = ChunkScheduler(lines, workers(1), run_batch, hedge=False, min_lines=10, chunks_per_slot=4)
+    t0 = time.time()
+    results = scheduler.run(deadline=0.3)
+    assert time.time() - t0 < 0.9
+    report = scheduler.report()
+    assert report['deadline_reached'] and report['lines_total'] == 40
+    assert report['lines_processed'] == 10
+    assert results[0]['status'] == 'success' and results[1:] == [None] * (len(results) - 1)
+
+
+def test_stop_cancels_distribution():
+    def run_batch(ip, contents, keys):
+        time.sleep(0.2)
+        return echo(ip, contents, keys)
+
+    scheduler = ChunkScheduler([f'{i},{i}' for i in range(400)], workers(1), run_batch, hedge=False)
+    threading.Timer(0.1, scheduler.stop).start()
+    t0 = time.time()
+    scheduler.run()
+    assert time.time() - t0 < 0.5
+    assert scheduler.report()['cancelled']
+
+
+def test_straggler_is_hedged_on_idle_node():
+    seen = []
+
+    def run_batch(ip, contents, keys):
+        if ip == '10.0.0.1':
+            seen.append(keys[0])
+            if len(seen) > 1: time.sleep(2.0)       # a partir del segundo lote es un rezagado
+        return echo(ip, contents, keys)
+
+    scheduler = ChunkScheduler([f'{i},{i}' for i in range(48)], workers(1, 1), run_batch,
+                               min_lines=8, chunks_per_slot=3, target_seconds=0.001,
+                               hedge_min_samples=2)
+    t0 = time.time()
+    results = scheduler.run()
+    assert all(r and r['status'] == 'success' for r in results)
+    assert scheduler.hedges >= 1
+    assert time.time() - t0 < 1.8
+
+
+def test_hedge_loser_is_cancelled():
+    cancelled = threading.Event()
+    discarded = []
+    seen = []
+
+    def run_batch(ip, contents, keys):
+        if ip == '10.0.0.1':
+            seen.append(keys[0])
+            # El rezagado solo termina cuando le cancelan la copia
+            if len(seen) > 1 and cancelled.wait(5):
+                return [{'status': 'error', 'code': 'CANCELLED'} for _ in contents]
+        return echo(ip, contents, keys)
+
+    def on_discard(ip, key):
+        discarded.append((ip, key))
+        cancelled.set()
+
+    scheduler = ChunkScheduler([f'{i},{i}' for i in range(48)], workers(1, 1), run_batch,
+                               min_lines=8, chunks_per_slot=3, target_seconds=0.001,
+                               hedge_min_samples=2, on_discard=on_discard)
+    results = scheduler.run()
+    assert all(r and r['status'] == 'success' for r in results)
+    assert discarded and all(ip == '10.0.0.1' for ip, _ in discarded)
+    time.sleep(0.1)
+    statuses = [a['status'] for c in scheduler.report()['chunk_attempts'] for a in c['attempts']
+                if a['node'] == '10.0.0.1']
+    assert 'discarded' in statuses
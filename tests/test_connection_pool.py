@@ -0,0 +1,124 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from api.async_server import AsyncServer
+from api.connection_pool import ConnectionLost, ConnectionPool
+from api.protocol import recv_msg, send_msg
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def node():
+    """Servidor local cuyo handler es configurable por test; devuelve (servidor, pool, llamadas)"""
+    calls = []
+    server = AsyncServer(lambda msg: calls.append(msg['type']) or server.reply(msg), free_port(), max_workers=4)
+    server.reply = lambda msg: {'status': 'success', 'echo': msg.get('data')}
+    server.start()
+    pool = ConnectionPool(server.port)
+    yield server, pool, calls
+    pool.close_all()
+    server.stop()
+
+
+def test_concurrent_requests_share_one_socket(node):
+    server, pool, calls = node
+    server.reply = lambda msg: time.sleep(0.2 if msg['data'] % 2 else 0) or {'echo': msg['data']}
+    t0 = time.time()
+    with ThreadPoolExecutor(8) as ex:
+        replies = list(ex.map(lambda i: pool.request('127.0.0.1', {'type': 'PING', 'data': i}, 5), range(8)))
+    # Cada respuesta vuelve a su peticion aunque lleguen desordenadas
+    assert [r['echo'] for r in replies] == list(range(8))
+    assert time.time() - t0 < 0.2 * 4
+    assert len(pool.conns['127.0.0.1']) == 1
+
+
+def test_new_connection_after_peer_closes(node):
+    server, pool, calls = node
+    pool.request('127.0.0.1', {'type': 'PING'}, 5)
+    old = pool.conns['127.0.0.1'][0]
+    old.close()
+    assert pool.request('127.0.0.1', {'type': 'PING', 'data': 2}, 5)['echo'] == 2
+    assert pool.conns['127.0.0.1'][0] is not old
+
+
+def test_dropped_peer_fails_fast_until_revived(node):
+    server, pool, calls = node
+    pool.drop('127.0.0.1')
+    with pytest.raises(ConnectionLost):
+        pool.request('127.0.0.1', {'type': 'PING'}, 5)
+    pool.revive('127.0.0.1')
+    assert pool.request('127.0.0.1', {'type': 'PING'}, 5)['status'] == 'success'
+    assert calls == ['PING']
+
+
+def test_legacy_peer_gets_one_socket_per_request():
+    """Un nodo antiguo contesta 'Unknown Task' al MUX_HELLO: se usa el protocolo clasico"""
+    srv = socket.socket()
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(('127.0.0.1', 0))
+    srv.listen()
+    seen = []
+
+    def serve():
+        while True:
+            try: conn, _ = srv.accept()
+            except OSError: return
+            with conn:
+                msg = recv_msg(conn)
+                seen.append(msg['type'])
+                send_msg(conn, {'status': 'error', 'msg': 'Unknown Task'} if msg['type'] == 'MUX_HELLO'
+                         else {'status': 'success', 'echo': msg.get('data')})
+    threading.Thread(target=serve, daemon=True).start()
+
+    pool = ConnectionPool(srv.getsockname()[1])
+    try:
+        assert pool.request('127.0.0.1', {'type': 'PING', 'data': 1}, 5)['echo'] == 1
+        assert pool.request('127.0.0.1', {'type': 'PING', 'data': 2}, 5)['echo'] == 2
+        assert '127.0.0.1' in pool.legacy
+        assert seen == ['MUX_HELLO', 'PING', 'PING']
+    finally:
+        pool.close_all()
+        srv.close()
+
+
+def cut_after_first(pool, server):
+    """El primer mensaje recibido corta la conexion del cliente antes de que llegue la respuesta"""
+    seen = []
+
+    def reply(msg):
+        if not seen:
+            seen.append(msg)
+            for conn in pool.conns['127.0.0.1']: conn.sock.shutdown(socket.SHUT_RDWR)
+        return {'status': 'success'}
+    server.reply = reply
+
+
+def test_idempotent_request_is_resent_after_drop(node):
+    server, pool, calls = node
+    cut_after_first(pool, server)
+    assert pool.request('127.0.0.1', {'type': 'PING'}, timeout=5) == {'status': 'success'}
+    assert calls == ['PING', 'PING']
+
+
+def test_task_is_not_resent_after_drop(node):
+    server, pool, calls = node
+    cut_after_first(pool, server)
+    with pytest.raises(ConnectionLost):
+        pool.request('127.0.0.1', {'type': 'ML_TRAIN', 'data': {}}, timeout=5)
+    assert calls == ['ML_TRAIN']
+
+
+def test_unsent_request_is_resent(node):
+    server, pool, calls = node
+    assert pool.request('127.0.0.1', {'type': 'PING'}, timeout=5)['status'] == 'success'
+    conn = pool.conns['127.0.0.1'][0]
+    conn.sock.close()                   # el envio falla: la tarea no salio del nodo
+    assert pool.request('127.0.0.1', {'type': 'ML_TRAIN', 'data': 1}, timeout=5)['echo'] == 1
+    assert calls == ['PING', 'ML_TRAIN']
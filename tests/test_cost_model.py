@@ -0,0 +1,15 @@
+from scheduler.cost_model import CostModel, EPOCHS
+
+CONTENT = '# x1,x2,y\n1,2,3\n4,5,6\n7,8,9\n'
+
+
+def test_null_or_invalid_params_use_defaults():
+    costs = CostModel()
+    base = costs.units('ML_TRAIN', {'file_content': CONTENT})
+    assert base == 3 * 2 * EPOCHS['ML_TRAIN']
+    for epochs in (None, 'muchas', 0):
+        assert costs.units('ML_TRAIN', {'file_content': CONTENT, 'epochs': epochs}) == base
+    assert costs.units('ML_TRAIN', {'file_content': CONTENT, 'epochs': '10'}) == 3 * 2 * 10
+
+    tree = costs.units('TREE_TRAIN', {'file_content': CONTENT})
+    assert costs.units('TREE_TRAIN', {'file_content': CONTENT, 'max_depth': None}) == tree
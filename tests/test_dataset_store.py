@@ -0,0 +1,58 @@
+import pytest
+from api.dataset_store import DatasetStore, DatasetTooLarge, content_hash
+
+
+def test_size_counts_utf8_bytes():
+    store = DatasetStore(max_bytes=10)
+    h = store.put('ñññ')                 # 3 caracteres, 6 bytes
+    assert h == content_hash('ñññ')
+    assert store.stats()['bytes'] == 6
+
+
+def test_eviction_keeps_limit_in_bytes():
+    store = DatasetStore(max_bytes=10)
+    first = store.put('ñññ')
+    second = store.put('ññññ')           # 8 bytes: no caben los dos
+    assert store.get(first) is None
+    assert store.get(second) == 'ññññ'
+    assert store.stats()['bytes'] == 8
+
+
+def test_content_larger_than_limit_is_rejected():
+    store = DatasetStore(max_bytes=4)
+    with pytest.raises(DatasetTooLarge):
+        store.put('ñññ')
+    assert store.missing([content_hash('ñññ')]) == [content_hash('ñññ')]
+    assert store.stats()['bytes'] == 0
+
+
+class Discovery:
+    def get_peers(self):
+        return {}
+
+
+class LoopbackPool:
+    def __init__(self, node):
+        self.node = node
+        self.sent = []
+
+    def request(self, ip, msg, timeout=15):
+        self.sent.append(msg)
+        return self.node.handle_message(dict(msg))
+
+
+def test_oversize_dataset_is_sent_inline():
+    from api.distributed_api import DistributedAPI
+    sender = DistributedAPI('n1', Discovery(), None, port=0)
+    peer = DistributedAPI('n2', Discovery(), None, port=0, dataset_cache_bytes=1024)
+    sender.pool = LoopbackPool(peer)
+    peer.process_local = lambda msg, job_id=None: {'status': 'success', 'rows': len(msg['data']['file_content'])}
+
+    content = '1,2,3\n' * 2000                 # 12 KB: se envia por hash, pero no cabe en el par
+    reply = sender.forward_request('10.0.0.2', {'type': 'ML_TRAIN', 'data': {'file_content': content}})
+    assert reply == {'status': 'success', 'rows': len(content)}
+    put = [m for m in sender.pool.sent if m['type'] == 'DATASET_PUT']
+    assert len(put) == 1
+    assert 'file_content' in sender.pool.sent[-1]['data']
+    sender.jobs.shutdown()
+    peer.jobs.shutdown()
@@ -0,0 +1,83 @@
+import json
+import time
+from network.discovery import NodeDiscovery, ALIVE, DEAD
+
+
+class FakeSock:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, addr):
+        self.sent.append((json.loads(data.decode()), addr[0]))
+
+
+def make_node(seeds=None):
+    node = NodeDiscovery('n1', seeds=seeds)
+    node.my_ip = '10.0.0.1'
+    node.sock = FakeSock()
+    return node
+
+
+def hb(node_id, ip, inc=0):
+    return {'type': 'HB', 'from': node_id, 'ip': ip, 'inc': inc}
+
+
+def test_dead_member_needs_higher_incarnation():
+    node = make_node()
+    node._handle(hb('n2', '10.0.0.2'), ('10.0.0.2', 5000))
+    node._apply({'id': 'n2', 'ip': '10.0.0.2', 'state': DEAD, 'inc': 0})
+    assert node.peers['n2']['state'] == DEAD
+
+    node.sock.sent.clear()
+    node._handle(hb('n2', '10.0.0.2', inc=0), ('10.0.0.2', 5000))
+    assert node.peers['n2']['state'] == DEAD
+    # Se le recuerda que esta muerto para que suba su encarnacion
+    notice = [m for m, ip in node.sock.sent if ip == '10.0.0.2']
+    assert any(u['id'] == 'n2' and u['state'] == DEAD for m in notice for u in m['updates'])
+
+    node._handle(hb('n2', '10.0.0.2', inc=1), ('10.0.0.2', 5000))
+    assert node.peers['n2']['state'] == ALIVE
+
+
+def test_refutes_own_death():
+    node = make_node()
+    node._apply({'id': 'n1', 'ip': '10.0.0.1', 'state': DEAD, 'inc': 0})
+    assert node.incarnation == 1
+
+
+def test_tombstone_blocks_stale_alive_gossip():
+    node = make_node()
+    node._apply({'id': 'n2', 'ip': '10.0.0.2', 'state': ALIVE, 'inc': 3})
+    node._apply({'id': 'n2', 'ip': '10.0.0.2', 'state': DEAD, 'inc': 3})
+    node.members['n2'].changed = time.time() - node.DEAD_TTL - 1
+    node._expire()
+    assert 'n2' not in node.members
+
+    node._apply({'id': 'n2', 'ip': '10.0.0.2', 'state': ALIVE, 'inc': 3})
+    node._handle(hb('n2', '10.0.0.2', inc=2), ('10.0.0.2', 5000))
+    assert 'n2' not in node.members
+
+    node._apply({'id': 'n2', 'ip': '10.0.0.2', 'state': ALIVE, 'inc': 4})
+    assert node.peers['n2']['state'] == ALIVE
+
+
+def test_legacy_hello_member():
+    node = make_node(seeds=['10.0.0.9'])
+    node._handle({'type': 'HELLO', 'id': 'old', 'ip': '10.0.0.3'}, ('10.0.0.3', 5000))
+    assert 'old' in node.get_peers()
+    assert node.members['old'].legacy
+    # No se sondea ni se difunde: no contesta a PING
+    assert node._next_target() is None
+    assert 'old' not in node.updates
+
+    # El HELLO de compatibilidad de otro nodo nuevo no lo convierte en antiguo
+    node._handle({'type': 'HELLO', 'id': 'n3', 'ip': '10.0.0.4', 'from': 'n3'}, ('10.0.0.4', 5000))
+    assert 'n3' not in node.members
+
+    node._hello()
+    hellos = {ip for m, ip in node.sock.sent if m['type'] == 'HELLO'}
+    assert hellos == {'10.0.0.3', '10.0.0.9'}
+
+    node.members['old'].last_seen = time.time() - node.LEGACY_TTL - 1
+    node._expire()
+    assert 'old' not in node.members
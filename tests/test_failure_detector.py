@@ -0,0 +1,46 @@
+from network import discovery
+from network.discovery import NodeDiscovery, ALIVE, SUSPECT
+from network.failure_detector import PhiAccrualDetector
+
+
+def regular_detector(interval=0.2, beats=50):
+    detector = PhiAccrualDetector(first_interval=interval)
+    for i in range(beats):
+        detector.heartbeat('n2', now=100.0 + i * interval)
+    return detector, 100.0 + (beats - 1) * interval
+
+
+def test_short_pause_is_not_suspected():
+    detector, last = regular_detector()
+    # Pausa de GC o del GIL de 1.5 s con heartbeats muy regulares
+    assert detector.phi('n2', now=last + 1.5) < 3.0
+    assert detector.phi('n2', now=last + 6.0) > 8.0
+
+
+def test_phi_only_suspects_death_comes_from_swim(monkeypatch):
+    node = NodeDiscovery('n1')
+    node._apply({'id': 'n2', 'ip': '10.0.0.2', 'state': ALIVE, 'inc': 0})
+    detector, last = regular_detector()
+    node.detector = detector
+    node.members['n2'].last_seen = last
+
+    monkeypatch.setattr(discovery.time, 'time', lambda: last + 60.0)
+    node._check_phi()
+    assert node.members['n2'].state == SUSPECT
+
+
+def test_only_heartbeat_senders_are_judged(monkeypatch):
+    node = NodeDiscovery('n3', heartbeat_fanout=2)
+    for i in (1, 2, 4, 5):
+        node._apply({'id': f'n{i}', 'ip': f'10.0.0.{i}', 'state': ALIVE, 'inc': 0})
+    # Con fanout 2 envian heartbeats a n3 sus dos predecesores en el anillo: n1 y n2
+    assert {m.id for m in node._heartbeat_sources()} == {'n1', 'n2'}
+
+    # n4 le enviaba heartbeats antes de que cambiara el anillo y dejo de hacerlo
+    for peer in ('n2', 'n4'):
+        for i in range(50): node.detector.heartbeat(peer, now=100.0 + i * 0.2)
+    monkeypatch.setattr(discovery.time, 'time', lambda: 160.0)
+    node._check_phi()
+    assert node.members['n4'].state == ALIVE
+    assert node.detector.phi('n4') is None
+    assert node.members['n2'].state == SUSPECT
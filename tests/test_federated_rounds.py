@@ -0,0 +1,62 @@
+import random
+import pytest
+from api import aggregation
+from api.distributed_api import DistributedAPI
+
+CSV = '\n'.join(f'{x},{x % 3},{int(x > 10)}' for x in range(20))
+
+
+class Discovery:
+    def get_peers(self):
+        return {}
+
+
+class Scheduler:
+    def __init__(self, name):
+        self.name = name
+        self.stopped = False
+
+    def report(self):
+        return {'round_of': self.name}
+
+
+def logistic(rng):
+    return {'status': 'success', 'executed_by': 'n1', 'weights': [rng.random(), rng.random()],
+            'bias': rng.random(), 'mse': rng.random(), 'loss': rng.random()}
+
+
+def make_api():
+    return DistributedAPI('n1', Discovery(), None, port=0)
+
+
+@pytest.mark.parametrize('data', [{'rounds': 'tres'}, {'rounds': 3, 'tol': 'x'},
+                                  {'rounds': 3, 'local_epochs': [2]}, {'rounds': -2},
+                                  {'rounds': 3, 'tol': -1}, {'rounds': 0},
+                                  {'rounds': 3, 'local_epochs': 0}])
+def test_invalid_round_options_are_rejected(data):
+    response = make_api().process_parallel({'type': 'LOGISTIC', 'data': dict(data, file_content=CSV)})
+    assert response['status'] == 'error'
+
+
+def test_null_options_take_defaults():
+    api = make_api()
+    assert api._round_options('LOGISTIC', {'rounds': None, 'tol': None, 'local_epochs': None}) == \
+        (1, api.ROUND_TOL, 20)
+    assert api._round_options('LOGISTIC', {'rounds': '4', 'tol': 0}) == (4, 0.0, 20)
+
+
+def test_failed_round_reports_scheduler_of_returned_model(monkeypatch):
+    api = make_api()
+    rng = random.Random(5)
+    outcomes = iter([aggregation.partial('LOGISTIC', [logistic(rng)]),
+                     aggregation.partial('LOGISTIC', [logistic(rng)]), None])
+    rounds = iter(range(1, 4))
+
+    def run_chunks(task_type, lines, workers, params, deadline=None, job_id=None):
+        return Scheduler(next(rounds)), None, next(outcomes)
+    monkeypatch.setattr(api, '_run_chunks', run_chunks)
+
+    final = api.process_parallel({'type': 'LOGISTIC', 'data': {'file_content': CSV, 'rounds': 5, 'tol': 0}})
+    assert final['status'] == 'success' and final['rounds'] == 2
+    assert final['round_of'] == 2 and final['failed_round'] == 3
+    assert final['partial']
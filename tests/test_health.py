@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from api.distributed_api import DistributedAPI
+from network.health import HealthChecker
+
+
+class Discovery:
+    def __init__(self, *ips):
+        self.peers = {ip: {'ip': ip, 'last_seen': time.time(), 'state': 'alive'} for ip in ips}
+
+    def get_peers(self, include_suspect=False):
+        states = ('alive', 'suspect') if include_suspect else ('alive',)
+        return {ip: p for ip, p in self.peers.items() if p['state'] in states}
+
+
+class SlowPool:
+    """Pool de conexiones cuyas peticiones tardan `delay` s o vencen su timeout"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def request(self, ip, msg, timeout=15):
+        if self.delay > timeout: raise FutureTimeout()
+        time.sleep(self.delay)
+        return {'status': 'success'}
+
+
+def make_api(delay):
+    api = DistributedAPI('n1', Discovery('10.0.0.2'), None, port=0)
+    api.pool = SlowPool(delay)
+    return api
+
+
+def test_peers_unknown_to_discovery_are_pruned():
+    discovery = Discovery('10.0.0.2', '10.0.0.3')
+    health = HealthChecker(discovery, lambda ip, timeout: True, interval=0.05)
+    health.start()
+    time.sleep(0.15)
+    assert set(health.snapshot()) == {'10.0.0.2', '10.0.0.3'}
+
+    del discovery.peers['10.0.0.3']
+    time.sleep(0.15)
+    health.stop()
+    assert set(health.snapshot()) == {'10.0.0.2'}
+
+
+def test_suspect_peer_keeps_its_state():
+    discovery = Discovery('10.0.0.2', '10.0.0.3')
+    health = HealthChecker(discovery, lambda ip, timeout: True, interval=0.05)
+    health.start()
+    time.sleep(0.1)
+    # El detector de fallos sospecha de .3: deja de recibir trabajo y no sale de la tabla
+    discovery.peers['10.0.0.3']['state'] = 'suspect'
+    health.set_alive('10.0.0.3', False)
+    time.sleep(0.15)                    # sigue contestando a PING
+    assert '10.0.0.3' in health.snapshot()
+    assert not health.is_alive('10.0.0.3')
+
+    discovery.peers['10.0.0.3']['state'] = 'dead'
+    time.sleep(0.15)
+    health.stop()
+    assert '10.0.0.3' not in health.snapshot()
+
+
+def test_control_requests_record_latency():
+    api = make_api(0.02)
+    api.forward_request('10.0.0.2', {'type': 'MONITOR', 'data': {}}, timeout=2)
+    assert api.health.latency('10.0.0.2') >= 0.02
+
+    # El tiempo de una tarea es calculo, no latencia de red
+    fresh = make_api(0.02)
+    fresh.forward_request('10.0.0.2', {'type': 'ML_TRAIN', 'data': {}}, timeout=15)
+    assert fresh.health.latency('10.0.0.2') is None
+
+
+def test_long_task_timeout_is_not_a_liveness_failure():
+    api = make_api(20)
+    for _ in range(3):
+        assert api.forward_request('10.0.0.2', {'type': 'ML_TRAIN', 'data': {}}, timeout=15) is None
+    assert api.health.is_alive('10.0.0.2')
+
+    for _ in range(2):
+        api.forward_request('10.0.0.2', {'type': 'MONITOR', 'data': {}}, timeout=2)
+    assert not api.health.is_alive('10.0.0.2')
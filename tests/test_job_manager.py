@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from api.async_server import Deferred
+from api.job_manager import JobManager
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.progress_listener = None
+        self.cancelled = set()
+
+    def cancel(self, job_id):
+        self.cancelled.add(job_id)
+
+    def forget(self, job_id):
+        self.cancelled.discard(job_id)
+
+
+def make_manager(runner):
+    executor = FakeExecutor()
+    return JobManager('n1', runner, executor), executor
+
+
+def test_long_poll_returns_deferred_resolved_by_progress():
+    go = threading.Event()
+
+    def runner(msg, job_id):
+        go.wait(5)
+        manager.executor.progress_listener(job_id, {'epoch': 1, 'epochs': 2, 'loss': 0.5})
+        go.clear()
+        go.wait(5)
+        return {'status': 'success'}
+
+    manager, _ = make_manager(runner)
+    job_id = manager.submit({'type': 'ML_TRAIN'})
+    pending = manager.progress(job_id, since=0, wait=5)
+    assert isinstance(pending, Deferred)
+
+    go.set()
+    reply = asyncio.run(pending.wait())
+    assert reply['events'][0]['epoch'] == 1 and reply['next'] == 1
+    go.set()
+    assert manager.result(job_id, wait=5).result()['state'] == 'done'
+    manager.shutdown()
+
+
+def test_long_poll_expires_with_current_state():
+    release = threading.Event()
+    manager, _ = make_manager(lambda msg, job_id: release.wait(5) and {'status': 'success'})
+    job_id = manager.submit({'type': 'ML_TRAIN'})
+
+    t0 = time.time()
+    reply = asyncio.run(manager.result(job_id, wait=0.2).wait())
+    assert reply['status'] == 'pending'
+    assert time.time() - t0 < 2
+    release.set()
+    manager.shutdown()
+
+
+def test_no_wait_replies_at_once():
+    manager, _ = make_manager(lambda msg, job_id: {'status': 'success'})
+    job_id = manager.submit({'type': 'ML_TRAIN'})
+    assert isinstance(manager.progress(job_id), dict)
+    manager.shutdown()
+
+
+def test_cancel_calls_hooks_once():
+    release = threading.Event()
+    manager, executor = make_manager(lambda msg, job_id: release.wait(5) and {'status': 'success'})
+    job_id = manager.submit({'type': 'ML_TRAIN'})
+    calls = []
+    manager.on_cancel(job_id, 'chunks', lambda: calls.append('old'))
+    manager.on_cancel(job_id, 'chunks', lambda: calls.append('chunks'))
+    manager.on_cancel(job_id, ('task', '10.0.0.2'), lambda: calls.append('peer'))
+
+    assert manager.cancel(job_id)['state'] == 'cancelled'
+    assert sorted(calls) == ['chunks', 'peer']
+    assert job_id in executor.cancelled
+    assert manager.is_cancelled(job_id)
+
+    # Un hook registrado despues de cancelar se llama al momento
+    manager.on_cancel(job_id, 'ring', lambda: calls.append('ring'))
+    assert calls[-1] == 'ring'
+    release.set()
+    manager.shutdown()
+
+
+def test_task_progress_maps_to_parent_job():
+    manager, _ = make_manager(lambda msg, job_id: time.sleep(0.2) or {'status': 'success'})
+    job_id = manager.submit({'type': 'MLP_TRAIN', 'mode': 'parallel'})
+    manager.executor.progress_listener(f'{job_id}/chunks', {'epoch': 10, 'epochs': 100})
+    forwarded = []
+    manager.remote_progress = lambda task_id, event: forwarded.append(task_id)
+    manager.executor.progress_listener('n9-job-1/chunks', {'epoch': 1, 'epochs': 2})
+    assert manager.progress(job_id)['events'][0]['epoch'] == 10
+    assert forwarded == ['n9-job-1/chunks']
+    manager.shutdown()
+
+
+class Discovery:
+    def __init__(self, my_ip):
+        self.my_ip = my_ip
+
+    def get_peers(self):
+        return {}
+
+
+class Scheduler:
+    """Envia toda tarea al par"""
+
+    def __init__(self, target):
+        self.target = target
+
+    def decide_node(self, cost, exclude=()):
+        return None if self.target in exclude else self.target
+
+    def task_started(self, ip, cost): pass
+    def task_finished(self, ip, cost): pass
+    def mark_busy(self, ip): pass
+
+
+class LoopbackPool:
+    """Pool de conexiones que entrega cada peticion al nodo de esa IP del mismo proceso"""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def request(self, ip, msg, timeout=15):
+        return self.nodes[ip].handle_message(dict(msg))
+
+
+def test_forwarded_job_streams_progress_to_owner():
+    from api.distributed_api import DistributedAPI
+    nodes = {}
+    owner = DistributedAPI('n1', Discovery('10.0.0.1'), Scheduler('10.0.0.2'), port=0)
+    peer = DistributedAPI('n2', Discovery('10.0.0.2'), Scheduler('10.0.0.2'), port=0)
+    nodes.update({'10.0.0.1': owner, '10.0.0.2': peer})
+    owner.pool = peer.pool = LoopbackPool(nodes)
+
+    content = '\n'.join(f'{x},{(3 * x) % 7},{int(x % 7 > 3)}' for x in range(40))
+    job_id = owner.jobs.submit({'type': 'LOGISTIC', 'data': {'file_content': content, 'epochs': 200}})
+    reply = owner.jobs.result(job_id, wait=10).result()
+    assert reply['state'] == 'done' and reply['result']['executed_by'] == 'n2'
+
+    deadline = time.time() + 5
+    while time.time() < deadline and len(owner.jobs.progress(job_id)['events']) < 4:
+        time.sleep(0.05)
+    events = owner.jobs.progress(job_id)['events']
+    assert [e['epoch'] for e in events] == [50, 100, 150, 200]
+    assert all(e['node'] == 'n2' for e in events)
+    owner.jobs.shutdown()
+    peer.jobs.shutdown()
+
+
+def test_task_cancel_reaches_each_chunk_of_the_batch():
+    from api.distributed_api import DistributedAPI
+    api = DistributedAPI('n2', Discovery('10.0.0.2'), None, port=0)
+    cancelled = []
+    api.executor.cancel = cancelled.append
+    with api._cancellable('n1-job-1/chunks/0'), api._cancellable('n1-job-1/chunks/40'), \
+            api._cancellable('n1-job-10/chunks/0'):
+        assert api.cancel_task('n1-job-1/chunks/40')['cancelled']
+        assert cancelled == ['n1-job-1/chunks/40']
+        api.cancel_task('n1-job-1/chunks')
+        assert sorted(cancelled[1:]) == ['n1-job-1/chunks/0', 'n1-job-1/chunks/40']
+    assert not api.cancel_task('n1-job-1/chunks')['cancelled']
+    api.jobs.shutdown()
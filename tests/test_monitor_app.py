@@ -0,0 +1,23 @@
+import time
+from apps import monitor_app
+from apps.monitor_app import CpuSampler, MonitorApp
+
+
+def test_readers_share_one_sampling_window(monkeypatch):
+    intervals = []
+
+    def cpu_percent(interval=None):
+        intervals.append(interval)
+        time.sleep(interval or 0)
+        return 42.0
+
+    monkeypatch.setattr(monitor_app.psutil, 'cpu_percent', cpu_percent)
+    sampler = CpuSampler(interval=0.05)
+    monkeypatch.setattr(monitor_app, 'cpu_sampler', sampler)
+
+    a, b = MonitorApp('n1'), MonitorApp('n2')
+    for _ in range(20):
+        assert a.get_stats()['cpu'] == b.get_stats()['cpu'] == 42.0
+    # Ninguna lectura reinicia la ventana: psutil solo se llama con intervalo, desde el sampler
+    assert None not in intervals
+    assert len(intervals) < 20
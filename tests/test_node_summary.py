@@ -0,0 +1,42 @@
+import base64
+import hashlib
+from network import node_summary
+
+
+def sha(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+SUMMARY = {'cores': 8, 'workers': 4, 'running': 3, 'queue': 7, 'cpu': 42.5, 'ram_free_mb': 2048,
+           'backlog': 12.25, 'task_types': ['LOGISTIC', 'IMAGE_PROC', 'OTRO'], 'datasets': [sha(1), sha(2)]}
+
+
+def test_round_trip():
+    back = node_summary.unpack(node_summary.pack(SUMMARY))
+    assert back == {'version': node_summary.PROTOCOL_VERSION, 'cores': 8, 'workers': 4, 'running': 3,
+                    'queue': 7, 'cpu': 42.5, 'ram_free_mb': 2048, 'backlog': 12.25,
+                    'task_types': ['LOGISTIC', 'IMAGE_PROC'],
+                    'datasets': [sha(2)[:16], sha(1)[:16]]}
+    assert node_summary.load_of(back) == {'running': 3, 'queue': 7, 'workers': 4, 'backlog': 12.25, 'cpu': 42.5}
+    assert node_summary.has_dataset(back, sha(1)) and not node_summary.has_dataset(back, sha(3))
+
+
+def test_out_of_range_values_are_clamped():
+    back = node_summary.unpack(node_summary.pack({'running': 10 ** 6, 'queue': -3, 'cpu': 250, 'cores': None}))
+    assert (back['running'], back['queue'], back['cpu'], back['cores']) == (0xFFFF, 0, 100.0, 0)
+
+
+def test_only_most_recent_datasets_are_announced():
+    datasets = [sha(i) for i in range(50)]
+    back = node_summary.unpack(node_summary.pack({'datasets': datasets}))
+    assert back['datasets'] == [h[:16] for h in datasets[::-1][:node_summary.MAX_HASHES]]
+
+
+def test_truncated_or_extended_payloads():
+    raw = base64.b64decode(node_summary.pack(SUMMARY))
+    assert node_summary.unpack('no es base64!') is None
+    assert node_summary.unpack(base64.b64encode(raw[:5]).decode()) is None
+    # Un hash cortado a medias se descarta; bytes añadidos por una version futura se ignoran
+    assert node_summary.unpack(base64.b64encode(raw[:-3]).decode())['datasets'] == [sha(2)[:16]]
+    assert node_summary.unpack(base64.b64encode(raw + b'\x01\x02').decode()) == node_summary.unpack(base64.b64encode(raw).decode())
+    assert node_summary.load_of(None) is None
@@ -0,0 +1,72 @@
+import time
+import pytest
+from scheduler.distributed_scheduler import DistributedScheduler
+from scheduler.policies import load_score, make_policy
+
+
+def node(ip, running=0, queue=0, workers=1, cpu=0):
+    return {'ip': ip, 'load': {'running': running, 'queue': queue, 'workers': workers, 'cpu': cpu}}
+
+
+def test_load_score_is_tasks_per_worker_plus_cpu():
+    assert load_score(node('a', running=2, queue=2, workers=4, cpu=50)) == 1.5
+    assert load_score({'ip': 'a', 'load': None}) == 1.0
+
+
+def test_round_robin_cycles_local_then_sorted_peers():
+    policy = make_policy('round_robin')
+    local, peers = node('local'), [node('10.0.0.3'), node('10.0.0.2')]
+    picks = [policy.choose(local, peers)['ip'] for _ in range(4)]
+    assert picks == ['local', '10.0.0.2', '10.0.0.3', 'local']
+
+
+def test_least_loaded_prefers_local_on_ties():
+    policy = make_policy('least_loaded')
+    assert policy.choose(node('local', running=2), [node('a', running=1), node('b', running=3)])['ip'] == 'a'
+    assert policy.choose(node('local', running=1), [node('a', running=1)])['ip'] == 'local'
+
+
+def test_p2c_never_picks_the_most_loaded():
+    policy = make_policy('p2c')
+    local = node('local', running=1)
+    peers = [node('a', running=0), node('b', running=5), node('c', running=2)]
+    picks = [policy.choose(local, peers)['ip'] for _ in range(300)]
+    assert 'b' not in picks
+    assert picks.count('a') > picks.count('c')
+    assert policy.choose(local, [])['ip'] == 'local'
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make_policy('fastest')
+
+
+class Discovery:
+    def __init__(self, peers):
+        self.peers = peers
+
+    def get_peers(self):
+        return {p['ip']: dict(p, last_seen=time.time()) for p in self.peers}
+
+
+def test_scheduler_counts_tasks_sent_since_last_heartbeat():
+    scheduler = DistributedScheduler('n1', Discovery([node('a', workers=2), node('b', workers=2)]),
+                                     policy='least_loaded')
+    scheduler.local_load = lambda: {'running': 4, 'workers': 1}
+    first = scheduler.decide_node()
+    scheduler.task_started(first)
+    scheduler.task_started(first)
+    second = scheduler.decide_node()
+    assert {first, second} == {'a', 'b'}
+    scheduler.task_finished(first)
+    scheduler.task_finished(first)
+    scheduler.mark_busy(second)
+    assert scheduler.decide_node() == first
+
+
+def test_saturated_cluster_queues_locally():
+    scheduler = DistributedScheduler('n1', Discovery([node('a', running=10), node('b', running=1)]),
+                                     policy='least_loaded', max_wait=30)
+    scheduler.local_load = lambda: {'running': 10, 'workers': 1}
+    assert scheduler.decide_node(cost=10) == 'b'             # b: 10 s de espera + 10 de tarea
+    assert scheduler.decide_node(cost=20) == 'local'         # ninguno cabe en max_wait
@@ -0,0 +1,65 @@
+import socket
+import threading
+import pytest
+from api.protocol import (HEADER, FrameTooLarge, check_frame_size, pack_msg, pack_mux,
+                          recv_exact, recv_msg, recv_mux)
+
+
+def test_recv_exact_joins_fragments():
+    a, b = socket.socketpair()
+    with a, b:
+        payload = bytes(range(256)) * 40
+
+        def send_in_pieces():
+            for i in range(0, len(payload), 333): a.sendall(payload[i:i + 333])
+        threading.Thread(target=send_in_pieces).start()
+        assert recv_exact(b, len(payload)) == payload
+
+
+def test_recv_exact_returns_none_when_peer_closes_early():
+    a, b = socket.socketpair()
+    with b:
+        a.sendall(b'abc')
+        a.close()
+        assert recv_exact(b, 10) is None
+
+
+def test_check_frame_size():
+    check_frame_size(100, max_size=100)
+    with pytest.raises(FrameTooLarge):
+        check_frame_size(101, max_size=100)
+
+
+def test_oversized_header_is_rejected_before_reading_body():
+    a, b = socket.socketpair()
+    with a, b:
+        # Solo la cabecera: si se intentara leer el cuerpo la llamada se quedaria esperando
+        a.sendall(HEADER.pack(10 ** 9))
+        b.settimeout(2)
+        with pytest.raises(FrameTooLarge):
+            recv_msg(b, max_size=1024)
+
+
+def test_frames_within_limit_round_trip():
+    a, b = socket.socketpair()
+    with a, b:
+        a.sendall(pack_msg({'type': 'PING'}) + pack_mux(7, {'n': 1}))
+        assert recv_msg(b, max_size=1024) == {'type': 'PING'}
+        assert recv_mux(b, max_size=1024) == (7, {'n': 1})
+
+
+def test_server_closes_connection_on_oversized_frame():
+    from api.async_server import AsyncServer
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    calls = []
+    server = AsyncServer(lambda msg: calls.append(msg) or {'status': 'success'}, port, max_frame=1024)
+    server.start()
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=2) as c:
+            c.sendall(HEADER.pack(10 ** 9))
+            assert c.recv(1) == b''             # cierra sin esperar el cuerpo
+        assert calls == []
+    finally:
+        server.stop()
@@ -0,0 +1,45 @@
+import os
+from api.dataset_store import content_hash
+from api.result_cache import ResultCache
+
+CSV = '1,2,3\n4,5,6\n'
+OK = {'status': 'success', 'weights': [0.5, 1.5]}
+
+
+def test_random_tasks_need_a_seed():
+    cache = ResultCache()
+    assert cache.key('MLP_TRAIN', {'file_content': CSV}) is None
+    assert cache.key('MLP_TRAIN', {'file_content': CSV, 'seed': None}) is None
+    assert cache.key('MLP_TRAIN', {'file_content': CSV, 'seed': 0}) is not None
+    assert cache.key('MLP_TRAIN', {'file_content': CSV, 'seed': 1}) != cache.key('MLP_TRAIN', {'file_content': CSV, 'seed': 0})
+    assert cache.key('ML_TRAIN', {'file_content': CSV}) is not None
+    assert cache.key('UNKNOWN', {'file_content': CSV, 'seed': 0}) is None
+
+
+def test_inline_content_and_hash_share_the_key():
+    cache = ResultCache()
+    inline = cache.key('ML_TRAIN', {'file_content': CSV, 'epochs': 5})
+    assert inline == cache.key('ML_TRAIN', {'dataset_hash': content_hash(CSV), 'epochs': 5})
+    assert inline != cache.key('ML_TRAIN', {'file_content': CSV, 'epochs': 6})
+
+
+def test_only_successful_results_are_stored():
+    cache = ResultCache()
+    key = cache.key('ML_TRAIN', {'file_content': CSV})
+    cache.put(key, {'status': 'error', 'msg': 'x'})
+    assert cache.get(key) is None
+    cache.put(key, OK)
+    assert cache.get(key) == dict(OK, cached=True)
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_results_survive_restart(tmp_path):
+    cache = ResultCache(max_entries=2, persist_dir=str(tmp_path))
+    keys = [cache.key('ML_TRAIN', {'file_content': CSV, 'epochs': e}) for e in range(3)]
+    for key in keys: cache.put(key, OK)
+    # La entrada expulsada por LRU tambien desaparece del disco
+    assert sorted(os.listdir(tmp_path)) == sorted(f'{k}.json' for k in keys[1:])
+
+    reloaded = ResultCache(max_entries=2, persist_dir=str(tmp_path))
+    assert reloaded.get(keys[0]) is None
+    assert reloaded.get(keys[2]) == dict(OK, cached=True)
@@ -0,0 +1,92 @@
+import pytest
+from api.admission import AdmissionController, Busy
+from api.allreduce import RingAborted
+from api.task_executor import TaskExecutor
+
+CSV = '\n'.join(f'{x},{2 * x % 7},{3 * x + 1}' for x in range(30))
+RING = {'task_type': 'ML_TRAIN', 'file_content': CSV, 'n_features': 2, 'epochs': 40,
+        'scaling': {'means': [14.5, 3.0], 'stds': [8.66, 2.0], 'y_mean': 44.5, 'y_std': 26.0}}
+
+
+def test_no_wait_acquire_never_queues():
+    admission = AdmissionController(1)
+    admission.acquire('ML_TRAIN', wait=False)
+    with pytest.raises(Busy):
+        admission.acquire('ML_TRAIN', wait=False)
+    assert admission.load()['queue'] == 0
+    admission.release('ML_TRAIN')
+    admission.acquire('ML_TRAIN', wait=False)
+
+
+@pytest.fixture(scope='module')
+def executors():
+    pooled, inline = TaskExecutor('n1', workers=1), TaskExecutor('n1', workers=0)
+    yield pooled, inline
+    pooled.shutdown()
+
+
+def test_ring_member_runs_in_pool_with_same_result(executors):
+    pooled, inline = executors
+    calls = {}
+
+    def allreduce(name):
+        # Anillo de dos miembros iguales: la suma es el doble del vector local
+        def reduce(vector):
+            calls[name] = calls.get(name, 0) + 1
+            return [2 * v for v in vector]
+        return reduce
+
+    a = pooled.run_ring('ML_TRAIN', RING, allreduce('pool'))
+    b = inline.run_ring('ML_TRAIN', RING, allreduce('inline'))
+    assert a == b and a['n_samples'] == 60
+    assert calls['pool'] == calls['inline'] == 42      # n_samples + 40 epocas + sse
+
+
+def test_ring_abort_reaches_worker_process(executors):
+    pooled, _ = executors
+    seen = []
+
+    def allreduce(vector):
+        seen.append(vector)
+        if len(seen) == 3: raise RingAborted('sucesor caido')
+        return vector
+
+    with pytest.raises(RingAborted, match='sucesor caido'):
+        pooled.run_ring('ML_TRAIN', RING, allreduce)
+    assert len(seen) == 3
+
+
+class Discovery:
+    def __init__(self, my_ip):
+        self.my_ip = my_ip
+
+    def get_peers(self):
+        return {}
+
+
+class LoopbackPool:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def request(self, ip, msg, timeout=15):
+        return self.nodes[ip].handle_message(dict(msg))
+
+
+def test_failing_member_releases_the_ring_at_once():
+    import time
+    from api.distributed_api import DistributedAPI
+    nodes = {ip: DistributedAPI(f'n{i}', Discovery(ip), None, port=0)
+             for i, ip in enumerate(('10.0.0.1', '10.0.0.2'), 1)}
+    for node in nodes.values(): node.pool = LoopbackPool(nodes)
+    coordinator = nodes['10.0.0.1']
+
+    def broken(task_type, d, allreduce):
+        raise ValueError('El trozo tiene 3 caracteristicas, se esperaban 2')
+    coordinator.executor.run_ring = broken
+
+    t0 = time.time()
+    reply = coordinator._ring_train('ML_TRAIN', {'file_content': CSV}, [{'ip': 'local'}, {'ip': '10.0.0.2'}],
+                                    {}, None)
+    assert reply['status'] == 'error' and 'caracteristicas' in reply['msg']
+    assert time.time() - t0 < coordinator.RING_TIMEOUT / 3
+    for node in nodes.values(): node.jobs.shutdown()